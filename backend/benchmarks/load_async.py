@@ -0,0 +1,121 @@
+"""Sync vs async request path under many concurrent clients.
+
+Seeds USERS users the way skill_search.py does, then has CLIENTS
+concurrent clients each make REQUESTS skill searches, once per path:
+
+- sync: as FastAPI runs a `def` route, each request waits for one of
+  THREADS worker threads, checks a Session out of the app's sync pool
+  (DB_POOL_SIZE + DB_MAX_OVERFLOW) and calls
+  search_public_users_with_ratings;
+- async: as GET /api/users/search runs, each request opens an
+  AsyncSession on the app's asyncpg pool (DB_ASYNC_POOL_SIZE +
+  DB_ASYNC_MAX_OVERFLOW) and awaits search_public_users_with_ratings_async.
+
+Latency is measured from when the client issues the request, so queueing
+for a thread or a connection counts. Reports requests/sec and p50/p99.
+
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/load_async.py [clients ...]
+
+The schema is dropped afterwards.
+"""
+import os
+import sys
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from config import get_settings
+from services.user_service import UserService
+from benchmarks.skill_search import SCHEMA, SKILLS, seed
+
+USERS = 10000
+REQUESTS = 10
+THREADS = 40  # anyio's default thread limit, which FastAPI runs sync routes on
+
+settings = get_settings()
+
+def report(label: str, samples: list, elapsed: float) -> None:
+    samples.sort()
+    print(
+        f"  {label:<6} {len(samples) / elapsed:7.0f} req/s   p50 {statistics.median(samples):8.2f} ms   "
+        f"p99 {samples[int(len(samples) * 0.99) - 1]:8.2f} ms   max {samples[-1]:8.2f} ms"
+    )
+
+async def load(clients: int, request) -> tuple:
+    """Run `clients` clients making REQUESTS requests each; returns (latencies in ms, elapsed seconds)"""
+    latencies = []
+
+    async def client(rng: random.Random):
+        for _ in range(REQUESTS):
+            skill = rng.choice(SKILLS[:100])
+            started = time.perf_counter()
+            await request(skill)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client(random.Random(i)) for i in range(clients)])
+    return latencies, time.perf_counter() - started
+
+async def run_sync(url: str, clients: int) -> None:
+    engine = create_engine(
+        url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        connect_args={"options": f"-csearch_path={SCHEMA}"}
+    )
+    executor = ThreadPoolExecutor(THREADS)
+    loop = asyncio.get_running_loop()
+
+    def search(skill: str):
+        with Session(engine) as db:
+            return UserService.search_public_users_with_ratings(db, [skill])
+
+    try:
+        latencies, elapsed = await load(clients, lambda skill: loop.run_in_executor(executor, search, skill))
+        report("sync", latencies, elapsed)
+    finally:
+        executor.shutdown()
+        engine.dispose()
+
+async def run_async(url: str, clients: int) -> None:
+    engine = create_async_engine(
+        url.replace("postgresql://", "postgresql+asyncpg://", 1),
+        pool_size=settings.db_async_pool_size,
+        max_overflow=settings.db_async_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+
+    async def search(skill: str):
+        async with AsyncSession(engine) as db:
+            return await UserService.search_public_users_with_ratings_async(db, [skill])
+
+    try:
+        latencies, elapsed = await load(clients, search)
+        report("async", latencies, elapsed)
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a Postgres database the benchmark may create schemas in")
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    try:
+        seed(engine, USERS)
+        for clients in [int(arg) for arg in sys.argv[1:]] or [1000]:
+            print(f"{clients} clients x {REQUESTS} searches over {USERS} users")
+            asyncio.run(run_sync(url, clients))
+            asyncio.run(run_async(url, clients))
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
@@ -0,0 +1,150 @@
+"""Chat load test against a running server: WebSocket fan-out and REST catch-up.
+
+Seeds ROOMS accepted swaps, each between two new users, in the server's
+database, connects both participants of every room over WebSocket and
+has each send MESSAGES messages at RATE per second. Reports the delay
+from send to delivery at the other participant, then checks that
+GET /chat?since= returns every message, in order, both right away
+(messages may still be in the write buffer) and once they are written.
+
+Start the server with CLERK_VERIFY_TOKENS=false (the test makes its own
+unsigned tokens), then:
+
+    LOAD_BASE_URL=http://localhost:8000 DATABASE_URL=postgresql://... \\
+        python benchmarks/load_chat_ws.py [rooms ...]
+
+Seeded users, swaps and their messages are deleted afterwards.
+"""
+import os
+import sys
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import requests
+import websockets
+from jose import jwt
+from sqlalchemy import create_engine, delete
+from models.user import User
+from models.swap import SwapRequest, SwapStatus, ChatMessage
+
+MESSAGES = 50
+RATE = 5.0
+FLUSH_WAIT_SECONDS = 2
+
+def token(user_id: str) -> str:
+    return jwt.encode({"sub": user_id, "exp": int(time.time()) + 3600}, "load-test", algorithm="HS256")
+
+def seed(engine, rooms: int) -> list:
+    pairs = [(f"load-chat-{uuid.uuid4()}", f"load-chat-{uuid.uuid4()}") for _ in range(rooms)]
+    swaps = [(str(uuid.uuid4()), sender, recipient) for sender, recipient in pairs]
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {"id": user_id, "name": user_id[:18], "email": f"{user_id}@example.com"}
+            for pair in pairs for user_id in pair
+        ])
+        connection.execute(SwapRequest.__table__.insert(), [
+            {
+                "id": swap_id, "from_user_id": sender, "to_user_id": recipient,
+                "from_user_name": sender[:18], "to_user_name": recipient[:18],
+                "skill_offered": "Python", "skill_wanted": "Guitar", "status": SwapStatus.ACCEPTED
+            }
+            for swap_id, sender, recipient in swaps
+        ])
+    return swaps
+
+def cleanup(engine, swaps: list) -> None:
+    swap_ids = [swap_id for swap_id, _, _ in swaps]
+    user_ids = [user_id for _, sender, recipient in swaps for user_id in (sender, recipient)]
+    with engine.begin() as connection:
+        connection.execute(delete(ChatMessage).where(ChatMessage.swap_request_id.in_(swap_ids)))
+        connection.execute(delete(SwapRequest).where(SwapRequest.id.in_(swap_ids)))
+        connection.execute(delete(User).where(User.id.in_(user_ids)))
+
+async def participant(ws_url: str, swap_id: str, user_id: str, other_id: str, sent: dict, latencies: list) -> None:
+    """Send MESSAGES messages and record when the other participant's arrive"""
+    async with websockets.connect(f"{ws_url}/api/swaps/{swap_id}/ws?token={token(user_id)}") as websocket:
+        async def send():
+            for i in range(MESSAGES):
+                text = f"{user_id} {i}"
+                sent[text] = time.perf_counter()
+                await websocket.send(json.dumps({"message": text}))
+                await asyncio.sleep(1 / RATE)
+
+        async def receive():
+            received = 0
+            while received < MESSAGES:
+                event = json.loads(await websocket.recv())
+                if event["from_user_id"] == other_id:
+                    latencies.append((time.perf_counter() - sent[event["message"]]) * 1000)
+                    received += 1
+
+        await asyncio.wait_for(asyncio.gather(send(), receive()), timeout=MESSAGES / RATE + 30)
+
+def check_history(base_url: str, swap_id: str, user_id: str) -> list:
+    """Page through the chat with `since` as a polling client would; returns the messages"""
+    headers = {"Authorization": f"Bearer {token(user_id)}"}
+    messages, since = [], None
+    while True:
+        params = {"limit": 200, **({"since": since} if since else {})}
+        response = requests.get(f"{base_url}/api/swaps/{swap_id}/chat", params=params, headers=headers)
+        response.raise_for_status()
+        page = response.json()
+        if not page:
+            return messages
+        messages += page
+        since = page[-1]["id"]
+
+def report(label: str, samples: list) -> None:
+    samples = sorted(samples)
+    print(
+        f"  {label:<28} p50 {statistics.median(samples):8.2f} ms   "
+        f"p95 {samples[int(len(samples) * 0.95) - 1]:8.2f} ms   max {samples[-1]:8.2f} ms"
+    )
+
+async def run(base_url: str, engine, rooms: int) -> None:
+    ws_url = "ws" + base_url[len("http"):]
+    swaps = seed(engine, rooms)
+    try:
+        sent, latencies = {}, []
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            participant(ws_url, swap_id, user_id, other_id, sent, latencies)
+            for swap_id, sender, recipient in swaps
+            for user_id, other_id in ((sender, recipient), (recipient, sender))
+        ])
+        elapsed = time.perf_counter() - started
+        print(f"{rooms} rooms, {len(sent)} messages in {elapsed:.1f}s ({len(sent) / elapsed:.0f}/s)")
+        report("WebSocket delivery", latencies)
+
+        for label in ("REST since, right away", "REST since, after flush"):
+            started = time.perf_counter()
+            incomplete = 0
+            for swap_id, sender, _ in swaps:
+                history = await asyncio.to_thread(check_history, base_url, swap_id, sender)
+                times = [message["created_at"] for message in history]
+                assert times == sorted(times), f"{swap_id}: messages out of order"
+                incomplete += len(history) != 2 * MESSAGES
+            print(
+                f"  {label:<28} {(time.perf_counter() - started) * 1000 / rooms:8.2f} ms per room, "
+                f"{incomplete} of {rooms} rooms incomplete"
+            )
+            await asyncio.sleep(FLUSH_WAIT_SECONDS)
+    finally:
+        cleanup(engine, swaps)
+
+if __name__ == "__main__":
+    base_url = os.getenv("LOAD_BASE_URL")
+    database_url = os.getenv("DATABASE_URL")
+    if not base_url or not database_url:
+        sys.exit("Set LOAD_BASE_URL to the running server and DATABASE_URL to its database")
+    engine = create_engine(database_url)
+    try:
+        for rooms in [int(arg) for arg in sys.argv[1:]] or [10, 100, 500]:
+            asyncio.run(run(base_url.rstrip("/"), engine, rooms))
+    finally:
+        engine.dispose()
@@ -0,0 +1,77 @@
+"""Connection pool checkout wait under load, for a range of pool sizes.
+
+Runs THREADS threads (FastAPI's sync threadpool size) that each handle
+REQUESTS simulated requests: check out a connection, run a query that
+takes QUERY_SECONDS on BENCH_DATABASE_URL, return the connection. The
+pool is the app's InstrumentedQueuePool, so the reported checkout waits
+are the same numbers GET /internal/metrics/db-pool shows.
+
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/load_pool.py [pool_size ...]
+
+Nothing is written to the database.
+"""
+import os
+import sys
+import statistics
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, text
+from db.pool_metrics import InstrumentedQueuePool, PoolMetrics
+
+THREADS = 40
+REQUESTS = 50
+QUERY_SECONDS = 0.01
+
+def run(url: str, pool_size: int) -> None:
+    metrics = PoolMetrics()
+    pool_class = type("BenchQueuePool", (InstrumentedQueuePool,), {"metrics": metrics})
+    engine = create_engine(url, poolclass=pool_class, pool_size=pool_size, max_overflow=0, pool_timeout=30)
+    try:
+        # Open the pool's connections up front so connect time isn't counted as waiting
+        connections = [engine.connect() for _ in range(pool_size)]
+        for connection in connections:
+            connection.close()
+        metrics.reset()
+
+        waits = []
+        waits_lock = threading.Lock()
+        barrier = threading.Barrier(THREADS)
+
+        def worker():
+            barrier.wait()
+            for _ in range(REQUESTS):
+                started = time.perf_counter()
+                with engine.connect() as connection:
+                    waited = time.perf_counter() - started
+                    connection.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": QUERY_SECONDS})
+                with waits_lock:
+                    waits.append(waited * 1000)
+
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        snapshot = metrics.snapshot(engine.pool)
+        waits.sort()
+        print(
+            f"  pool {pool_size:>3}   {len(waits) / elapsed:7.0f} req/s   "
+            f"wait p50 {statistics.median(waits):8.2f} ms   p95 {waits[int(len(waits) * 0.95) - 1]:8.2f} ms   "
+            f"max {snapshot['checkout_wait_seconds']['max'] * 1000:8.2f} ms   timeouts {snapshot['checkout_timeouts']}"
+        )
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a Postgres database to run queries against")
+    print(f"{THREADS} threads x {REQUESTS} requests, {QUERY_SECONDS * 1000:.0f} ms per query")
+    for pool_size in [int(arg) for arg in sys.argv[1:]] or [5, 10, 20, 40]:
+        run(url, pool_size)
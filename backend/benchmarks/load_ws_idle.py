@@ -0,0 +1,127 @@
+"""Idle WebSocket load test: many open chat connections with no traffic.
+
+Opens CONNECTIONS chat sockets against a running server (both participants
+of CONNECTIONS / 2 seeded swaps), keeps them idle for IDLE_SECONDS, and
+meanwhile pings a sample of them every PING_INTERVAL seconds. Reports
+the server's RSS and open file descriptors before and after connecting
+(so the cost per connection), ping round-trip percentiles (whether the
+server's event loop keeps up with heartbeats under that many sockets),
+and how many connections dropped.
+
+The server must run on this host, as a single worker, so its memory can
+be read from /proc. Start it with CLERK_VERIFY_TOKENS=false (see load_chat_ws.py), then:
+
+    LOAD_BASE_URL=http://localhost:8000 DATABASE_URL=postgresql://... LOAD_SERVER_PID=<pid> \\
+        python benchmarks/load_ws_idle.py [connections ...]
+
+The client needs a file descriptor per connection; the soft limit is
+raised to the hard limit. Seeded users and swaps are deleted afterwards.
+"""
+import os
+import sys
+import asyncio
+import random
+import resource
+import statistics
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import websockets
+from sqlalchemy import create_engine
+
+from benchmarks.load_chat_ws import seed, cleanup, token
+
+IDLE_SECONDS = 60
+PING_INTERVAL = 5
+PING_SAMPLE = 200
+CONNECT_CONCURRENCY = 200
+
+def server_usage(pid: int) -> tuple:
+    """(RSS in MiB, open file descriptors) of the server process"""
+    with open(f"/proc/{pid}/status") as status:
+        rss_kib = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+    return rss_kib / 1024, len(os.listdir(f"/proc/{pid}/fd"))
+
+async def open_all(ws_url: str, swaps: list) -> list:
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def connect(swap_id: str, user_id: str):
+        async with gate:
+            # Pings are sent by hand below, so their latency can be measured
+            return await websockets.connect(
+                f"{ws_url}/api/swaps/{swap_id}/ws?token={token(user_id)}", ping_interval=None
+            )
+
+    results = await asyncio.gather(*[
+        connect(swap_id, user_id)
+        for swap_id, sender, recipient in swaps
+        for user_id in (sender, recipient)
+    ], return_exceptions=True)
+    failed = [result for result in results if isinstance(result, BaseException)]
+    if failed:
+        print(f"  {len(failed)} connections failed to open, e.g. {failed[0]!r}")
+    return [result for result in results if not isinstance(result, BaseException)]
+
+async def ping_round(sockets: list) -> list:
+    """Ping a sample of the sockets at once; returns round trips in ms (None if the socket is gone)"""
+    async def ping(websocket):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(await websocket.ping(), timeout=10)
+        except Exception:
+            return None
+        return (time.perf_counter() - started) * 1000
+
+    return await asyncio.gather(*[ping(websocket) for websocket in random.sample(sockets, min(PING_SAMPLE, len(sockets)))])
+
+async def run(base_url: str, engine, pid: int, connections: int) -> None:
+    ws_url = "ws" + base_url[len("http"):]
+    swaps = seed(engine, connections // 2)
+    sockets = []
+    try:
+        rss_before, fds_before = server_usage(pid)
+        started = time.perf_counter()
+        sockets = await open_all(ws_url, swaps)
+        print(f"{len(sockets)} idle connections opened in {time.perf_counter() - started:.1f}s")
+        rss_after, fds_after = server_usage(pid)
+        opened = max(len(sockets), 1)
+        print(
+            f"  server RSS {rss_before:8.1f} -> {rss_after:8.1f} MiB "
+            f"({(rss_after - rss_before) * 1024 / opened:6.1f} KiB per connection)"
+        )
+        print(f"  server fds {fds_before:8d} -> {fds_after:8d}")
+
+        round_trips, lost = [], 0
+        deadline = time.monotonic() + IDLE_SECONDS
+        while time.monotonic() < deadline:
+            results = await ping_round(sockets)
+            round_trips += [result for result in results if result is not None]
+            lost += sum(result is None for result in results)
+            await asyncio.sleep(PING_INTERVAL)
+        if round_trips:
+            round_trips.sort()
+            print(
+                f"  ping round trip   p50 {statistics.median(round_trips):8.2f} ms   "
+                f"p95 {round_trips[int(len(round_trips) * 0.95) - 1]:8.2f} ms   max {round_trips[-1]:8.2f} ms"
+            )
+        closed = sum(websocket.close_code is not None for websocket in sockets)
+        print(f"  {lost} pings unanswered, {closed} connections closed while idle")
+    finally:
+        await asyncio.gather(*[websocket.close() for websocket in sockets], return_exceptions=True)
+        cleanup(engine, swaps)
+
+if __name__ == "__main__":
+    base_url = os.getenv("LOAD_BASE_URL")
+    database_url = os.getenv("DATABASE_URL")
+    pid = os.getenv("LOAD_SERVER_PID")
+    if not base_url or not database_url or not pid:
+        sys.exit("Set LOAD_BASE_URL, DATABASE_URL and LOAD_SERVER_PID (the server's process ID)")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    engine = create_engine(database_url)
+    try:
+        for connections in [int(arg) for arg in sys.argv[1:]] or [1000, 10000]:
+            asyncio.run(run(base_url.rstrip("/"), engine, int(pid), connections))
+    finally:
+        engine.dispose()
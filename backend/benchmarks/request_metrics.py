@@ -0,0 +1,80 @@
+"""Per-request cost of RequestMetricsMiddleware.
+
+Calls a one-route FastAPI app directly over ASGI (no server, no socket),
+REQUESTS times bare and REQUESTS times wrapped in the middleware, and
+reports per-request latency percentiles for both plus the difference:
+what the middleware adds to every request the real app serves.
+
+    python benchmarks/request_metrics.py [requests]
+
+Needs no database.
+"""
+import os
+import sys
+import asyncio
+import statistics
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI
+from utils.request_metrics import RequestMetricsMiddleware
+
+REQUESTS = 20000
+WARMUP = 1000
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/swaps/{swap_id}/chat")
+    async def chat(swap_id: str):
+        return {"swap_id": swap_id}
+
+    return app
+
+async def call(app, path: str) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+async def measure(app, requests: int) -> list:
+    for i in range(WARMUP):
+        await call(app, f"/api/swaps/{i}/chat")
+    samples = []
+    for i in range(requests):
+        started = time.perf_counter()
+        await call(app, f"/api/swaps/{i}/chat")
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return samples
+
+def report(label: str, samples: list) -> None:
+    print(
+        f"  {label:<12} p50 {statistics.median(samples):8.2f} us   "
+        f"p99 {samples[int(len(samples) * 0.99) - 1]:8.2f} us   mean {statistics.fmean(samples):8.2f} us"
+    )
+
+async def main(requests: int) -> None:
+    bare = await measure(build_app(), requests)
+    wrapped = await measure(RequestMetricsMiddleware(build_app()), requests)
+    print(f"{requests} requests, in-process ASGI calls")
+    report("bare", bare)
+    report("middleware", wrapped)
+    print(
+        f"  middleware adds {statistics.median(wrapped) - statistics.median(bare):.2f} us at p50, "
+        f"{statistics.fmean(wrapped) - statistics.fmean(bare):.2f} us on average per request"
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS))
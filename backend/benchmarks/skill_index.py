@@ -0,0 +1,65 @@
+"""In-process SkillIndex benchmarks on a synthetic population.
+
+Fills a SkillIndex with users whose skills follow a Zipf-like distribution
+(a few very popular skills, a long tail) and times match() and
+find_cycles() for a sample of those users. No database is needed.
+
+    python benchmarks/skill_index.py [users ...]
+"""
+import os
+import sys
+import random
+import statistics
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.skill_index import SkillIndex
+
+SKILLS = [f"skill {i}" for i in range(2000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(SKILLS))]
+
+def build(count: int, rng: random.Random):
+    index = SkillIndex()
+    users = []
+    for i in range(count):
+        user_id = f"user-{i}"
+        offered = rng.choices(SKILLS, WEIGHTS, k=rng.randint(1, 5))
+        wanted = rng.choices(SKILLS, WEIGHTS, k=rng.randint(1, 5))
+        index._add(user_id, offered, wanted)
+        users.append((user_id, offered, wanted))
+    # As SkillIndex.rebuild does before swapping the new index in
+    index._cache_dense_bitmaps()
+    index._loaded = True
+    return index, users
+
+def timed(label: str, call, samples) -> None:
+    times = []
+    for args in samples:
+        started = time.perf_counter()
+        call(*args)
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    print(f"  {label:<24} p50 {statistics.median(times):8.2f} ms   p95 {times[int(len(times) * 0.95) - 1]:8.2f} ms   max {times[-1]:8.2f} ms")
+
+def run(count: int) -> None:
+    rng = random.Random(count)
+    started = time.perf_counter()
+    index, users = build(count, rng)
+    print(f"{count} users indexed in {time.perf_counter() - started:.1f}s")
+
+    samples = rng.sample(users, min(200, count))
+    timed(
+        "match (top 20)",
+        lambda user_id, offered, wanted: index.match(offered, wanted, exclude_user_id=user_id, limit=20),
+        samples
+    )
+    timed(
+        "find_cycles (3-4 way)",
+        lambda user_id, offered, wanted: index.find_cycles(user_id, offered, wanted),
+        samples
+    )
+
+if __name__ == "__main__":
+    for count in [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 500000]:
+        run(count)
@@ -0,0 +1,105 @@
+"""Skill search latency against a seeded users table.
+
+Seeds a throwaway schema on BENCH_DATABASE_URL with users whose skills
+follow a Zipf-like distribution (a few very popular skills, a long tail),
+then times UserService.search_public_users_with_ratings for popular and
+rare skills, any/all matching and a deep page.
+
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/skill_search.py [users ...]
+
+The schema is dropped afterwards.
+"""
+import os
+import sys
+import random
+import statistics
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from db.database import Base
+from models.user import User, normalize_skills
+from models.swap import UserRatingSummary
+from services.user_service import UserService
+
+SCHEMA = "bench_skill_search"
+SKILLS = [f"Skill {i}" for i in range(2000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(SKILLS))]
+BATCH = 10000
+
+def seed(engine, count: int) -> None:
+    rng = random.Random(count)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine, tables=[User.__table__, UserRatingSummary.__table__])
+    for start in range(0, count, BATCH):
+        rows = []
+        for _ in range(min(BATCH, count - start)):
+            offered = rng.choices(SKILLS, WEIGHTS, k=rng.randint(1, 5))
+            wanted = rng.choices(SKILLS, WEIGHTS, k=rng.randint(1, 5))
+            user_id = str(uuid.uuid4())
+            rows.append({
+                "id": user_id,
+                "name": user_id[:8],
+                "email": f"{user_id}@example.com",
+                "skills_offered": offered,
+                "skills_wanted": wanted,
+                "skills_offered_normalized": normalize_skills(offered),
+                "skills_wanted_normalized": normalize_skills(wanted),
+                "is_public": rng.random() < 0.9,
+                "is_active": True,
+                "is_banned": False,
+            })
+        with engine.begin() as connection:
+            connection.execute(User.__table__.insert(), rows)
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE users"))
+
+def timed(label: str, call, repeat: int = 20) -> None:
+    call()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    print(f"  {label:<32} p50 {statistics.median(samples):7.2f} ms   p95 {samples[int(len(samples) * 0.95) - 1]:7.2f} ms")
+
+def run(url: str, count: int) -> None:
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    try:
+        started = time.perf_counter()
+        seed(engine, count)
+        print(f"{count} users seeded in {time.perf_counter() - started:.1f}s")
+
+        db = sessionmaker(bind=engine)()
+        try:
+            search = UserService.search_public_users_with_ratings
+            timed("popular skill", lambda: search(db, [SKILLS[0]]))
+            timed("rare skill", lambda: search(db, [SKILLS[-1]]))
+            timed("any of 3", lambda: search(db, SKILLS[:3]))
+            timed("all of 2", lambda: search(db, SKILLS[:2], match_all=True))
+            timed("offered only", lambda: search(db, [SKILLS[0]], skill_type="offered"))
+
+            def deep_page():
+                cursor = None
+                for _ in range(10):
+                    _, cursor = search(db, [SKILLS[0]], cursor=cursor)
+            timed("10 pages deep", deep_page, repeat=5)
+        finally:
+            db.close()
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+if __name__ == "__main__":
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a Postgres database the benchmark may create schemas in")
+    for count in [int(arg) for arg in sys.argv[1:]] or [1000, 100000, 1000000]:
+        run(url, count)
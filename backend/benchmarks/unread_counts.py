@@ -0,0 +1,115 @@
+"""Unread-count latency: maintained counters against counting rows.
+
+Seeds a throwaway schema on BENCH_DATABASE_URL with users holding a
+skewed number of notifications (a few users with very many), then times
+the unread badge read through NotificationService.get_unread_count
+against a live COUNT(*), and a full reconcile_unread_counts pass.
+
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/unread_counts.py [notifications ...]
+
+The schema is dropped afterwards.
+"""
+import os
+import sys
+import random
+import statistics
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+from db.database import Base
+from models.user import User
+from models.swap import (
+    Notification, NotificationCounter, PlatformMessage, BroadcastReadMarker, BroadcastDismissal
+)
+from services.notification_service import NotificationService
+
+SCHEMA = "bench_unread_counts"
+USERS = 10000
+BATCH = 10000
+
+def seed(engine, count: int) -> list:
+    rng = random.Random(count)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine, tables=[
+        User.__table__, Notification.__table__, NotificationCounter.__table__,
+        PlatformMessage.__table__, BroadcastReadMarker.__table__, BroadcastDismissal.__table__
+    ])
+    user_ids = [str(uuid.uuid4()) for _ in range(USERS)]
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {"id": user_id, "name": user_id[:8], "email": f"{user_id}@example.com"} for user_id in user_ids
+        ])
+    weights = [1 / (rank + 1) for rank in range(USERS)]
+    for start in range(0, count, BATCH):
+        recipients = rng.choices(user_ids, weights, k=min(BATCH, count - start))
+        with engine.begin() as connection:
+            connection.execute(Notification.__table__.insert(), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "type": "swap_request",
+                    "title": "New Swap Request",
+                    "message": "Someone wants to swap skills",
+                    "is_read": rng.random() < 0.7,
+                }
+                for user_id in recipients
+            ])
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    return user_ids
+
+def timed(label: str, call, repeat: int = 50) -> None:
+    call()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    print(f"  {label:<36} p50 {statistics.median(samples):8.2f} ms   p95 {samples[int(len(samples) * 0.95) - 1]:8.2f} ms")
+
+def run(url: str, count: int) -> None:
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    try:
+        started = time.perf_counter()
+        user_ids = seed(engine, count)
+        print(f"{count} notifications for {USERS} users seeded in {time.perf_counter() - started:.1f}s")
+
+        db = sessionmaker(bind=engine)()
+        try:
+            started = time.perf_counter()
+            NotificationService.reconcile_unread_counts(db)
+            print(f"  {'reconcile (from empty counters)':<36} {(time.perf_counter() - started) * 1000:8.0f} ms")
+            started = time.perf_counter()
+            NotificationService.reconcile_unread_counts(db)
+            print(f"  {'reconcile (no drift)':<36} {(time.perf_counter() - started) * 1000:8.0f} ms")
+
+            heaviest = user_ids[0]
+            timed("counter read, heaviest user", lambda: NotificationService.get_unread_count(db, heaviest))
+            timed("COUNT(*), heaviest user", lambda: db.query(func.count(Notification.id)).filter(
+                Notification.user_id == heaviest, Notification.is_read == False
+            ).scalar())
+            typical = user_ids[len(user_ids) // 2]
+            timed("counter read, typical user", lambda: NotificationService.get_unread_count(db, typical))
+            timed("COUNT(*), typical user", lambda: db.query(func.count(Notification.id)).filter(
+                Notification.user_id == typical, Notification.is_read == False
+            ).scalar())
+        finally:
+            db.close()
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+if __name__ == "__main__":
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a Postgres database the benchmark may create schemas in")
+    for count in [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]:
+        run(url, count)
@@ -5,10 +5,50 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = os.getenv("DATABASE_URL", "postgresql://postgres:rv@localhost/skillswap")
+    async_database_url: str = os.getenv("ASYNC_DATABASE_URL", "")  # defaults to DATABASE_URL with the asyncpg driver
+    database_replica_urls: str = os.getenv("DATABASE_REPLICA_URLS", "")  # comma-separated read replicas
+    replica_retry_seconds: float = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+    replica_health_check_seconds: float = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "5"))
+    replica_max_lag_seconds: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30"))  # 0 disables the lag check
+    replica_connect_timeout_seconds: int = int(os.getenv("REPLICA_CONNECT_TIMEOUT_SECONDS", "3"))
+    read_your_writes_seconds: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    db_async_pool_size: int = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
+    db_async_max_overflow: int = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "5"))
+    db_replica_pool_size: int = int(os.getenv("DB_REPLICA_POOL_SIZE", "10"))  # per replica, sync and async each
+    db_replica_max_overflow: int = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", "10"))
+    db_pool_timeout_seconds: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    db_pool_recycle_seconds: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))  # -1 disables recycling
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    db_statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 disables the timeout
     clerk_secret_key: str = os.getenv("CLERK_SECRET_KEY", "")
     clerk_publishable_key: str = os.getenv("CLERK_PUBLISHABLE_KEY", "")
+    clerk_jwks_url: str = os.getenv("CLERK_JWKS_URL", "https://api.clerk.com/v1/jwks")
+    clerk_jwks_ttl_seconds: int = int(os.getenv("CLERK_JWKS_TTL_SECONDS", "3600"))
+    clerk_jwks_min_refresh_seconds: float = float(os.getenv("CLERK_JWKS_MIN_REFRESH_SECONDS", "30"))
+    clerk_issuer: str = os.getenv("CLERK_ISSUER", "")  # e.g. https://<instance>.clerk.accounts.dev; empty skips the check
+    clerk_audience: str = os.getenv("CLERK_AUDIENCE", "")  # empty skips the check
+    admin_user_ids: str = os.getenv("ADMIN_USER_IDS", "")  # comma-separated Clerk user IDs; empty admits no one
+    clerk_verify_tokens: bool = os.getenv("CLERK_VERIFY_TOKENS", "True").lower() == "true"
+    token_cache_size: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    skill_index_rebuild_interval_seconds: int = int(os.getenv("SKILL_INDEX_REBUILD_INTERVAL_SECONDS", "900"))
+    identity_cache_ttl_seconds: int = int(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "30"))
     api_host: str = os.getenv("API_HOST", "0.0.0.0")
     api_port: int = int(os.getenv("API_PORT", "8000"))
+    event_broker: str = os.getenv("EVENT_BROKER", "memory")  # 'memory' or 'postgres'
+    broadcast_delivery: str = os.getenv("BROADCAST_DELIVERY", "read")  # 'read' or 'write'
+    broadcast_job_stale_seconds: int = int(os.getenv("BROADCAST_JOB_STALE_SECONDS", "300"))  # no progress for this long: resumed
+    read_receipt_coalesce_ms: int = int(os.getenv("READ_RECEIPT_COALESCE_MS", "0"))  # 0 disables coalescing
+    outbox_poll_interval_seconds: float = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "5"))
+    unread_reconcile_interval_seconds: int = int(os.getenv("UNREAD_RECONCILE_INTERVAL_SECONDS", "3600"))
+    analytics_rollup_interval_seconds: int = int(os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "60"))
+    stats_reconcile_interval_seconds: int = int(os.getenv("STATS_RECONCILE_INTERVAL_SECONDS", "3600"))
+    stats_reconcile_timeout_ms: int = int(os.getenv("STATS_RECONCILE_TIMEOUT_MS", "600000"))  # replaces the statement timeout for its counts
+    sql_repeat_threshold: int = int(os.getenv("SQL_REPEAT_THRESHOLD", "5"))  # 0 disables N+1 detection
+    sql_query_budget: int = int(os.getenv("SQL_QUERY_BUDGET", "0"))  # statements per request, 0 disables
+    sql_query_budget_enforce: bool = os.getenv("SQL_QUERY_BUDGET_ENFORCE", "False").lower() == "true"
+    metrics_token: str = os.getenv("METRICS_TOKEN", "")  # bearer token for /metrics; empty allows only loopback clients
     debug: bool = os.getenv("DEBUG", "False").lower() == "true"
 
 @lru_cache()
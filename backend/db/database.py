@@ -1,14 +1,81 @@
-
+import asyncio
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import get_settings
+from db.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, instrument_engine, async_pool_metrics
+from db.replicas import Replica, ReplicaSet, READ_YOUR_WRITES_HEADER, reads_own_writes
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url)
+def _connect_args() -> dict:
+    if settings.db_statement_timeout_ms > 0:
+        return {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return {}
+
+def _async_connect_args() -> dict:
+    if settings.db_statement_timeout_ms > 0:
+        return {"server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}}
+    return {}
+
+def _pool_options(pool_size: int = settings.db_pool_size, max_overflow: int = settings.db_max_overflow) -> dict:
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+def _async_url(url: str) -> str:
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+# Sync routes run on FastAPI's threadpool (40 threads by default); size the
+# pool so pool_size + max_overflow covers it, or requests queue on checkout
+engine = create_engine(
+    settings.database_url,
+    poolclass=InstrumentedQueuePool,
+    connect_args=_connect_args(),
+    **_pool_options()
+)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async routes don't hold a thread while waiting on the database, so their
+# connections come from a separate asyncpg pool on the event loop. Its
+# queries are short reads, so a smaller pool serves them; it counts
+# against the server's max_connections alongside the sync pool
+async_engine = create_async_engine(
+    settings.async_database_url or _async_url(settings.database_url),
+    poolclass=InstrumentedAsyncQueuePool,
+    connect_args=_async_connect_args(),
+    **_pool_options(settings.db_async_pool_size, settings.db_async_max_overflow)
+)
+instrument_engine(async_engine.sync_engine, async_pool_metrics)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def _replica(url: str) -> Replica:
+    # A short connect timeout, so an unreachable replica fails fast and reads fall back
+    timeout = settings.replica_connect_timeout_seconds
+    pool_options = _pool_options(settings.db_replica_pool_size, settings.db_replica_max_overflow)
+    return Replica(
+        make_url(url).render_as_string(hide_password=True),
+        create_engine(url, connect_args={**_connect_args(), "connect_timeout": timeout}, **pool_options),
+        create_async_engine(
+            _async_url(url), connect_args={**_async_connect_args(), "timeout": timeout}, **pool_options
+        )
+    )
+
+replicas = ReplicaSet(
+    [_replica(url) for url in (url.strip() for url in settings.database_replica_urls.split(",")) if url],
+    retry_after=settings.replica_retry_seconds,
+    max_lag=settings.replica_max_lag_seconds
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -18,5 +85,57 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _read_replica(request: Request):
+    """Replica for a read-only request, or None to read from the primary"""
+    if reads_own_writes(request.headers.get(READ_YOUR_WRITES_HEADER)):
+        return None
+    return replicas.choose()
+
+# A replica that refuses connections, times out connecting or has no free
+# pooled connection is skipped for the primary
+REPLICA_UNAVAILABLE = (DBAPIError, PoolTimeoutError, asyncio.TimeoutError, OSError)
+
+def get_db_ro(request: Request):
+    """Session for read-only routes: a healthy replica, or the primary right
+    after the caller's own write, when no replica is available, or when the
+    chosen one can't be reached"""
+    db = None
+    replica = _read_replica(request)
+    if replica:
+        db = SessionLocal(bind=replica.engine)
+        try:
+            db.connection()
+        except REPLICA_UNAVAILABLE:
+            db.close()
+            replicas.mark_down(replica)
+            db = None
+    if db is None:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db_ro(request: Request):
+    """Async counterpart of get_db_ro"""
+    db = None
+    replica = _read_replica(request)
+    if replica:
+        db = AsyncSessionLocal(bind=replica.async_engine)
+        try:
+            await db.connection()
+        except REPLICA_UNAVAILABLE:
+            await db.close()
+            replicas.mark_down(replica)
+            db = None
+    if db is None:
+        db = AsyncSessionLocal()
+    async with db:
+        yield db
+
 def create_tables():
     Base.metadata.create_all(bind=engine)
@@ -0,0 +1,32 @@
+from contextlib import contextmanager
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from typing import Iterator
+
+def try_advisory_xact_lock(db: Session, name: str) -> bool:
+    """Take the named Postgres advisory lock if it is free; returns whether it was taken.
+
+    The lock is held until the caller's transaction ends.
+    """
+    return bool(db.execute(select(func.pg_try_advisory_xact_lock(func.hashtext(name)))).scalar())
+
+@contextmanager
+def advisory_lock(engine, name: str) -> Iterator[None]:
+    """Hold the named Postgres advisory lock for the duration of the block.
+
+    The lock is taken at session level on a connection of its own, so it
+    stays held across commits made inside the block, unlike a
+    transaction-scoped lock.
+    """
+    key = func.hashtext(name)
+    with engine.connect() as connection:
+        # Waiting for another holder can take longer than the statement timeout
+        connection.execute(text("SET LOCAL statement_timeout = 0"))
+        connection.execute(select(func.pg_advisory_lock(key)))
+        # Session-level locks outlive the transaction; don't sit idle in one
+        connection.commit()
+        try:
+            yield
+        finally:
+            connection.execute(select(func.pg_advisory_unlock(key)))
+            connection.commit()
@@ -0,0 +1,104 @@
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from typing import List, Tuple
+import bisect
+import threading
+import time
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+CHECKOUT_WAIT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class PoolMetrics:
+    """Counters and a checkout wait histogram for one connection pool"""
+
+    def __init__(self, buckets: Tuple[float, ...] = CHECKOUT_WAIT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self._bucket_counts: List[int] = [0] * (len(self.buckets) + 1)
+
+    def record_checkout(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self._bucket_counts[bisect.bisect_left(self.buckets, waited)] += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool) -> dict:
+        """Current pool occupancy plus the accumulated counters"""
+        with self._lock:
+            cumulative, histogram = 0, {}
+            for bound, count in zip(list(self.buckets) + ["+Inf"], self._bucket_counts):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            waits = self.checkouts + self.checkout_timeouts
+            return {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "in_use": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "checkout_wait_seconds": {
+                    "total": round(self.wait_seconds_total, 6),
+                    "max": round(self.wait_seconds_max, 6),
+                    "avg": round(self.wait_seconds_total / waits, 6) if waits else 0.0,
+                    # Cumulative counts of checkouts that waited at most each bound
+                    "histogram": histogram
+                }
+            }
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+class _CheckoutTimingMixin:
+    """Records how long each checkout waited for a connection in `metrics`"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.record_checkout(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    metrics = pool_metrics
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+def instrument_engine(engine, metrics: PoolMetrics = pool_metrics) -> None:
+    """Count new and invalidated connections on a (sync) engine's pool"""
+    event.listen(engine, "connect", lambda dbapi_connection, record: metrics.record_connect())
+    event.listen(
+        engine, "invalidate",
+        lambda dbapi_connection, record, exception: metrics.record_invalidation()
+    )
@@ -0,0 +1,111 @@
+from sqlalchemy import event, text
+from typing import List, Optional
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Set on responses to writes with the time (epoch seconds) until which the
+# client's reads should go to the primary; clients send it back unchanged
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
+# Seconds the replica is behind the primary; 0 when it has replayed all it
+# received, as an idle primary leaves the last replay timestamp behind
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class Replica:
+    """A read replica's sync and async engines plus its health state"""
+
+    def __init__(self, name: str, engine, async_engine):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.down_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+class ReplicaSet:
+    """Round-robin selection over the healthy replicas.
+
+    `check_health` probes every replica and is run periodically: replicas
+    that can't be reached, or lag more than `max_lag` seconds, are taken
+    out of rotation until a later probe succeeds. Between probes, a replica
+    whose connections fail (refused, dropped, or a failed pre-ping) is
+    skipped for `retry_after` seconds. When none are healthy, callers fall
+    back to the primary.
+    """
+
+    def __init__(self, replicas: List[Replica], retry_after: float = 30, max_lag: Optional[float] = None):
+        self.replicas = replicas
+        self.retry_after = retry_after
+        self.max_lag = max_lag
+        self._counter = itertools.count()
+        for replica in replicas:
+            self._watch(replica, replica.engine)
+            self._watch(replica, replica.async_engine.sync_engine)
+
+    def _watch(self, replica: Replica, engine) -> None:
+        def handle_error(context):
+            # Connection refused (no connection yet) or dropped; query errors don't count
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(replica)
+        event.listen(engine, "handle_error", handle_error)
+
+    def mark_down(self, replica: Replica, reason: str = "unavailable") -> None:
+        if replica.healthy:
+            logger.warning("Read replica %s is %s, routing reads elsewhere", replica.name, reason)
+        replica.down_until = time.monotonic() + self.retry_after
+
+    def mark_up(self, replica: Replica) -> None:
+        if not replica.healthy:
+            logger.info("Read replica %s is back in rotation", replica.name)
+        replica.down_until = 0.0
+
+    def check_health(self) -> None:
+        """Probe every replica's connectivity and lag, updating which are in rotation"""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    lag = float(connection.execute(REPLICA_LAG_QUERY).scalar())
+            except Exception:
+                self.mark_down(replica)
+                continue
+            if self.max_lag and lag > self.max_lag:
+                self.mark_down(replica, f"{lag:.0f}s behind")
+            else:
+                self.mark_up(replica)
+
+    def choose(self) -> Optional[Replica]:
+        """Next healthy replica in rotation, or None to use the primary"""
+        if not self.replicas:
+            return None
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+def read_your_writes_until(window: float) -> str:
+    """READ_YOUR_WRITES_HEADER value for a write made now"""
+    return f"{time.time() + window:.3f}"
+
+def reads_own_writes(header: Optional[str]) -> bool:
+    """Whether a request's READ_YOUR_WRITES_HEADER asks for the primary.
+
+    Carried by the client rather than remembered per process, so it holds
+    whichever worker serves the read. Replicas lag the primary slightly;
+    reading from the primary right after a write means the client sees it.
+    """
+    try:
+        return float(header) > time.time()
+    except (TypeError, ValueError):
+        return False
@@ -1,20 +1,98 @@
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import hmac
 
 from config import get_settings
-from db.database import create_tables
-from routers import users, swaps, admin, notifications
+from db.database import create_tables, engine, SessionLocal, replicas
+from db.locks import advisory_lock
+from db.replicas import READ_YOUR_WRITES_HEADER, read_your_writes_until
+from routers import users, swaps, admin, notifications, internal
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.metrics import render_prometheus
+from utils.request_metrics import RequestMetricsMiddleware, register_runtime_gauges
+from utils.sql_instrumentation import (
+    install_query_hooks, sql_stats_middleware,
+    QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QUERY_REPEATS_HEADER
+)
+from utils.periodic import run_in_background, run_periodically
+from services.notification_service import NotificationService
+from services.outbox import OutboxDispatcher
+from services.stats_service import StatsService
+from services.analytics_service import AnalyticsService
+from services.chat_buffer import chat_write_buffer
+from services.skill_index import skill_index, apply_index_updates
 
 settings = get_settings()
 
+def backfill_maintained_tables():
+    """Build rating summaries, unread counters, platform stats and the swap event log from existing rows on first start.
+
+    Each table is checked and built under an advisory lock, so workers
+    starting together don't build the same table concurrently.
+    """
+    from models.swap import UserRatingSummary, NotificationCounter
+    from models.stats import PlatformCounter
+    from models.analytics import SwapEvent
+    from services.swap_service import SwapService
+    
+    backfills = [
+        (UserRatingSummary.user_id, SwapService.rebuild_rating_summaries),
+        (NotificationCounter.user_id, NotificationService.reconcile_unread_counts),
+        (PlatformCounter.name, StatsService.reconcile),
+        (SwapEvent.id, AnalyticsService.backfill_swap_events),
+    ]
+    db = SessionLocal()
+    try:
+        for column, build in backfills:
+            # Held on its own connection, so it outlasts the builders' own commits
+            with advisory_lock(engine, f"backfill:{column.class_.__tablename__}"):
+                if db.query(column).first() is None:
+                    build(db)
+                db.commit()
+    finally:
+        db.close()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     create_tables()
+    backfill_maintained_tables()
+    periodic_jobs = [
+        asyncio.create_task(run_periodically(
+            settings.outbox_poll_interval_seconds, OutboxDispatcher.drain
+        )),
+        asyncio.create_task(run_periodically(
+            settings.unread_reconcile_interval_seconds, NotificationService.reconcile_unread_counts
+        )),
+        asyncio.create_task(run_periodically(
+            settings.stats_reconcile_interval_seconds, StatsService.reconcile
+        )),
+        asyncio.create_task(run_periodically(
+            settings.analytics_rollup_interval_seconds, AnalyticsService.roll_up
+        )),
+        asyncio.create_task(run_periodically(
+            settings.skill_index_rebuild_interval_seconds, skill_index.rebuild
+        )),
+        asyncio.create_task(run_periodically(
+            settings.broadcast_job_stale_seconds, NotificationService.resume_stale_broadcast_jobs
+        )),
+        asyncio.create_task(apply_index_updates()),
+        asyncio.create_task(run_periodically(
+            settings.replica_health_check_seconds, lambda db: replicas.check_health()
+        )),
+        # Build the skill index on the threadpool now rather than in the first request that needs it
+        asyncio.create_task(run_in_background(skill_index.ensure_loaded)),
+    ]
     yield
     # Shutdown
+    for task in periodic_jobs:
+        task.cancel()
+    # Persist chat messages still waiting in the write-behind buffer
+    chat_write_buffer.flush()
 
 app = FastAPI(
     title="Skill Swap Platform API",
@@ -30,13 +108,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        NEXT_CURSOR_HEADER, READ_YOUR_WRITES_HEADER, QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QUERY_REPEATS_HEADER
+    ],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """After a successful write, have the client read from the primary for a
+    while; it sends READ_YOUR_WRITES_HEADER back, so any worker honours it"""
+    response = await call_next(request)
+    if replicas.replicas and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.headers[READ_YOUR_WRITES_HEADER] = read_your_writes_until(settings.read_your_writes_seconds)
+    return response
+
+install_query_hooks()
+app.middleware("http")(sql_stats_middleware)
+
+# Outermost, so request timings include the other middleware
+app.add_middleware(RequestMetricsMiddleware)
+register_runtime_gauges()
+
 # Include routers
 app.include_router(users.router, prefix="/api")
 app.include_router(swaps.router, prefix="/api")
 app.include_router(admin.router, prefix="/api")
 app.include_router(notifications.router, prefix="/api")
+app.include_router(internal.router)
 
 @app.get("/")
 async def root():
@@ -46,6 +144,23 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+LOOPBACK_HOSTS = {"127.0.0.1", "::1"}
+
+def verify_metrics_scraper(request: Request):
+    """Admit the scraper: the METRICS_TOKEN bearer token if one is set, else loopback clients only"""
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}".encode()
+        if hmac.compare_digest(request.headers.get("authorization", "").encode(), expected):
+            return
+    elif request.client and request.client.host in LOOPBACK_HOSTS:
+        return
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to scrape metrics")
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_scraper)])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,33 @@
+-- Normalized (trimmed, lower-cased) copies of users.skills_offered and
+-- users.skills_wanted with GIN indexes, backing case-insensitive skill search.
+-- create_tables() only creates missing tables, so existing databases need
+-- this once. Run with psql outside a transaction block: CREATE/DROP INDEX
+-- CONCURRENTLY cannot run inside one.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS skills_offered_normalized VARCHAR[] NOT NULL DEFAULT '{}';
+ALTER TABLE users ADD COLUMN IF NOT EXISTS skills_wanted_normalized VARCHAR[] NOT NULL DEFAULT '{}';
+
+-- Same normalization as models.user.normalize_skills: collapse whitespace,
+-- lowercase, drop blanks, distinct and sorted
+UPDATE users SET
+    skills_offered_normalized = ARRAY(
+        SELECT DISTINCT lower(btrim(regexp_replace(skill, '\s+', ' ', 'g')))
+        FROM unnest(coalesce(skills_offered, '{}')) AS skill
+        WHERE btrim(regexp_replace(skill, '\s+', ' ', 'g')) <> ''
+        ORDER BY 1
+    ),
+    skills_wanted_normalized = ARRAY(
+        SELECT DISTINCT lower(btrim(regexp_replace(skill, '\s+', ' ', 'g')))
+        FROM unnest(coalesce(skills_wanted, '{}')) AS skill
+        WHERE btrim(regexp_replace(skill, '\s+', ' ', 'g')) <> ''
+        ORDER BY 1
+    );
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_skills_offered_normalized
+    ON users USING gin (skills_offered_normalized);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_skills_wanted_normalized
+    ON users USING gin (skills_wanted_normalized);
+
+-- Superseded: searches never matched the raw, mixed-case columns
+DROP INDEX CONCURRENTLY IF EXISTS ix_users_skills_offered;
+DROP INDEX CONCURRENTLY IF EXISTS ix_users_skills_wanted;
@@ -0,0 +1,24 @@
+-- (created_at, id) keyset pagination indexes.
+-- create_tables() doesn't add indexes to existing tables. Run with psql
+-- outside a transaction block: CREATE INDEX CONCURRENTLY builds without
+-- blocking writes but cannot run inside one. If a build fails it leaves an
+-- INVALID index behind; drop it and re-run.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at_id
+    ON users (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_swap_requests_created_at_id
+    ON swap_requests (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_swap_requests_from_user_created_at_id
+    ON swap_requests (from_user_id, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_swap_requests_to_user_created_at_id
+    ON swap_requests (to_user_id, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_messages_swap_created_at_id
+    ON chat_messages (swap_request_id, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_user_created_at_id
+    ON notifications (user_id, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_platform_messages_created_at_id
+    ON platform_messages (created_at, id);
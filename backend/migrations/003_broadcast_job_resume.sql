@@ -0,0 +1,4 @@
+-- broadcast_jobs.last_user_id: the last recipient a write-time broadcast job
+-- delivered to, so a job left behind by a dead worker resumes after it.
+
+ALTER TABLE broadcast_jobs ADD COLUMN IF NOT EXISTS last_user_id VARCHAR;
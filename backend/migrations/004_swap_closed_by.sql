@@ -0,0 +1,4 @@
+-- Participants who have confirmed closing a swap, so a repeated close
+-- from the same user doesn't count twice.
+
+ALTER TABLE swap_requests ADD COLUMN IF NOT EXISTS closed_by VARCHAR[] NOT NULL DEFAULT '{}';
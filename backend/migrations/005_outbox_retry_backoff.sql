@@ -0,0 +1,4 @@
+-- outbox_events.next_attempt_at: when a failed event is due for its next
+-- retry (exponential backoff); NULL means due now.
+
+ALTER TABLE outbox_events ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE;
@@ -0,0 +1,6 @@
+-- platform_messages.delivery: how a broadcast reaches users. 'write' gives
+-- every user a notification row; 'read' merges the message into
+-- notification lists when they are read. Existing messages were delivered
+-- as rows, so they default to 'write'.
+
+ALTER TABLE platform_messages ADD COLUMN IF NOT EXISTS delivery VARCHAR NOT NULL DEFAULT 'write';
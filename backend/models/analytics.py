@@ -0,0 +1,40 @@
+from sqlalchemy import Column, String, DateTime, Index, Integer, BigInteger
+from sqlalchemy.sql import func
+from db.database import Base
+
+class SwapEvent(Base):
+    """Append-only log of swap lifecycle events, the source of the analytics rollups"""
+    __tablename__ = "swap_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    swap_id = Column(String, nullable=False)
+    event_type = Column(String, nullable=False)  # 'created', 'accepted', 'rejected', 'closed'
+    skill_offered = Column(String, nullable=True)
+    skill_wanted = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    rolled_up_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_swap_events_pending", "id",
+            postgresql_where=rolled_up_at.is_(None)
+        ),
+    )
+
+class SwapRollup(Base):
+    """Swap event counts per hour or day"""
+    __tablename__ = "swap_rollups"
+
+    bucket_size = Column(String, primary_key=True)  # 'hour' or 'day'
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    event_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class SkillRollup(Base):
+    """Swaps created per day by normalized skill name and role"""
+    __tablename__ = "skill_rollups"
+
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    skill = Column(String, primary_key=True)
+    role = Column(String, primary_key=True)  # 'offered' or 'wanted'
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, JSON, Index, Integer, Text
+from sqlalchemy.sql import func
+from db.database import Base
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(String, primary_key=True, index=True)
+    event_type = Column(String, nullable=False)  # 'swap_request_created', ...
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)  # retry backoff; NULL is due now
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_outbox_events_pending", "created_at",
+            postgresql_where=processed_at.is_(None)
+        ),
+    )
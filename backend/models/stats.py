@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger
+from sqlalchemy.sql import func
+from db.database import Base
+
+class PlatformCounter(Base):
+    __tablename__ = "platform_counters"
+
+    # Each counter is split over a few shard rows so concurrent writers
+    # rarely wait on the same row lock; its value is the sum of its shards
+    name = Column(String, primary_key=True)  # 'users', 'swaps_pending', 'rating_sum', ...
+    shard = Column(Integer, primary_key=True, default=0)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, String, DateTime, Text, Enum, ForeignKey, Integer, Boolean
+from sqlalchemy import Column, String, DateTime, Text, Enum, ForeignKey, Integer, Boolean, Index, ARRAY
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -25,6 +25,8 @@ class SwapRequest(Base):
     message = Column(Text, nullable=True)
     status = Column(Enum(SwapStatus), default=SwapStatus.PENDING)
     closed_count = Column(Integer, default=0)
+    # Participants who have confirmed closing, so each counts once
+    closed_by = Column(ARRAY(String), nullable=False, default=[], server_default="{}")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -32,6 +34,14 @@ class SwapRequest(Base):
     from_user = relationship("User", foreign_keys=[from_user_id])
     to_user = relationship("User", foreign_keys=[to_user_id])
 
+    # Fetch server defaults (created_at) with RETURNING on insert
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_swap_requests_created_at_id", "created_at", "id"),
+        Index("ix_swap_requests_from_user_created_at_id", "from_user_id", "created_at", "id"),
+        Index("ix_swap_requests_to_user_created_at_id", "to_user_id", "created_at", "id"),
+    )
+
 class Feedback(Base):
     __tablename__ = "feedback"
 
@@ -48,6 +58,30 @@ class Feedback(Base):
     from_user = relationship("User", foreign_keys=[from_user_id])
     to_user = relationship("User", foreign_keys=[to_user_id])
 
+class UserRatingSummary(Base):
+    __tablename__ = "user_rating_summaries"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    # Histogram of star ratings
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    @property
+    def average_rating(self) -> float:
+        if not self.rating_count:
+            return 0.0
+        return round(self.rating_sum / self.rating_count, 1)
+
+    @property
+    def histogram(self) -> dict:
+        return {star: getattr(self, f"rating_{star}") or 0 for star in range(1, 6)}
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
@@ -61,6 +95,10 @@ class ChatMessage(Base):
     swap_request = relationship("SwapRequest")
     from_user = relationship("User", foreign_keys=[from_user_id])
 
+    __table_args__ = (
+        Index("ix_chat_messages_swap_created_at_id", "swap_request_id", "created_at", "id"),
+    )
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -76,6 +114,12 @@ class Notification(Base):
     # Relationships
     user = relationship("User", foreign_keys=[user_id])
 
+    __table_args__ = (
+        Index("ix_notifications_user_created_at_id", "user_id", "created_at", "id"),
+    )
+    # Fetch server defaults (created_at) with RETURNING on insert
+    __mapper_args__ = {"eager_defaults": True}
+
 class PlatformMessage(Base):
     __tablename__ = "platform_messages"
 
@@ -83,7 +127,54 @@ class PlatformMessage(Base):
     message = Column(Text, nullable=False)
     admin_id = Column(String, ForeignKey("users.id"), nullable=False)
     admin_name = Column(String, nullable=False)
+    # 'read': merged into notification lists at read time; 'write': one notification row per user
+    delivery = Column(String, nullable=False, default="write", server_default="write")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     admin = relationship("User", foreign_keys=[admin_id])
+
+    __table_args__ = (
+        Index("ix_platform_messages_created_at_id", "created_at", "id"),
+    )
+
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class BroadcastReadMarker(Base):
+    __tablename__ = "broadcast_read_markers"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    # Platform messages created at or before this time are read for the user
+    last_read_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class BroadcastDismissal(Base):
+    __tablename__ = "broadcast_dismissals"
+
+    # A platform message delivered on read that the user deleted from their list
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    platform_message_id = Column(String, ForeignKey("platform_messages.id"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class BroadcastJob(Base):
+    __tablename__ = "broadcast_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    platform_message_id = Column(String, ForeignKey("platform_messages.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending")  # 'pending', 'running', 'completed', 'failed'
+    total_recipients = Column(Integer, nullable=False, default=0)
+    delivered_count = Column(Integer, nullable=False, default=0)
+    # Last recipient delivered to, committed with each batch so a job can resume after a crash
+    last_user_id = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    platform_message = relationship("PlatformMessage")
@@ -1,8 +1,17 @@
-
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ARRAY
+from sqlalchemy import Column, String, Boolean, DateTime, Text, ARRAY, Index
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
+from typing import Iterable, List, Optional
 from db.database import Base
 
+def normalize_skill(skill: str) -> str:
+    """Normalize a skill name for case-insensitive lookups"""
+    return " ".join(skill.split()).lower()
+
+def normalize_skills(skills: Optional[Iterable[str]]) -> List[str]:
+    """Distinct normalized skill names, as stored in the *_normalized columns"""
+    return sorted({normalize_skill(s) for s in skills or [] if s and s.strip()})
+
 class User(Base):
     __tablename__ = "users"
 
@@ -13,6 +22,9 @@ class User(Base):
     profile_picture = Column(String, nullable=True)
     skills_offered = Column(ARRAY(String), default=[])
     skills_wanted = Column(ARRAY(String), default=[])
+    # Normalized copies of the skill lists, kept in sync on assignment, for indexed search
+    skills_offered_normalized = Column(ARRAY(String), nullable=False, default=[], server_default="{}")
+    skills_wanted_normalized = Column(ARRAY(String), nullable=False, default=[], server_default="{}")
     availability = Column(String, nullable=True)
     phone_number = Column(String(20), nullable=True)
     email = Column(String(255), nullable=True)
@@ -21,3 +33,14 @@ class User(Base):
     is_banned = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_users_skills_offered_normalized", "skills_offered_normalized", postgresql_using="gin"),
+        Index("ix_users_skills_wanted_normalized", "skills_wanted_normalized", postgresql_using="gin"),
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
+
+    @validates("skills_offered", "skills_wanted")
+    def _normalize_skills(self, key, skills):
+        setattr(self, f"{key}_normalized", normalize_skills(skills))
+        return skills
@@ -1,29 +1,43 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from db.database import get_db
+from config import get_settings
+from db.database import get_db, get_db_ro
 from utils.auth_utils import get_current_user
 from services.user_service import UserService
-from schemas.user import UserResponse
+from utils.pagination import PageParams, set_next_cursor
+from utils.export import stream_export
+from schemas.user import UserResponse, BulkBanRequest
 from models.user import User
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+ADMIN_USER_IDS = frozenset(
+    user_id.strip() for user_id in get_settings().admin_user_ids.split(",") if user_id.strip()
+)
+
 def verify_admin(current_user: User = Depends(get_current_user)):
-    """Verify current user is admin (placeholder - implement admin logic)"""
-    # TODO: Implement proper admin verification logic
-    # For now, we'll assume any authenticated user can access admin endpoints
+    """Verify current user is admin: their ID must be listed in ADMIN_USER_IDS"""
+    if current_user.id not in ADMIN_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
     return current_user
 
 @router.get("/users", response_model=List[UserResponse])
 def get_all_users(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     admin_user: User = Depends(verify_admin)
 ):
-    """Get all users (admin only)"""
-    users = UserService.get_all_users(db)
+    """Get a page of all users (admin only)"""
+    users, next_cursor = UserService.get_all_users(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
     return users
 
 @router.patch("/users/{user_id}/ban", response_model=UserResponse)
@@ -41,44 +55,88 @@ def ban_user(
         )
     return user
 
+@router.get("/stats", response_model=dict)
+def get_platform_stats(
+    db: Session = Depends(get_db_ro),
+    admin_user: User = Depends(verify_admin)
+):
+    """Get platform statistics from the maintained counters (admin only)"""
+    from services.stats_service import StatsService
+    return StatsService.get_platform_stats(db)
+
+@router.get("/analytics/swaps", response_model=List[dict])
+def get_swap_analytics(
+    granularity: str = Query("day", pattern="^(hour|day|week)$", description="Bucket size: hour, day or week"),
+    start: Optional[datetime] = Query(None, description="Range start (default: 30 days before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    db: Session = Depends(get_db_ro),
+    admin_user: User = Depends(verify_admin)
+):
+    """Swaps created, accepted, rejected and closed per time bucket (admin only)"""
+    from services.analytics_service import AnalyticsService
+    return AnalyticsService.get_swap_series(db, granularity, start, end)
+
+@router.get("/analytics/top-skills", response_model=dict)
+def get_top_skills(
+    start: Optional[datetime] = Query(None, description="Range start (default: 30 days before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    limit: int = Query(10, ge=1, le=100, description="Number of skills per role"),
+    db: Session = Depends(get_db_ro),
+    admin_user: User = Depends(verify_admin)
+):
+    """Most offered and most wanted skills in swaps created in a date range (admin only)"""
+    from services.analytics_service import AnalyticsService
+    return AnalyticsService.get_top_skills(db, start, end, limit)
+
+@router.post("/users/ban", response_model=dict)
+def bulk_ban_users(
+    request_data: BulkBanRequest,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(verify_admin)
+):
+    """Ban many users at once, rejecting their pending swaps (admin only)"""
+    return UserService.bulk_ban_users(db, request_data.user_ids)
+
 @router.get("/swaps", response_model=List[dict])
 def get_all_swaps(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     admin_user: User = Depends(verify_admin)
 ):
-    """Get all swap requests (admin only)"""
+    """Get a page of all swap requests (admin only)"""
     from services.swap_service import SwapService
-    swaps = SwapService.get_all_swaps(db)
-    
-    result = []
-    for swap in swaps:
-        from_user = db.query(User).filter(User.id == swap.from_user_id).first()
-        to_user = db.query(User).filter(User.id == swap.to_user_id).first()
-        
-        result.append({
-            "id": swap.id,
-            "from_user_id": swap.from_user_id,
-            "to_user_id": swap.to_user_id,
-            "from_user_name": from_user.name if from_user else "Unknown",
-            "to_user_name": to_user.name if to_user else "Unknown",
-            "skill_offered": swap.skill_offered,
-            "skill_wanted": swap.skill_wanted,
-            "message": swap.message,
-            "status": swap.status,
-            "created_at": swap.created_at,
-            "updated_at": swap.updated_at,
-            "closed_count": swap.closed_count
-        })
-    
-    return result
+    swaps, next_cursor = SwapService.get_all_swaps(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return swaps
+
+EXPORT_FORMAT = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format: ndjson or csv")
+
+@router.get("/export/users")
+def export_users(
+    format: str = EXPORT_FORMAT,
+    admin_user: User = Depends(verify_admin)
+):
+    """Stream every user as NDJSON or CSV (admin only)"""
+    return stream_export(UserService.admin_users_query, format, "users")
+
+@router.get("/export/swaps")
+def export_swaps(
+    format: str = EXPORT_FORMAT,
+    admin_user: User = Depends(verify_admin)
+):
+    """Stream every swap request with participant names as NDJSON or CSV (admin only)"""
+    from services.swap_service import SwapService
+    return stream_export(SwapService.admin_swaps_query, format, "swaps")
 
 @router.post("/platform-message", response_model=dict)
 def send_platform_message(
     message_data: dict,
+    background_tasks: BackgroundTasks,
     admin_user: User = Depends(verify_admin),
     db: Session = Depends(get_db)
 ):
-    """Send a platform-wide message to all users"""
+    """Send a platform-wide message to all users (delivered in the background)"""
     from services.notification_service import NotificationService
     
     message = message_data.get("message", "").strip()
@@ -88,13 +146,83 @@ def send_platform_message(
             detail="Message cannot be empty"
         )
     
-    platform_message = NotificationService.send_platform_message(
+    platform_message, job = NotificationService.send_platform_message(
         db, admin_user.id, admin_user.name, message
     )
+    if job:
+        background_tasks.add_task(NotificationService.run_broadcast_job, job.id)
     
     return {
         "id": platform_message.id,
         "message": platform_message.message,
         "admin_name": platform_message.admin_name,
-        "created_at": platform_message.created_at.isoformat() if platform_message.created_at else None
+        "created_at": platform_message.created_at.isoformat() if platform_message.created_at else None,
+        "job_id": job.id if job else None,
+        "status": job.status if job else "delivered"
     }
+
+@router.get("/platform-message/jobs/{job_id}", response_model=dict)
+def get_platform_message_job(
+    job_id: str,
+    admin_user: User = Depends(verify_admin),
+    db: Session = Depends(get_db)
+):
+    """Get delivery progress for a platform-wide message"""
+    from services.notification_service import NotificationService
+    
+    job = NotificationService.get_broadcast_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return {
+        "id": job.id,
+        "platform_message_id": job.platform_message_id,
+        "status": job.status,
+        "total_recipients": job.total_recipients,
+        "delivered_count": job.delivered_count,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+@router.get("/outbox/dead-letters", response_model=List[dict])
+def get_outbox_dead_letters(
+    limit: int = Query(100, ge=1, le=1000),
+    admin_user: User = Depends(verify_admin),
+    db: Session = Depends(get_db)
+):
+    """List outbox events that failed too often to be retried automatically"""
+    from services.outbox import OutboxDispatcher
+    
+    return [
+        {
+            "id": event.id,
+            "event_type": event.event_type,
+            "payload": event.payload,
+            "attempts": event.attempts,
+            "last_error": event.last_error,
+            "created_at": event.created_at.isoformat() if event.created_at else None
+        }
+        for event in OutboxDispatcher.get_dead_letters(db, limit)
+    ]
+
+@router.post("/outbox/dead-letters/{event_id}/retry", response_model=dict)
+def retry_outbox_dead_letter(
+    event_id: str,
+    background_tasks: BackgroundTasks,
+    admin_user: User = Depends(verify_admin),
+    db: Session = Depends(get_db)
+):
+    """Queue a dead-lettered outbox event for dispatch again"""
+    from services.outbox import OutboxDispatcher
+    
+    if not OutboxDispatcher.retry_dead_letter(db, event_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dead-lettered event not found"
+        )
+    background_tasks.add_task(OutboxDispatcher.run_once)
+    return {"message": "Event queued for retry"}
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+
+from db.database import engine, async_engine
+from db.pool_metrics import pool_metrics, async_pool_metrics
+from routers.admin import verify_admin
+
+# Operational detail for admins only
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(verify_admin)])
+
+@router.get("/metrics/db-pool", response_model=dict)
+def get_db_pool_metrics():
+    """Connection pool occupancy, checkout waits and connection churn"""
+    return pool_metrics.snapshot(engine.pool)
+
+@router.get("/metrics/async-db-pool", response_model=dict)
+def get_async_db_pool_metrics():
+    """The same metrics for the asyncpg pool used by async routes"""
+    return async_pool_metrics.snapshot(async_engine.pool)
@@ -1,35 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+import json
 
-from db.database import get_db
+from db.database import get_db, get_async_db_ro
 from utils.auth_utils import get_current_user_id, get_current_user
-from services.notification_service import NotificationService
+from services.notification_service import NotificationService, read_receipts
+from schemas.notification import NotificationIdsRequest
+from services.event_broker import event_broker, user_channel, BROADCAST_CHANNEL
+from utils.pagination import PageParams, set_next_cursor
 from models.user import User
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 @router.get("/", response_model=List[dict])
-def get_user_notifications(
+async def get_user_notifications(
+    response: Response,
+    page: PageParams = Depends(),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db_ro)
+):
+    """Get a page of notifications for the current user"""
+    notifications, next_cursor = await NotificationService.get_user_notifications_async(
+        db, current_user_id, page.cursor, page.limit
+    )
+    set_next_cursor(response, next_cursor)
+    
+    return [NotificationService.to_dict(notification) for notification in notifications]
+
+@router.get("/unread-count", response_model=dict)
+async def get_unread_count(
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db_ro)
+):
+    """Get the number of unread notifications for the current user"""
+    return {"unread_count": await NotificationService.get_unread_count_async(db, current_user_id)}
+
+STREAM_KEEPALIVE_SECONDS = 15
+
+def _sse_event(event: dict) -> str:
+    return f"id: {event['id']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    """Get all notifications for the current user"""
-    notifications = NotificationService.get_user_notifications(db, current_user_id)
+    """Server-sent events stream of new notifications for the current user.
+
+    Reconnecting clients send Last-Event-ID to receive what they missed.
+    """
+    subscription = event_broker.subscribe([user_channel(current_user_id), BROADCAST_CHANNEL])
     
-    result = []
-    for notification in notifications:
-        result.append({
-            "id": notification.id,
-            "type": notification.type,
-            "title": notification.title,
-            "message": notification.message,
-            "related_id": notification.related_id,
-            "is_read": notification.is_read,
-            "created_at": notification.created_at.isoformat() if notification.created_at else None
-        })
+    missed = []
+    if last_event_id:
+        missed = await run_in_threadpool(
+            NotificationService.get_notifications_since, db, current_user_id, last_event_id
+        )
+        missed = [NotificationService.to_dict(notification) for notification in missed]
+    # Don't hold a pooled connection for the lifetime of the stream
+    await run_in_threadpool(db.close)
     
-    return result
+    async def events():
+        sent = set()
+        try:
+            for event in missed:
+                sent.add(event["id"])
+                yield _sse_event(event)
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event.get("sender_id") == current_user_id or event["id"] in sent:
+                    continue
+                yield _sse_event({k: v for k, v in event.items() if k != "sender_id"})
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.patch("/{notification_id}/read", response_model=dict)
 def mark_notification_as_read(
@@ -38,6 +97,11 @@ def mark_notification_as_read(
     db: Session = Depends(get_db)
 ):
     """Mark a notification as read"""
+    if read_receipts.delay > 0:
+        # Rapid read receipts are written together in one bulk UPDATE
+        read_receipts.add(current_user_id, notification_id)
+        return {"id": notification_id, "is_read": True}
+    
     notification = NotificationService.mark_as_read(db, notification_id, current_user_id)
     if not notification:
         raise HTTPException(
@@ -50,6 +114,45 @@ def mark_notification_as_read(
         "is_read": notification.is_read
     }
 
+@router.patch("/read-all", response_model=dict)
+def mark_all_notifications_as_read(
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Mark all of the current user's notifications as read"""
+    updated = NotificationService.mark_all_read(db, current_user_id)
+    return {"updated": updated}
+
+@router.patch("/read", response_model=dict)
+def mark_notifications_as_read(
+    request_data: NotificationIdsRequest,
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Mark several notifications as read"""
+    updated = NotificationService.mark_read_bulk(db, current_user_id, request_data.ids)
+    return {"updated": updated}
+
+@router.post("/bulk-delete", response_model=dict)
+def delete_notifications(
+    request_data: NotificationIdsRequest,
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Delete several notifications"""
+    deleted = NotificationService.delete_bulk(db, current_user_id, request_data.ids)
+    return {"deleted": deleted}
+
+@router.delete("/", response_model=dict)
+def delete_old_notifications(
+    before: datetime = Query(..., description="Delete notifications created before this time"),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Delete the current user's notifications older than a date"""
+    deleted = NotificationService.delete_older_than(db, current_user_id, before)
+    return {"deleted": deleted}
+
 @router.delete("/{notification_id}", response_model=dict)
 def delete_notification(
     notification_id: str,
@@ -71,11 +174,14 @@ def delete_notification(
 
 @router.get("/platform-messages", response_model=List[dict])
 def get_platform_messages(
+    response: Response,
+    page: PageParams = Depends(),
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    """Get all platform messages"""
-    messages = NotificationService.get_platform_messages(db)
+    """Get a page of platform messages"""
+    messages, next_cursor = NotificationService.get_platform_messages(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
     
     result = []
     for message in messages:
@@ -1,11 +1,20 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Optional
+import asyncio
+import uuid
 
-from db.database import get_db
-from utils.auth_utils import get_current_user_id
+from db.database import get_db, get_async_db_ro, SessionLocal
+from utils.auth_utils import get_current_user_id, get_current_user, verify_clerk_token
 from services.swap_service import SwapService
+from services.outbox import OutboxDispatcher
+from services.event_broker import event_broker, chat_channel
+from services.chat_buffer import chat_write_buffer
+from utils.pagination import PageParams, set_next_cursor
 from schemas.swap import SwapRequestCreate, SwapRequestResponse, FeedbackCreate, FeedbackResponse, ChatMessageCreate
 from models.user import User
 
@@ -14,12 +23,15 @@ router = APIRouter(prefix="/swaps", tags=["swaps"])
 @router.post("/request", response_model=SwapRequestResponse)
 def create_swap_request(
     swap_data: SwapRequestCreate,
+    background_tasks: BackgroundTasks,
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """Create a new swap request"""
     try:
         swap = SwapService.create_swap_request(db, swap_data, current_user_id)
+        # Deliver the notification right after responding instead of waiting for the next poll
+        background_tasks.add_task(OutboxDispatcher.run_once)
         return swap
     except ValueError as e:
         raise HTTPException(
@@ -28,14 +40,27 @@ def create_swap_request(
         )
 
 @router.get("/", response_model=List[SwapRequestResponse])
-def get_user_swaps(
+async def get_user_swaps(
+    response: Response,
+    page: PageParams = Depends(),
     current_user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db_ro)
 ):
-    """Get all swaps for current user"""
-    swaps = SwapService.get_user_swaps(db, current_user_id)
+    """Get a page of swaps for current user"""
+    swaps, next_cursor = await SwapService.get_user_swaps_async(db, current_user_id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
     return swaps
 
+@router.get("/cycles", response_model=List[dict])
+def get_swap_cycles(
+    max_length: int = Query(4, ge=3, le=4, description="Longest cycle to look for (3 or 4 people)"),
+    limit: int = Query(20, ge=1, le=100, description="Number of cycles to return"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Find multi-party swaps (A teaches B, B teaches C, C teaches A) including the current user"""
+    return SwapService.find_swap_cycles(db, current_user, max_length, limit)
+
 @router.patch("/{swap_id}/accept", response_model=SwapRequestResponse)
 def accept_swap(
     swap_id: str,
@@ -149,7 +174,7 @@ def create_chat_message(
     
     # Get user name for response
     user = db.query(User).filter(User.id == current_user_id).first()
-    return {
+    message = {
         "id": chat_message.id,
         "swap_request_id": chat_message.swap_request_id,
         "from_user_id": chat_message.from_user_id,
@@ -157,27 +182,104 @@ def create_chat_message(
         "message": chat_message.message,
         "created_at": chat_message.created_at
     }
+    # Deliver to participants connected to the chat room
+    event_broker.publish(chat_channel(swap_id), {**message, "created_at": message["created_at"].isoformat()})
+    return message
+
+def _chat_sender_name(swap_id: str, user_id: str) -> Optional[str]:
+    """Return the user's name if they may join the swap's chat room"""
+    db = SessionLocal()
+    try:
+        if not SwapService.get_participant_swap(db, swap_id, user_id):
+            return None
+        name = db.query(User.name).filter(User.id == user_id).scalar()
+        return name or "Unknown"
+    finally:
+        db.close()
+
+@router.websocket("/{swap_id}/ws")
+async def chat_room(websocket: WebSocket, swap_id: str, token: str = Query(...)):
+    """Live chat room for a swap's participants.
+
+    Browsers can't set headers on a WebSocket, so the Clerk token is passed
+    as `?token=`. Clients send `{"message": "..."}` and receive every message
+    posted to the room, including their own. Messages are fanned out
+    immediately and persisted by the chat write-behind buffer.
+    """
+    try:
+        user_id = (await run_in_threadpool(verify_clerk_token, token)).get("sub")
+    except HTTPException:
+        user_id = None
+    sender_name = await run_in_threadpool(_chat_sender_name, swap_id, user_id) if user_id else None
+    if not sender_name:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    channel = chat_channel(swap_id)
+    subscription = event_broker.subscribe([channel])
+    
+    async def receive():
+        while True:
+            data = await websocket.receive_json()
+            text = str(data.get("message", "")).strip() if isinstance(data, dict) else ""
+            if not text:
+                continue
+            created_at = datetime.now(timezone.utc)
+            message = {
+                "id": str(uuid.uuid4()),
+                "swap_request_id": swap_id,
+                "from_user_id": user_id,
+                "message": text,
+                "created_at": created_at
+            }
+            chat_write_buffer.add(message)
+            event = {**message, "from_user_name": sender_name, "created_at": created_at.isoformat()}
+            # Other workers get it once the buffer has written it and they can load it
+            event_broker.publish(channel, event, local_only=True)
+    
+    async def send():
+        while True:
+            await websocket.send_json(await subscription.get())
+    
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                # Client disconnected, sent a malformed frame, or a send failed
+                pass
 
 @router.get("/{swap_id}/chat", response_model=List[dict])
-def get_chat_messages(
+async def get_chat_messages(
     swap_id: str,
+    response: Response,
+    since: Optional[str] = Query(None, description="Only return messages after this message ID"),
+    before: Optional[str] = Query(None, description="Return the messages preceding this message ID"),
+    page: PageParams = Depends(),
     current_user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db_ro)
 ):
-    """Get chat messages for a swap"""
-    messages = SwapService.get_chat_messages(db, swap_id, current_user_id)
+    """Get a page of chat messages for a swap"""
+    messages, next_cursor = await SwapService.get_chat_messages_async(
+        db, swap_id, current_user_id, page.cursor, page.limit, since=since, before=before
+    )
+    set_next_cursor(response, next_cursor)
     
-    # Add user names to messages
-    result = []
-    for message in messages:
-        user = db.query(User).filter(User.id == message.from_user_id).first()
-        result.append({
+    return [
+        {
             "id": message.id,
             "swap_request_id": message.swap_request_id,
             "from_user_id": message.from_user_id,
-            "from_user_name": user.name if user else "Unknown",
+            "from_user_name": message.from_user_name,
             "message": message.message,
             "created_at": message.created_at
-        })
-    
-    return result
+        }
+        for message in messages
+    ]
@@ -1,11 +1,13 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from db.database import get_db
+from db.database import get_db, get_db_ro, get_async_db_ro
 from utils.auth_utils import get_current_user_id, get_current_user, get_current_user_data
 from services.user_service import UserService
+from utils.pagination import PageParams, set_next_cursor
 from schemas.user import UserCreate, UserUpdate, UserResponse, UserPublicResponse
 from models.user import User
 
@@ -14,9 +16,9 @@ router = APIRouter(prefix="/users", tags=["users"])
 @router.get("/{user_id}/ratings", response_model=dict)
 def get_user_ratings(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_ro)
 ):
-    """Get user's ratings and feedback"""
+    """Get user's rating summary, histogram and feedback"""
     from services.swap_service import SwapService
     ratings = SwapService.get_user_ratings(db, user_id)
     return ratings
@@ -63,26 +65,38 @@ def update_profile(
     return user
 
 @router.get("/search", response_model=List[dict])
-def search_users(
-    skill: str | None = None,
+async def search_users(
+    response: Response,
+    skill: Optional[List[str]] = Query(None, description="Skill(s) to search for, case-insensitive"),
+    match: str = Query("any", pattern="^(any|all)$", description="Match any or all of the given skills"),
+    skill_type: Optional[str] = Query(None, pattern="^(offered|wanted)$", description="Only match offered or wanted skills"),
+    page: PageParams = Depends(),
     current_user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db_ro)
 ):
     """Search public users by skill or get all public users with ratings"""
     if skill:
-        # For skill-based search, we'll need to implement a different approach
-        # For now, get all users and filter by skill
-        users = UserService.get_all_public_users_with_ratings(db, exclude_user_id=None)
-        # Filter by skill
-        filtered_users = []
-        for user in users:
-            if (skill.lower() in [s.lower() for s in user.get('skills_offered', [])] or
-                skill.lower() in [s.lower() for s in user.get('skills_wanted', [])]):
-                filtered_users.append(user)
-        return filtered_users
+        users, next_cursor = await UserService.search_public_users_with_ratings_async(
+            db, skill, match_all=(match == "all"), skill_type=skill_type,
+            cursor=page.cursor, limit=page.limit
+        )
     else:
         # Include all public users with ratings
-        return UserService.get_all_public_users_with_ratings(db, exclude_user_id=None)
+        users, next_cursor = await UserService.get_all_public_users_with_ratings_async(
+            db, exclude_user_id=None, cursor=page.cursor, limit=page.limit
+        )
+    
+    set_next_cursor(response, next_cursor)
+    return users
+
+@router.get("/matches", response_model=List[dict])
+def get_matches(
+    limit: int = Query(10, ge=1, le=100, description="Number of matches to return"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get users who offer what the current user wants and want what they offer"""
+    return UserService.get_matches(db, current_user, limit)
 
 @router.get("/debug-token")
 def debug_token(
@@ -1,5 +1,5 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -48,3 +48,6 @@ class UserPublicResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class BulkBanRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=1000)
@@ -0,0 +1,189 @@
+from sqlalchemy import func, select, literal, any_, BigInteger
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from sqlalchemy.orm import Session
+from models.analytics import SwapEvent, SwapRollup, SkillRollup
+from models.swap import SwapRequest, SwapStatus
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+ROLLUP_BATCH_SIZE = 5000
+SWAP_EVENT_TYPES = ("created", "accepted", "rejected", "closed")
+
+def _utc_bucket(unit: str, column):
+    """Truncate a timestamptz column to the start of its UTC hour/day/week"""
+    return func.timezone("UTC", func.date_trunc(unit, func.timezone("UTC", column)))
+
+def _normalized_skill(column):
+    # SQL counterpart of models.user.normalize_skill
+    return func.lower(func.regexp_replace(func.trim(column), r"\s+", " ", "g"))
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+class AnalyticsService:
+    @staticmethod
+    def record_swap_event(db: Session, swap: SwapRequest, event_type: str) -> None:
+        """Append a swap event in the caller's transaction"""
+        db.add(SwapEvent(
+            swap_id=swap.id,
+            event_type=event_type,
+            skill_offered=swap.skill_offered,
+            skill_wanted=swap.skill_wanted
+        ))
+
+    @staticmethod
+    def record_swap_events(db: Session, swaps: list, event_type: str) -> None:
+        """Append the same event for many swaps in one INSERT, in the caller's transaction"""
+        if not swaps:
+            return
+        db.execute(insert(SwapEvent), [
+            {
+                "swap_id": swap.id,
+                "event_type": event_type,
+                "skill_offered": swap.skill_offered,
+                "skill_wanted": swap.skill_wanted
+            }
+            for swap in swaps
+        ])
+
+    @staticmethod
+    def backfill_swap_events(db: Session) -> None:
+        """Seed the event log from existing swaps: a 'created' event for every
+        swap, plus one for its current status if it has moved on from pending"""
+        columns = [SwapRequest.id, SwapRequest.skill_offered, SwapRequest.skill_wanted]
+        target = ["swap_id", "skill_offered", "skill_wanted", "event_type", "created_at"]
+        db.execute(insert(SwapEvent).from_select(
+            target,
+            select(*columns, literal("created"), SwapRequest.created_at)
+        ))
+        for status in (SwapStatus.ACCEPTED, SwapStatus.REJECTED, SwapStatus.CLOSED):
+            db.execute(insert(SwapEvent).from_select(
+                target,
+                select(
+                    *columns, literal(status.value),
+                    func.coalesce(SwapRequest.updated_at, SwapRequest.created_at)
+                ).where(SwapRequest.status == status)
+            ))
+        db.commit()
+
+    @staticmethod
+    def _roll_up_batch(db: Session) -> int:
+        ids = db.scalars(
+            select(SwapEvent.id)
+            .where(SwapEvent.rolled_up_at.is_(None))
+            .order_by(SwapEvent.id)
+            .limit(ROLLUP_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            db.rollback()
+            return 0
+        in_batch = SwapEvent.id == any_(literal(list(ids), ARRAY(BigInteger)))
+
+        for bucket_size in ("hour", "day"):
+            bucket = _utc_bucket(bucket_size, SwapEvent.created_at)
+            stmt = insert(SwapRollup).from_select(
+                ["bucket_size", "bucket_start", "event_type", "count"],
+                select(literal(bucket_size), bucket, SwapEvent.event_type, func.count())
+                .where(in_batch)
+                .group_by(bucket, SwapEvent.event_type)
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[SwapRollup.bucket_size, SwapRollup.bucket_start, SwapRollup.event_type],
+                set_={"count": SwapRollup.count + stmt.excluded.count}
+            ))
+
+        day = _utc_bucket("day", SwapEvent.created_at)
+        for role, column in (("offered", SwapEvent.skill_offered), ("wanted", SwapEvent.skill_wanted)):
+            skill = _normalized_skill(column)
+            stmt = insert(SkillRollup).from_select(
+                ["bucket_start", "skill", "role", "count"],
+                select(day, skill, literal(role), func.count())
+                .where(in_batch, SwapEvent.event_type == "created", column.isnot(None))
+                .group_by(day, skill)
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[SkillRollup.bucket_start, SkillRollup.skill, SkillRollup.role],
+                set_={"count": SkillRollup.count + stmt.excluded.count}
+            ))
+
+        db.query(SwapEvent).filter(in_batch).update(
+            {"rolled_up_at": func.now()}, synchronize_session=False
+        )
+        db.commit()
+        return len(ids)
+
+    @staticmethod
+    def roll_up(db: Session) -> int:
+        """Fold pending swap events into the hourly, daily and skill rollups.
+
+        Events are claimed in batches with FOR UPDATE SKIP LOCKED, so several
+        workers can run the job at once without counting an event twice.
+        Returns the number of events rolled up.
+        """
+        total = 0
+        while True:
+            rolled_up = AnalyticsService._roll_up_batch(db)
+            total += rolled_up
+            if rolled_up < ROLLUP_BATCH_SIZE:
+                return total
+
+    @staticmethod
+    def _default_range(start: Optional[datetime], end: Optional[datetime]):
+        end = _as_utc(end) if end else datetime.now(timezone.utc)
+        start = _as_utc(start) if start else end - timedelta(days=30)
+        return start, end
+
+    @staticmethod
+    def get_swap_series(
+        db: Session,
+        granularity: str = "day",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[dict]:
+        """Swap event counts per hour, day or week between start and end.
+
+        Hours are served from the hourly rollups and days and weeks from the
+        daily ones; buckets are included when they start within the range.
+        Buckets without events are omitted.
+        """
+        start, end = AnalyticsService._default_range(start, end)
+        bucket = SwapRollup.bucket_start
+        if granularity == "week":
+            bucket = _utc_bucket("week", SwapRollup.bucket_start)
+
+        rows = db.query(
+            bucket.label("bucket"), SwapRollup.event_type, func.sum(SwapRollup.count)
+        ).filter(
+            SwapRollup.bucket_size == ("hour" if granularity == "hour" else "day"),
+            SwapRollup.bucket_start >= start,
+            SwapRollup.bucket_start < end
+        ).group_by(bucket, SwapRollup.event_type).order_by(bucket).all()
+
+        series = {}
+        for bucket_start, event_type, count in rows:
+            point = series.setdefault(bucket_start, {
+                "bucket": bucket_start.isoformat(), **{event: 0 for event in SWAP_EVENT_TYPES}
+            })
+            point[event_type] = int(count)
+        return list(series.values())
+
+    @staticmethod
+    def get_top_skills(
+        db: Session,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 10
+    ) -> dict:
+        """Most requested skills in swaps created between start and end, by day buckets"""
+        start, end = AnalyticsService._default_range(start, end)
+        result = {}
+        for role in ("offered", "wanted"):
+            total = func.sum(SkillRollup.count)
+            rows = db.query(SkillRollup.skill, total).filter(
+                SkillRollup.role == role,
+                SkillRollup.bucket_start >= start,
+                SkillRollup.bucket_start < end
+            ).group_by(SkillRollup.skill).order_by(total.desc(), SkillRollup.skill).limit(limit).all()
+            result[role] = [{"skill": skill, "swaps": int(count)} for skill, count in rows]
+        return result
@@ -0,0 +1,117 @@
+from sqlalchemy import insert
+from models.swap import ChatMessage
+from services.event_broker import event_broker, chat_channel
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ChatWriteBuffer:
+    """Write-behind buffer that persists chat messages in batched inserts.
+
+    Messages are queued with their ID and timestamp already assigned, so
+    they can be delivered before they are written. A flusher thread inserts
+    whatever is queued every `interval` seconds, or sooner once `batch_size`
+    messages are waiting. Messages still queued when the process dies are
+    lost; `flush` is called on shutdown to drain the queue. Messages are
+    announced to other workers' chat rooms once they are written. Until
+    then `pending_created_at` knows their timestamps, so this process can
+    page from a message it hasn't written yet.
+    """
+
+    def __init__(self, interval: float = 0.2, batch_size: int = 500):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending: List[dict] = []
+        # (swap_request_id, created_at) of queued and in-flight messages by ID
+        self._unwritten: Dict[str, Tuple[str, datetime]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, message: dict) -> None:
+        with self._lock:
+            self._pending.append(message)
+            self._unwritten[message["id"]] = (message["swap_request_id"], message["created_at"])
+            full = len(self._pending) >= self.batch_size
+        self._ensure_started()
+        if full:
+            self._wakeup.set()
+
+    def pending_created_at(self, swap_id: str, message_id: str) -> Optional[datetime]:
+        """created_at of a message of the swap that is queued here but not yet written"""
+        with self._lock:
+            unwritten = self._unwritten.get(message_id)
+        if unwritten is None or unwritten[0] != swap_id:
+            return None
+        return unwritten[1]
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="chat-write-buffer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush chat messages")
+
+    def flush(self) -> int:
+        """Insert all queued messages; returns how many were written"""
+        from db.database import SessionLocal
+
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+
+        db = SessionLocal()
+        try:
+            return self._write(db, batch)
+        finally:
+            db.close()
+            # Written, or dropped: readers find written messages in the table from now on
+            with self._lock:
+                for message in batch:
+                    self._unwritten.pop(message["id"], None)
+
+    def _write(self, db, batch: List[dict]) -> int:
+        """Insert a batch and announce what was written; returns how many were"""
+        try:
+            db.execute(insert(ChatMessage), batch)
+            db.commit()
+            self._announce(batch)
+            return len(batch)
+        except Exception:
+            db.rollback()
+            logger.exception("Batched chat insert failed, retrying messages one by one")
+
+        # Fall back to single inserts so one bad row (e.g. a deleted swap) doesn't sink the batch
+        written = []
+        for message in batch:
+            try:
+                db.execute(insert(ChatMessage), [message])
+                db.commit()
+                written.append(message)
+            except Exception:
+                db.rollback()
+                logger.exception("Dropping chat message %s", message.get("id"))
+        self._announce(written)
+        return len(written)
+
+    @staticmethod
+    def _announce(messages: List[dict]) -> None:
+        for message in messages:
+            event_broker.announce(chat_channel(message["swap_request_id"]), message["id"])
+
+chat_write_buffer = ChatWriteBuffer()
@@ -0,0 +1,279 @@
+from abc import ABC, abstractmethod
+from config import get_settings
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import asyncio
+import json
+import logging
+import queue
+import select
+import threading
+import time
+import uuid
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHANNEL = "broadcasts"
+
+def user_channel(user_id: str) -> str:
+    return f"user:{user_id}"
+
+def chat_channel(swap_id: str) -> str:
+    return f"swap:{swap_id}"
+
+class Subscription:
+    """A subscriber's queue of events on one or more channels.
+
+    Created from the event loop that consumes it; events published from
+    other threads are handed over with `call_soon_threadsafe`.
+    """
+
+    def __init__(self, broker: "EventBroker", channels: Iterable[str], max_queue: int = 1000):
+        self.broker = broker
+        self.channels = set(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+
+    def _offer(self, event: dict) -> None:
+        if self.queue.full():
+            # Slow consumer: drop the oldest event, clients resync by resuming from an ID
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Wait for the next event; returns None if `timeout` passes first"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+# Loads the events with the given IDs for a channel, keyed by ID
+EventLoader = Callable[[List[str]], Dict[str, dict]]
+
+class EventBroker(ABC):
+    """Publish/subscribe interface for pushing events to connected clients.
+
+    Every event carries an "id". Brokers that share events between
+    processes send only the channel and ID and re-read the event on the
+    receiving side through the loader registered for the channel's prefix.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, EventLoader] = {}
+
+    def register_loader(self, channel_prefix: str, loader: EventLoader) -> None:
+        """Register how to load events for channels starting with `channel_prefix`"""
+        self._loaders[channel_prefix] = loader
+
+    @abstractmethod
+    def publish(self, channel: str, event: dict, local_only: bool = False) -> None:
+        """Deliver an event to the channel's subscribers. Never raises.
+
+        With `local_only` it only reaches this process's subscribers; call
+        `announce` once the event can be loaded by other processes.
+        """
+
+    @abstractmethod
+    def announce(self, channel: str, event_id: str) -> None:
+        """Deliver an event already published locally to other processes' subscribers"""
+
+    @abstractmethod
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription) -> None:
+        ...
+
+class InMemoryBroker(EventBroker):
+    """Delivers events to subscribers in this process only"""
+
+    def __init__(self):
+        super().__init__()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, event: dict, local_only: bool = False) -> None:
+        self._deliver(channel, event)
+
+    def announce(self, channel: str, event_id: str) -> None:
+        # Every subscriber is in this process and already has the event
+        pass
+
+    def _has_subscribers(self, channel: str) -> bool:
+        with self._lock:
+            return channel in self._subscribers
+
+    def _deliver(self, channel: str, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, event)
+            except RuntimeError:
+                # Subscriber's event loop is closed
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+class PostgresNotifyBroker(InMemoryBroker):
+    """Shares events between worker processes through Postgres LISTEN/NOTIFY.
+
+    Events are delivered to this worker's subscribers right away. Only
+    `{origin, channel, id}` goes through NOTIFY, which keeps payloads far
+    below Postgres' 8000-byte limit. A publisher thread sends them over
+    its own connection, so publishing never takes a pooled connection
+    from the caller and never raises. A listener thread in each worker
+    skips its own notifications and loads the others' events through the
+    registered loaders, only for channels that have subscribers here.
+    Notifications can be lost (a full queue, a reconnect); clients resync
+    by resuming from an event ID.
+    """
+
+    MAX_PAYLOAD_BYTES = 7999
+    MAX_QUEUE = 10000
+
+    def __init__(self, engine, pg_channel: str = "skillswap_events"):
+        super().__init__()
+        self._engine = engine
+        self._pg_channel = pg_channel
+        self._origin = uuid.uuid4().hex
+        self._outgoing: "queue.Queue[str]" = queue.Queue(self.MAX_QUEUE)
+        self._threads: Dict[str, threading.Thread] = {}
+        self._threads_lock = threading.Lock()
+
+    def publish(self, channel: str, event: dict, local_only: bool = False) -> None:
+        self._deliver(channel, event)
+        if not local_only:
+            self.announce(channel, event["id"])
+
+    def announce(self, channel: str, event_id: str) -> None:
+        payload = json.dumps({"origin": self._origin, "channel": channel, "id": event_id})
+        if len(payload.encode()) > self.MAX_PAYLOAD_BYTES:
+            logger.warning("Not announcing event %s on %s: payload too large", event_id, channel)
+            return
+        try:
+            self._outgoing.put_nowait(payload)
+        except queue.Full:
+            logger.warning("Event publish queue full, dropping event %s on %s", event_id, channel)
+            return
+        self._ensure_thread("pg-event-publisher", self._publish_loop)
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        self._ensure_thread("pg-event-listener", self._listen_loop)
+        return super().subscribe(channels)
+
+    def _ensure_thread(self, name: str, target: Callable[[], None]) -> None:
+        with self._threads_lock:
+            thread = self._threads.get(name)
+            if thread is not None and thread.is_alive():
+                return
+            thread = self._threads[name] = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+
+    def _dedicated_connection(self):
+        """A DBAPI connection of our own, detached so it doesn't hold a pool slot"""
+        connection = self._engine.raw_connection()
+        connection.detach()
+        dbapi_connection = connection.dbapi_connection
+        dbapi_connection.autocommit = True
+        return dbapi_connection
+
+    def _publish_loop(self) -> None:
+        connection = None
+        while True:
+            payloads = [self._outgoing.get()]
+            while len(payloads) < 500:
+                try:
+                    payloads.append(self._outgoing.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if connection is None:
+                    connection = self._dedicated_connection()
+                cursor = connection.cursor()
+                for payload in payloads:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self._pg_channel, payload))
+                cursor.close()
+            except Exception:
+                logger.exception("Failed to publish %d events", len(payloads))
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                connection = None
+                time.sleep(1)
+
+    def _listen_loop(self) -> None:
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Event listener failed, reconnecting")
+                time.sleep(1)
+
+    def _listen(self) -> None:
+        connection = self._dedicated_connection()
+        try:
+            connection.cursor().execute(f'LISTEN "{self._pg_channel}"')
+            while True:
+                if select.select([connection], [], [], 5) == ([], [], []):
+                    continue
+                connection.poll()
+                wanted: Dict[str, List[str]] = {}
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    try:
+                        message = json.loads(notify.payload)
+                    except ValueError:
+                        continue
+                    if message.get("origin") == self._origin or not self._has_subscribers(message.get("channel")):
+                        continue
+                    wanted.setdefault(message["channel"], []).append(message["id"])
+                for channel, event_ids in wanted.items():
+                    self._deliver_loaded(channel, event_ids)
+        finally:
+            connection.close()
+
+    def _deliver_loaded(self, channel: str, event_ids: List[str]) -> None:
+        loader = next(
+            (loader for prefix, loader in self._loaders.items() if channel.startswith(prefix)), None
+        )
+        if loader is None:
+            logger.warning("No event loader for channel %s", channel)
+            return
+        try:
+            events = loader(event_ids)
+        except Exception:
+            logger.exception("Failed to load %d events for %s", len(event_ids), channel)
+            return
+        for event_id in event_ids:
+            if event_id in events:
+                self._deliver(channel, events[event_id])
+
+def create_event_broker() -> EventBroker:
+    if settings.event_broker == "postgres":
+        from db.database import engine
+        return PostgresNotifyBroker(engine)
+    return InMemoryBroker()
+
+event_broker = create_event_broker()
@@ -0,0 +1,67 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import make_transient_to_detached
+from collections import OrderedDict
+from config import get_settings
+from models.user import User
+from typing import Optional
+import threading
+import time
+
+class IdentityCache:
+    """Short-TTL cache of authenticated users, keyed by user ID.
+
+    Entries are detached snapshots of the users row; `get` merges a snapshot
+    into the caller's session without loading it, so authentication does not
+    cost a database round trip on a hit. UserService invalidates entries
+    when a user is updated or banned; the TTL bounds staleness across workers.
+    """
+
+    def __init__(self, ttl: float = 30, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple[User, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, user_id: str) -> Optional[User]:
+        """Return the cached user attached to `db`, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            snapshot = entry[0]
+        return db.merge(snapshot, load=False)
+
+    def put(self, user: User) -> None:
+        """Cache a snapshot of a loaded user"""
+        snapshot = User(**{
+            column.key: getattr(user, column.key) for column in User.__table__.columns
+        })
+        make_transient_to_detached(snapshot)
+        with self._lock:
+            self._entries[user.id] = (snapshot, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+settings = get_settings()
+
+identity_cache = IdentityCache(ttl=settings.identity_cache_ttl_seconds)
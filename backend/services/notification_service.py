@@ -1,9 +1,40 @@
+from sqlalchemy import insert, update, delete, exists, func, any_, literal, and_, or_, tuple_, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models.swap import Notification, PlatformMessage
-from typing import List, Optional
+from config import get_settings
+from models.swap import (
+    Notification, PlatformMessage, BroadcastJob, BroadcastReadMarker, BroadcastDismissal, NotificationCounter
+)
+from models.user import User
+from services.event_broker import event_broker, user_channel, BROADCAST_CHANNEL
+from utils.pagination import paginate, encode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+import threading
 import uuid
 
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BROADCAST_BATCH_SIZE = 1000
+RECONCILE_BATCH_SIZE = 1000
+
 class NotificationService:
+    @staticmethod
+    def to_dict(notification: Notification) -> dict:
+        """Serialize a notification for API responses and push events"""
+        return {
+            "id": notification.id,
+            "type": notification.type,
+            "title": notification.title,
+            "message": notification.message,
+            "related_id": notification.related_id,
+            "is_read": notification.is_read,
+            "created_at": notification.created_at.isoformat() if notification.created_at else None
+        }
+
     @staticmethod
     def create_notification(
         db: Session,
@@ -24,16 +55,263 @@ class NotificationService:
             is_read=False
         )
         db.add(notification)
+        NotificationService._adjust_unread_counts(db, {user_id: 1})
         db.commit()
         db.refresh(notification)
+        event_broker.publish(user_channel(user_id), NotificationService.to_dict(notification))
         return notification
 
     @staticmethod
-    def get_user_notifications(db: Session, user_id: str) -> List[Notification]:
-        """Get all notifications for a user"""
-        return db.query(Notification).filter(
+    def get_user_notifications(
+        db: Session,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[Notification], Optional[str]]:
+        """Get a page of notifications for a user, newest first.
+
+        When broadcasts are delivered on read, platform messages are merged
+        into the user's personal notifications here instead of being stored
+        once per user.
+        """
+        query = db.query(Notification).filter(Notification.user_id == user_id)
+        personal, personal_cursor = paginate(
+            query, Notification.created_at, Notification.id, cursor, limit
+        )
+        if settings.broadcast_delivery != "read":
+            return personal, personal_cursor
+        
+        broadcasts, broadcast_cursor = NotificationService._get_user_broadcasts(
+            db, user_id, cursor, limit
+        )
+        merged = sorted(
+            personal + broadcasts, key=lambda n: (n.created_at, n.id), reverse=True
+        )
+        page = merged[:limit]
+        has_more = len(merged) > limit or personal_cursor or broadcast_cursor
+        next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if page and has_more else None
+        return page, next_cursor
+
+    @staticmethod
+    async def get_user_notifications_async(
+        db: AsyncSession,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[Notification], Optional[str]]:
+        """Async variant of get_user_notifications"""
+        return await db.run_sync(NotificationService.get_user_notifications, user_id, cursor, limit)
+
+    @staticmethod
+    def _user_broadcasts_query(db: Session, user_id: str):
+        """Platform messages delivered on read to a user and not dismissed, with the user's read watermark"""
+        row = db.query(User.created_at, BroadcastReadMarker.last_read_at).outerjoin(
+            BroadcastReadMarker, BroadcastReadMarker.user_id == User.id
+        ).filter(User.id == user_id).first()
+        if not row:
+            return None, None
+        joined_at, last_read_at = row
+        
+        query = db.query(PlatformMessage).filter(
+            PlatformMessage.delivery == "read",
+            PlatformMessage.admin_id != user_id,
+            ~exists().where(
+                BroadcastDismissal.user_id == user_id,
+                BroadcastDismissal.platform_message_id == PlatformMessage.id
+            )
+        )
+        if joined_at:
+            # Users only receive messages sent after they joined
+            query = query.filter(PlatformMessage.created_at >= joined_at)
+        return query, last_read_at
+
+    @staticmethod
+    def _broadcast_as_notification(
+        message: PlatformMessage,
+        user_id: str,
+        last_read_at=None
+    ) -> Notification:
+        """Shape a platform message as an unsaved notification for a user"""
+        return Notification(
+            id=message.id,
+            user_id=user_id,
+            type="platform_message",
+            title=f"Platform Message from {message.admin_name}",
+            message=message.message,
+            related_id=message.id,
+            is_read=last_read_at is not None and message.created_at <= last_read_at,
+            created_at=message.created_at
+        )
+
+    @staticmethod
+    def _get_user_broadcasts(
+        db: Session,
+        user_id: str,
+        cursor: Optional[str],
+        limit: int
+    ) -> Tuple[List[Notification], Optional[str]]:
+        """A page of platform messages for a user, shaped as unsaved notifications"""
+        query, last_read_at = NotificationService._user_broadcasts_query(db, user_id)
+        if query is None:
+            return [], None
+        
+        messages, next_cursor = paginate(
+            query, PlatformMessage.created_at, PlatformMessage.id, cursor, limit
+        )
+        return [
+            NotificationService._broadcast_as_notification(message, user_id, last_read_at)
+            for message in messages
+        ], next_cursor
+
+    @staticmethod
+    def get_notifications_since(
+        db: Session,
+        user_id: str,
+        notification_id: str,
+        limit: int = MAX_PAGE_SIZE
+    ) -> List[Notification]:
+        """Notifications newer than the given one, oldest first (for resuming a stream)"""
+        anchor = db.query(Notification.created_at).filter(
+            Notification.id == notification_id,
             Notification.user_id == user_id
-        ).order_by(Notification.created_at.desc()).all()
+        ).scalar()
+        if anchor is None:
+            anchor = db.query(PlatformMessage.created_at).filter(
+                PlatformMessage.id == notification_id
+            ).scalar()
+        if anchor is None:
+            return []
+        
+        # Compare (created_at, id) so events sharing the anchor's timestamp aren't skipped
+        position = tuple_(anchor, notification_id)
+        result = db.query(Notification).filter(
+            Notification.user_id == user_id,
+            tuple_(Notification.created_at, Notification.id) > position
+        ).order_by(Notification.created_at.asc(), Notification.id.asc()).limit(limit).all()
+        
+        if settings.broadcast_delivery == "read":
+            query, last_read_at = NotificationService._user_broadcasts_query(db, user_id)
+            if query is not None:
+                messages = query.filter(tuple_(PlatformMessage.created_at, PlatformMessage.id) > position).order_by(
+                    PlatformMessage.created_at.asc(), PlatformMessage.id.asc()
+                ).limit(limit).all()
+                result += [
+                    NotificationService._broadcast_as_notification(message, user_id, last_read_at)
+                    for message in messages
+                ]
+        
+        return sorted(result, key=lambda n: (n.created_at, n.id))[:limit]
+
+    @staticmethod
+    def mark_broadcasts_read(db: Session, user_id: str, up_to) -> None:
+        """Advance a user's broadcast read watermark (never moves it backwards)"""
+        stmt = pg_insert(BroadcastReadMarker).values(user_id=user_id, last_read_at=up_to)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BroadcastReadMarker.user_id],
+            set_={
+                "last_read_at": func.greatest(BroadcastReadMarker.last_read_at, stmt.excluded.last_read_at),
+                "updated_at": func.now()
+            }
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def _adjust_unread_counts(db: Session, deltas: dict) -> None:
+        """Add per-user deltas to the unread counters in the caller's transaction"""
+        if not deltas:
+            return
+        # Increments upsert the counter; decrements only ever apply to an existing row
+        # Rows are touched in user ID order, as reconcile_unread_counts locks them, to avoid deadlocks
+        increments = {user_id: delta for user_id, delta in sorted(deltas.items()) if delta > 0}
+        if increments:
+            stmt = pg_insert(NotificationCounter).values([
+                {"user_id": user_id, "unread_count": delta}
+                for user_id, delta in increments.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[NotificationCounter.user_id],
+                set_={
+                    "unread_count": NotificationCounter.unread_count + stmt.excluded.unread_count,
+                    "updated_at": func.now()
+                }
+            )
+            db.execute(stmt)
+        for user_id, delta in sorted(deltas.items()):
+            if delta < 0:
+                db.query(NotificationCounter).filter(
+                    NotificationCounter.user_id == user_id
+                ).update({
+                    "unread_count": func.greatest(NotificationCounter.unread_count + delta, 0)
+                }, synchronize_session=False)
+
+    @staticmethod
+    def get_unread_count(db: Session, user_id: str) -> int:
+        """Unread notifications for a user, from the maintained counter"""
+        unread = db.query(NotificationCounter.unread_count).filter(
+            NotificationCounter.user_id == user_id
+        ).scalar() or 0
+        
+        if settings.broadcast_delivery == "read":
+            query, last_read_at = NotificationService._user_broadcasts_query(db, user_id)
+            if query is not None:
+                if last_read_at is not None:
+                    query = query.filter(PlatformMessage.created_at > last_read_at)
+                unread += query.count()
+        
+        return unread
+
+    @staticmethod
+    async def get_unread_count_async(db: AsyncSession, user_id: str) -> int:
+        """Async variant of get_unread_count"""
+        return await db.run_sync(NotificationService.get_unread_count, user_id)
+
+    @staticmethod
+    def reconcile_unread_counts(db: Session, batch_size: int = RECONCILE_BATCH_SIZE) -> None:
+        """Recompute every unread counter from the notifications table to fix drift.
+
+        Counters are fixed in batches. Each batch locks its counter rows
+        first and only then counts, in a later statement and so a fresh
+        snapshot: a writer that committed earlier is counted, and one still
+        in flight waits on the row lock and applies its delta on top. No
+        concurrent increment or decrement is overwritten.
+        """
+        # Users with unread notifications but no counter yet get one to fix
+        missing = db.query(Notification.user_id).filter(
+            Notification.is_read == False,
+            ~exists().where(NotificationCounter.user_id == Notification.user_id)
+        ).distinct()
+        db.execute(
+            pg_insert(NotificationCounter).from_select(
+                ["user_id", "unread_count"],
+                missing.with_entities(Notification.user_id, literal(0)).statement
+            ).on_conflict_do_nothing()
+        )
+        db.commit()
+        
+        last_user_id = None
+        while True:
+            batch = db.query(NotificationCounter.user_id, NotificationCounter.unread_count)
+            if last_user_id is not None:
+                batch = batch.filter(NotificationCounter.user_id > last_user_id)
+            counters = dict(
+                batch.order_by(NotificationCounter.user_id).limit(batch_size).with_for_update().all()
+            )
+            if not counters:
+                break
+            
+            actual = dict(db.query(Notification.user_id, func.count(Notification.id)).filter(
+                Notification.user_id == any_(literal(list(counters), ARRAY(String))),
+                Notification.is_read == False
+            ).group_by(Notification.user_id).all())
+            fixes = [
+                {"user_id": user_id, "unread_count": actual.get(user_id, 0)}
+                for user_id, unread_count in counters.items()
+                if unread_count != actual.get(user_id, 0)
+            ]
+            if fixes:
+                db.execute(update(NotificationCounter), fixes)
+            db.commit()
+            last_user_id = list(counters)[-1]
 
     @staticmethod
     def mark_as_read(db: Session, notification_id: str, user_id: str) -> Optional[Notification]:
@@ -44,27 +322,203 @@ class NotificationService:
         ).first()
         
         if notification:
-            notification.is_read = True
+            # Only the request that flips is_read decrements the counter
+            flipped = db.query(Notification).filter(
+                Notification.id == notification_id,
+                Notification.is_read == False
+            ).update({"is_read": True}, synchronize_session=False)
+            if flipped:
+                NotificationService._adjust_unread_counts(db, {user_id: -1})
             db.commit()
             db.refresh(notification)
+        elif settings.broadcast_delivery == "read":
+            # Broadcasts are read through the user's watermark
+            message = db.query(PlatformMessage).filter(
+                PlatformMessage.id == notification_id,
+                PlatformMessage.delivery == "read"
+            ).first()
+            if message:
+                NotificationService.mark_broadcasts_read(db, user_id, message.created_at)
+                db.commit()
+                notification = Notification(
+                    id=message.id,
+                    user_id=user_id,
+                    type="platform_message",
+                    is_read=True,
+                    created_at=message.created_at
+                )
         
         return notification
 
     @staticmethod
     def delete_notification(db: Session, notification_id: str, user_id: str) -> bool:
         """Delete a notification"""
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.user_id == user_id
-        ).first()
+        # The counter follows what the DELETE removed, not an earlier read of the row
+        was_read = db.execute(
+            delete(Notification).where(
+                Notification.id == notification_id,
+                Notification.user_id == user_id
+            ).returning(Notification.is_read)
+        ).scalar()
         
-        if notification:
-            db.delete(notification)
+        if was_read is not None:
+            if not was_read:
+                NotificationService._adjust_unread_counts(db, {user_id: -1})
             db.commit()
             return True
         
+        if settings.broadcast_delivery == "read":
+            # Broadcasts aren't stored per user; deleting one dismisses it
+            dismissed = NotificationService._dismiss_broadcasts(db, user_id, PlatformMessage.id == notification_id)
+            db.commit()
+            return dismissed > 0
+        
         return False
 
+    @staticmethod
+    def _dismiss_broadcasts(db: Session, user_id: str, *criteria) -> int:
+        """Hide a user's broadcasts matching `criteria` from their list and unread count; returns how many"""
+        query, _ = NotificationService._user_broadcasts_query(db, user_id)
+        if query is None:
+            return 0
+        stmt = pg_insert(BroadcastDismissal).from_select(
+            ["user_id", "platform_message_id"],
+            query.filter(*criteria).with_entities(literal(user_id), PlatformMessage.id).statement
+        ).on_conflict_do_nothing()
+        return db.execute(stmt).rowcount
+
+    @staticmethod
+    def _ids_match(ids: List[str]):
+        return Notification.id == any_(literal(list(ids), ARRAY(String)))
+
+    @staticmethod
+    def mark_read_bulk(db: Session, user_id: str, notification_ids: List[str]) -> int:
+        """Mark the given notifications read in one UPDATE; returns how many changed"""
+        updated = db.execute(
+            update(Notification).where(
+                Notification.user_id == user_id,
+                NotificationService._ids_match(notification_ids),
+                Notification.is_read == False
+            ).values(is_read=True)
+        ).rowcount
+        if updated:
+            NotificationService._adjust_unread_counts(db, {user_id: -updated})
+        
+        if settings.broadcast_delivery == "read" and updated < len(notification_ids):
+            # Remaining IDs may be broadcasts, which are read through the watermark
+            newest = db.query(func.max(PlatformMessage.created_at)).filter(
+                PlatformMessage.id == any_(literal(list(notification_ids), ARRAY(String))),
+                PlatformMessage.delivery == "read"
+            ).scalar()
+            if newest:
+                NotificationService.mark_broadcasts_read(db, user_id, newest)
+        
+        db.commit()
+        return updated
+
+    @staticmethod
+    def mark_all_read(db: Session, user_id: str) -> int:
+        """Mark every notification of a user read in one UPDATE; returns how many changed"""
+        updated = db.execute(
+            update(Notification).where(
+                Notification.user_id == user_id,
+                Notification.is_read == False
+            ).values(is_read=True)
+        ).rowcount
+        # Decrement by what this UPDATE flipped; notifications created meanwhile stay counted
+        if updated:
+            NotificationService._adjust_unread_counts(db, {user_id: -updated})
+        
+        if settings.broadcast_delivery == "read":
+            NotificationService.mark_broadcasts_read(db, user_id, func.now())
+        
+        db.commit()
+        return updated
+
+    @staticmethod
+    def _delete_where(db: Session, user_id: str, *criteria) -> int:
+        """Delete a user's notifications matching `criteria` in one DELETE ... RETURNING"""
+        deleted = db.execute(
+            delete(Notification).where(
+                Notification.user_id == user_id, *criteria
+            ).returning(Notification.is_read)
+        ).scalars().all()
+        unread = sum(1 for is_read in deleted if not is_read)
+        if unread:
+            NotificationService._adjust_unread_counts(db, {user_id: -unread})
+        db.commit()
+        return len(deleted)
+
+    @staticmethod
+    def delete_bulk(db: Session, user_id: str, notification_ids: List[str]) -> int:
+        """Delete the given notifications; returns how many were deleted"""
+        deleted = NotificationService._delete_where(
+            db, user_id, NotificationService._ids_match(notification_ids)
+        )
+        if settings.broadcast_delivery == "read" and deleted < len(notification_ids):
+            deleted += NotificationService._dismiss_broadcasts(
+                db, user_id, PlatformMessage.id == any_(literal(list(notification_ids), ARRAY(String)))
+            )
+            db.commit()
+        return deleted
+
+    @staticmethod
+    def delete_older_than(db: Session, user_id: str, before: datetime) -> int:
+        """Delete a user's notifications created before a date; returns how many were deleted"""
+        deleted = NotificationService._delete_where(db, user_id, Notification.created_at < before)
+        if settings.broadcast_delivery == "read":
+            deleted += NotificationService._dismiss_broadcasts(db, user_id, PlatformMessage.created_at < before)
+            db.commit()
+        return deleted
+
+    @staticmethod
+    def add_notifications(db: Session, values: List[dict]) -> List[dict]:
+        """Add notifications in the caller's transaction without committing.
+
+        Returns the serialized notifications (with their user_id) for
+        `publish_notifications` once the caller has committed.
+        """
+        notifications = [
+            Notification(id=str(uuid.uuid4()), is_read=False, **notification_values)
+            for notification_values in values
+        ]
+        db.add_all(notifications)
+        
+        unread: Dict[str, int] = {}
+        for notification in notifications:
+            unread[notification.user_id] = unread.get(notification.user_id, 0) + 1
+        NotificationService._adjust_unread_counts(db, unread)
+        
+        db.flush()
+        return [
+            {**NotificationService.to_dict(notification), "user_id": notification.user_id}
+            for notification in notifications
+        ]
+
+    @staticmethod
+    def publish_notifications(payloads: List[dict]) -> None:
+        """Push notifications returned by `add_notifications` to connected clients"""
+        for payload in payloads:
+            event = {key: value for key, value in payload.items() if key != "user_id"}
+            event_broker.publish(user_channel(payload["user_id"]), event)
+
+    @staticmethod
+    def swap_request_notification_values(
+        to_user_id: str,
+        from_user_name: str,
+        skill_offered: str,
+        skill_wanted: str,
+        swap_id: str
+    ) -> dict:
+        """Fields of the notification sent for a new swap request"""
+        return {
+            "user_id": to_user_id,
+            "type": "swap_request",
+            "title": f"New Swap Request from {from_user_name}",
+            "message": f"{from_user_name} wants to swap '{skill_offered}' for '{skill_wanted}'",
+            "related_id": swap_id
+        }
+
     @staticmethod
     def create_swap_request_notification(
         db: Session,
@@ -75,11 +529,12 @@ class NotificationService:
         swap_id: str
     ) -> Notification:
         """Create a notification for a new swap request"""
-        title = f"New Swap Request from {from_user_name}"
-        message = f"{from_user_name} wants to swap '{skill_offered}' for '{skill_wanted}'"
+        values = NotificationService.swap_request_notification_values(
+            to_user_id, from_user_name, skill_offered, skill_wanted, swap_id
+        )
         
         return NotificationService.create_notification(
-            db, to_user_id, 'swap_request', title, message, swap_id
+            db, values["user_id"], values["type"], values["title"], values["message"], values["related_id"]
         )
 
     @staticmethod
@@ -118,32 +573,247 @@ class NotificationService:
         admin_id: str,
         admin_name: str,
         message: str
-    ) -> PlatformMessage:
-        """Send a platform-wide message to all users"""
-        # Create platform message record
+    ) -> Tuple[PlatformMessage, Optional[BroadcastJob]]:
+        """Record a platform-wide message.
+
+        With read-time delivery the message is stored once and merged into
+        notification lists when read. Otherwise a job is queued to write a
+        notification per user; the caller schedules `run_broadcast_job`.
+        """
         platform_message = PlatformMessage(
             id=str(uuid.uuid4()),
             message=message,
             admin_id=admin_id,
-            admin_name=admin_name
+            admin_name=admin_name,
+            delivery="read" if settings.broadcast_delivery == "read" else "write"
         )
         db.add(platform_message)
+        
+        job = None
+        if settings.broadcast_delivery != "read":
+            job = BroadcastJob(
+                id=str(uuid.uuid4()),
+                platform_message_id=platform_message.id,
+                status="pending"
+            )
+            db.add(job)
+        
         db.commit()
         db.refresh(platform_message)
         
-        # Get all active users and create notifications for them
-        from services.user_service import UserService
-        users = UserService.get_all_public_users(db)
+        if platform_message.delivery == "read":
+            event = NotificationService.to_dict(
+                NotificationService._broadcast_as_notification(platform_message, user_id=None)
+            )
+            event["sender_id"] = admin_id
+            event_broker.publish(BROADCAST_CHANNEL, event)
         
-        for user in users:
-            if user.id != admin_id:  # Don't notify the admin who sent the message
-                NotificationService.create_platform_message_notification(
-                    db, user.id, message, admin_name
+        return platform_message, job
+
+    @staticmethod
+    def _broadcast_recipients_query(db: Session, admin_id: str):
+        """Public, active, non-banned users other than the sending admin"""
+        return db.query(User.id).filter(
+            User.is_public == True,
+            User.is_active == True,
+            User.is_banned == False,
+            User.id != admin_id
+        )
+
+    @staticmethod
+    def _stale_job_filter():
+        """Jobs that are pending or running but haven't made progress for broadcast_job_stale_seconds"""
+        stale_before = func.now() - timedelta(seconds=settings.broadcast_job_stale_seconds)
+        return and_(
+            BroadcastJob.status.in_(["pending", "running"]),
+            func.coalesce(BroadcastJob.updated_at, BroadcastJob.created_at) < stale_before
+        )
+
+    @staticmethod
+    def run_broadcast_job(job_id: str, batch_size: int = BROADCAST_BATCH_SIZE) -> None:
+        """Fan a platform message out to every recipient in chunked bulk inserts.
+
+        The job is claimed atomically, so only one worker runs it. A job
+        whose worker died (running with no progress for
+        broadcast_job_stale_seconds) can be claimed again and resumes after
+        its last delivered recipient; every batch commits together with
+        that position, so no one is notified twice.
+        """
+        from db.database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            claimed = db.execute(
+                update(BroadcastJob)
+                .where(
+                    BroadcastJob.id == job_id,
+                    or_(BroadcastJob.status == "pending", NotificationService._stale_job_filter())
                 )
+                .values(status="running", updated_at=func.now())
+                .returning(BroadcastJob.id)
+                .execution_options(synchronize_session=False)
+            ).first()
+            db.commit()
+            if claimed is None:
+                return
+            
+            job = db.query(BroadcastJob).filter(BroadcastJob.id == job_id).first()
+            platform_message = job.platform_message
+            title = f"Platform Message from {platform_message.admin_name}"
+            message = platform_message.message
+            recipients = NotificationService._broadcast_recipients_query(db, platform_message.admin_id)
+            
+            last_user_id = job.last_user_id
+            if last_user_id is None:
+                job.total_recipients = recipients.count()
+                db.commit()
+            
+            while True:
+                batch = recipients
+                if last_user_id is not None:
+                    batch = batch.filter(User.id > last_user_id)
+                user_ids = [row.id for row in batch.order_by(User.id).limit(batch_size).all()]
+                if not user_ids:
+                    break
+                
+                db.execute(insert(Notification), [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "type": "platform_message",
+                        "title": title,
+                        "message": message,
+                        "is_read": False
+                    }
+                    for user_id in user_ids
+                ])
+                NotificationService._adjust_unread_counts(db, {user_id: 1 for user_id in user_ids})
+                last_user_id = user_ids[-1]
+                job.delivered_count += len(user_ids)
+                job.last_user_id = last_user_id
+                db.commit()
+            
+            job.status = "completed"
+            job.finished_at = func.now()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            job = db.query(BroadcastJob).filter(BroadcastJob.id == job_id).first()
+            if job:
+                job.status = "failed"
+                job.error = str(e)
+                job.finished_at = func.now()
+                db.commit()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def resume_stale_broadcast_jobs(db: Session) -> None:
+        """Run broadcast jobs left pending or running by a worker that died"""
+        job_ids = [
+            job_id for (job_id,) in db.query(BroadcastJob.id).filter(NotificationService._stale_job_filter()).all()
+        ]
+        for job_id in job_ids:
+            logger.warning("Resuming stale broadcast job %s", job_id)
+            try:
+                NotificationService.run_broadcast_job(job_id)
+            except Exception:
+                logger.exception("Broadcast job %s failed", job_id)
+
+    @staticmethod
+    def load_notification_events(notification_ids: List[str]) -> Dict[str, dict]:
+        """Notification push events by ID, for events published by other workers"""
+        from db.database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            notifications = db.query(Notification).filter(NotificationService._ids_match(notification_ids)).all()
+            return {notification.id: NotificationService.to_dict(notification) for notification in notifications}
+        finally:
+            db.close()
+
+    @staticmethod
+    def load_broadcast_events(message_ids: List[str]) -> Dict[str, dict]:
+        """Broadcast push events by platform message ID, for events published by other workers"""
+        from db.database import SessionLocal
         
-        return platform_message
+        db = SessionLocal()
+        try:
+            messages = db.query(PlatformMessage).filter(
+                PlatformMessage.id == any_(literal(list(message_ids), ARRAY(String)))
+            ).all()
+            return {
+                message.id: {
+                    **NotificationService.to_dict(NotificationService._broadcast_as_notification(message, user_id=None)),
+                    "sender_id": message.admin_id
+                }
+                for message in messages
+            }
+        finally:
+            db.close()
 
     @staticmethod
-    def get_platform_messages(db: Session) -> List[PlatformMessage]:
-        """Get all platform messages"""
-        return db.query(PlatformMessage).order_by(PlatformMessage.created_at.desc()).all() 
\ No newline at end of file
+    def get_broadcast_job(db: Session, job_id: str) -> Optional[BroadcastJob]:
+        """Get a platform message delivery job"""
+        return db.query(BroadcastJob).filter(BroadcastJob.id == job_id).first()
+
+    @staticmethod
+    def get_platform_messages(
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[PlatformMessage], Optional[str]]:
+        """Get a page of platform messages, newest first"""
+        return paginate(
+            db.query(PlatformMessage), PlatformMessage.created_at, PlatformMessage.id, cursor, limit
+        ) 
+
+class ReadReceiptCoalescer:
+    """Buffers single read receipts and writes them as one bulk UPDATE per user.
+
+    A burst of mark-as-read calls within `delay` seconds is flushed together
+    by a timer thread through NotificationService.mark_read_bulk.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._pending: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, user_id: str, notification_id: str) -> None:
+        with self._lock:
+            self._pending.setdefault(user_id, set()).add(notification_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        from db.database import SessionLocal
+        
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+        if not pending:
+            return
+        
+        db = SessionLocal()
+        try:
+            for user_id, notification_ids in pending.items():
+                # One user's failure mustn't lose everyone else's receipts
+                try:
+                    NotificationService.mark_read_bulk(db, user_id, list(notification_ids))
+                except Exception:
+                    db.rollback()
+                    logger.exception(
+                        "Failed to write %d coalesced read receipts for user %s", len(notification_ids), user_id
+                    )
+        finally:
+            db.close()
+
+read_receipts = ReadReceiptCoalescer(settings.read_receipt_coalesce_ms / 1000)
+
+event_broker.register_loader(user_channel(""), NotificationService.load_notification_events)
+event_broker.register_loader(BROADCAST_CHANNEL, NotificationService.load_broadcast_events)
@@ -0,0 +1,160 @@
+from datetime import timedelta
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from models.outbox import OutboxEvent
+from utils.metrics import registry
+from typing import Callable, Dict, List, Optional
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+# Failed events are retried after RETRY_BASE_SECONDS, doubling per attempt
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+
+dead_letters = registry.counter(
+    "outbox_dead_letters_total",
+    "Outbox events that failed MAX_ATTEMPTS times and are no longer retried",
+    ("event_type",)
+)
+
+def add_outbox_event(db: Session, event_type: str, payload: dict) -> OutboxEvent:
+    """Record an event in the caller's transaction; it is dispatched after commit"""
+    event = OutboxEvent(id=str(uuid.uuid4()), event_type=event_type, payload=payload)
+    db.add(event)
+    return event
+
+def _swap_request_created(db: Session, events: List[OutboxEvent]) -> List[dict]:
+    from services.notification_service import NotificationService
+    
+    return NotificationService.add_notifications(db, [
+        NotificationService.swap_request_notification_values(
+            event.payload["to_user_id"], event.payload["from_user_name"],
+            event.payload["skill_offered"], event.payload["skill_wanted"],
+            event.payload["swap_id"]
+        )
+        for event in events
+    ])
+
+# Handlers add their side effects to the session without committing and
+# return the notification payloads to push once the batch commits
+OUTBOX_HANDLERS: Dict[str, Callable[[Session, List[OutboxEvent]], List[dict]]] = {
+    "swap_request_created": _swap_request_created,
+}
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+def _dead_letter_filter():
+    return OutboxEvent.processed_at.is_(None), OutboxEvent.attempts >= MAX_ATTEMPTS
+
+class OutboxDispatcher:
+    @staticmethod
+    def _handle_one(db: Session, event: OutboxEvent) -> Optional[List[dict]]:
+        """Run an event's handler in a savepoint; returns its payloads, or None if it failed.
+
+        On failure only the handler's work is rolled back, and the event gets
+        a retry scheduled with backoff, or is dead-lettered.
+        """
+        try:
+            with db.begin_nested():
+                return OUTBOX_HANDLERS[event.event_type](db, [event])
+        except Exception as e:
+            event.attempts += 1
+            event.last_error = str(e)
+            if event.attempts >= MAX_ATTEMPTS:
+                dead_letters.inc(event_type=event.event_type)
+                logger.error(
+                    "Outbox event %s (%s) failed %d times, giving up: %s",
+                    event.id, event.event_type, event.attempts, e
+                )
+            else:
+                event.next_attempt_at = func.now() + _retry_delay(event.attempts)
+                logger.warning("Outbox event %s (%s) failed, will retry: %s", event.id, event.event_type, e)
+            return None
+
+    @staticmethod
+    def dispatch_pending(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+        """Process one batch of due outbox events; returns how many were claimed.
+
+        Rows are claimed with FOR UPDATE SKIP LOCKED so several workers can
+        drain the outbox concurrently without handling an event twice. Only
+        types with a handler are claimed; others stay pending until one is
+        deployed. Each type is handled as a batch; if that fails, its events
+        are retried one by one so a single bad event can't hold back or use
+        up the attempts of the rest.
+        """
+        from services.notification_service import NotificationService
+        
+        events = db.query(OutboxEvent).filter(
+            OutboxEvent.processed_at.is_(None),
+            OutboxEvent.attempts < MAX_ATTEMPTS,
+            OutboxEvent.event_type.in_(list(OUTBOX_HANDLERS)),
+            or_(OutboxEvent.next_attempt_at.is_(None), OutboxEvent.next_attempt_at <= func.now())
+        ).order_by(OutboxEvent.created_at).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not events:
+            db.commit()
+            return 0
+        
+        by_type: Dict[str, List[OutboxEvent]] = {}
+        for event in events:
+            by_type.setdefault(event.event_type, []).append(event)
+        
+        pushed = []
+        for event_type, typed_events in by_type.items():
+            try:
+                with db.begin_nested():
+                    pushed += OUTBOX_HANDLERS[event_type](db, typed_events)
+                handled = typed_events
+            except Exception as e:
+                logger.warning("Outbox batch of %s failed, retrying events one by one: %s", event_type, e)
+                handled = []
+                for event in typed_events:
+                    payloads = OutboxDispatcher._handle_one(db, event)
+                    if payloads is not None:
+                        pushed += payloads
+                        handled.append(event)
+            for event in handled:
+                event.processed_at = func.now()
+        db.commit()
+        
+        NotificationService.publish_notifications(pushed)
+        return len(events)
+
+    @staticmethod
+    def get_dead_letters(db: Session, limit: int = 100) -> List[OutboxEvent]:
+        """Events that exhausted their attempts, newest first"""
+        return db.query(OutboxEvent).filter(
+            *_dead_letter_filter()
+        ).order_by(OutboxEvent.created_at.desc()).limit(limit).all()
+
+    @staticmethod
+    def retry_dead_letter(db: Session, event_id: str) -> bool:
+        """Reset a dead-lettered event's attempts so it is dispatched again"""
+        updated = db.query(OutboxEvent).filter(
+            OutboxEvent.id == event_id, *_dead_letter_filter()
+        ).update({
+            "attempts": 0, "next_attempt_at": None
+        }, synchronize_session=False)
+        db.commit()
+        return updated > 0
+
+    @staticmethod
+    def drain(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> None:
+        """Dispatch pending events until the outbox is empty"""
+        while OutboxDispatcher.dispatch_pending(db, batch_size) == batch_size:
+            pass
+
+    @staticmethod
+    def run_once() -> None:
+        """Drain the outbox with a fresh session (for background tasks)"""
+        from db.database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            OutboxDispatcher.drain(db)
+        finally:
+            db.close()
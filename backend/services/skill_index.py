@@ -0,0 +1,497 @@
+from sqlalchemy import any_, literal, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from models.user import User, normalize_skill
+from services.event_broker import event_broker
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+SKILL_TYPES = ("offered", "wanted")
+# Posting lists holding at least 1/DENSE_POSTING_FRACTION of the indexed users
+# keep a cached bitmap, which is then no bigger than the posting set itself;
+# sparser ones are turned into a bitmap per query
+DENSE_POSTING_FRACTION = 512
+# Announces users whose skills or searchability changed, so every worker re-indexes them
+SKILL_INDEX_CHANNEL = "skill-index"
+
+class SkillIndex:
+    """In-process inverted index of normalized skill -> user ID posting lists.
+
+    Only public, active, non-banned users are indexed. It backs matching and
+    cycle finding; skill search queries the database directly. The index is
+    built from the database on first use and rebuilt periodically. Writes
+    update it in the writing worker and are announced on
+    SKILL_INDEX_CHANNEL so other workers re-read the changed users. Skill
+    names are also interned to integer IDs so each user's offered and
+    wanted skills can be held as bitmasks, and users get ordinals so a
+    posting list can be held as a bitmap over users for reciprocal matching.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._loaded = False
+        # Users changed while a rebuild is running, replayed onto the new state
+        self._changes: Optional[Dict[str, Optional[Tuple[List[str], List[str]]]]] = None
+        self._postings: Dict[str, Dict[str, Set[str]]] = {t: {} for t in SKILL_TYPES}
+        self._user_skills: Dict[str, Dict[str, Set[str]]] = {}
+        self._skill_ids: Dict[str, int] = {}
+        self._user_masks: Dict[str, Tuple[int, int]] = {}
+        # Stable per-user bit positions for the posting bitmaps
+        self._ordinals: Dict[str, int] = {}
+        self._ordinal_users: List[str] = []
+        # (skill_type, name) -> bitmap of the posting list, for dense postings only
+        self._bitmaps: Dict[Tuple[str, str], int] = {}
+
+    _STATE = ("_postings", "_user_skills", "_skill_ids", "_user_masks", "_ordinals", "_ordinal_users", "_bitmaps")
+
+    @staticmethod
+    def _is_searchable(user: User) -> bool:
+        return bool(user.is_public) and user.is_active is not False and not user.is_banned
+
+    @staticmethod
+    def _searchable_users(db: Session):
+        return db.query(
+            User.id, User.skills_offered_normalized, User.skills_wanted_normalized
+        ).filter(
+            User.is_public == True,
+            User.is_active == True,
+            User.is_banned == False
+        )
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Build the index from the users table if it hasn't been built yet.
+
+        Blocks while the index is built, so call it from the threadpool,
+        never from a coroutine. The app warms the index at startup, so
+        requests normally find it built.
+        """
+        if not self._loaded:
+            self.rebuild(db, only_if_unloaded=True)
+
+    def rebuild(self, db: Session, only_if_unloaded: bool = False) -> None:
+        """Rebuild the index from the users table.
+
+        The new index is built without holding the lock, so matching keeps
+        serving from the current one; changes made meanwhile are replayed
+        onto it before it is swapped in.
+        """
+        with self._build_lock:
+            if only_if_unloaded and self._loaded:
+                return
+            with self._lock:
+                self._changes = {}
+            try:
+                fresh = SkillIndex()
+                # In ID order, so ordinals (and find_cycles' expansion order) match across workers
+                rows = self._searchable_users(db).order_by(User.id).yield_per(10000)
+                for user_id, offered, wanted in rows:
+                    fresh._add(user_id, offered or [], wanted or [])
+                fresh._cache_dense_bitmaps()
+            except Exception:
+                with self._lock:
+                    self._changes = None
+                raise
+
+            with self._lock:
+                for name in self._STATE:
+                    setattr(self, name, getattr(fresh, name))
+                changes, self._changes = self._changes, None
+                for user_id, skills in changes.items():
+                    self._remove(user_id)
+                    if skills is not None:
+                        self._add(user_id, *skills)
+                self._loaded = True
+
+    def refresh_users(self, user_ids: Iterable[str]) -> None:
+        """Re-read the given users from the database and re-index them"""
+        from db.database import SessionLocal
+
+        user_ids = list(user_ids)
+        db = SessionLocal()
+        try:
+            rows = {
+                user_id: (offered or [], wanted or [])
+                for user_id, offered, wanted in self._searchable_users(db).filter(
+                    User.id == any_(literal(user_ids, ARRAY(String)))
+                )
+            }
+        finally:
+            db.close()
+        for user_id in user_ids:
+            self._set(user_id, rows.get(user_id))
+
+    def _set(self, user_id: str, skills: Optional[Tuple[List[str], List[str]]]) -> None:
+        """Replace a user's postings; None removes the user"""
+        with self._lock:
+            if self._changes is not None:
+                self._changes[user_id] = skills
+            self._remove(user_id)
+            if skills is not None:
+                self._add(user_id, *skills)
+
+    def _add(self, user_id: str, offered: Iterable[str], wanted: Iterable[str]) -> None:
+        skills = {
+            "offered": {normalize_skill(s) for s in offered if s and s.strip()},
+            "wanted": {normalize_skill(s) for s in wanted if s and s.strip()},
+        }
+        ordinal = self._ordinals.get(user_id)
+        if ordinal is None:
+            ordinal = self._ordinals[user_id] = len(self._ordinal_users)
+            self._ordinal_users.append(user_id)
+        for skill_type, names in skills.items():
+            postings = self._postings[skill_type]
+            for name in names:
+                postings.setdefault(name, set()).add(user_id)
+                bitmap = self._bitmaps.get((skill_type, name))
+                if bitmap is not None:
+                    self._bitmaps[(skill_type, name)] = bitmap | (1 << ordinal)
+        self._user_skills[user_id] = skills
+        self._user_masks[user_id] = (
+            self._mask(skills["offered"], intern=True),
+            self._mask(skills["wanted"], intern=True)
+        )
+
+    def _mask(self, names: Iterable[str], intern: bool = False) -> int:
+        """Bitmask of interned skill IDs; unknown skills are skipped unless interning"""
+        mask = 0
+        for name in names:
+            skill_id = self._skill_ids.get(name)
+            if skill_id is None:
+                if not intern:
+                    continue
+                skill_id = self._skill_ids[name] = len(self._skill_ids)
+            mask |= 1 << skill_id
+        return mask
+
+    def _remove(self, user_id: str) -> None:
+        skills = self._user_skills.pop(user_id, None)
+        self._user_masks.pop(user_id, None)
+        if not skills:
+            return
+        bit = 1 << self._ordinals[user_id]
+        for skill_type, names in skills.items():
+            postings = self._postings[skill_type]
+            for name in names:
+                users = postings.get(name)
+                if users is None:
+                    continue
+                users.discard(user_id)
+                if not users:
+                    del postings[name]
+                bitmap = self._bitmaps.get((skill_type, name))
+                if bitmap is None:
+                    continue
+                if users:
+                    self._bitmaps[(skill_type, name)] = bitmap & ~bit
+                else:
+                    del self._bitmaps[(skill_type, name)]
+
+    def _is_dense(self, users: Set[str]) -> bool:
+        return len(users) * DENSE_POSTING_FRACTION >= len(self._ordinal_users)
+
+    def _cache_dense_bitmaps(self) -> None:
+        """Build the cached bitmaps up front so the first matches don't pay for them"""
+        for skill_type, postings in self._postings.items():
+            for name, users in postings.items():
+                if self._is_dense(users):
+                    self._bitmap(skill_type, name)
+
+    def _bitmap(self, skill_type: str, name: str) -> int:
+        """Bitmap (by user ordinal) of a posting list; 0 for unknown skills"""
+        bitmap = self._bitmaps.get((skill_type, name))
+        if bitmap is not None:
+            return bitmap
+        users = self._postings[skill_type].get(name)
+        if not users:
+            return 0
+        bits = bytearray((len(self._ordinal_users) + 7) // 8)
+        for user_id in users:
+            ordinal = self._ordinals[user_id]
+            bits[ordinal >> 3] |= 1 << (ordinal & 7)
+        bitmap = int.from_bytes(bits, "little")
+        if self._is_dense(users):
+            self._bitmaps[(skill_type, name)] = bitmap
+        return bitmap
+
+    def upsert_user(self, user: User) -> None:
+        """Re-index a user after create/update; drops users that are no longer searchable"""
+        skills = (user.skills_offered or [], user.skills_wanted or []) if self._is_searchable(user) else None
+        self._set(user.id, skills)
+
+    def remove_user(self, user_id: str) -> None:
+        """Remove a user from the index (e.g. when banned)"""
+        self._set(user_id, None)
+
+    @staticmethod
+    def announce(user_ids: Iterable[str]) -> None:
+        """Tell every worker to re-index these users (call after commit)"""
+        for user_id in user_ids:
+            event_broker.publish(SKILL_INDEX_CHANNEL, {"id": user_id})
+
+    def match(
+        self,
+        offered: Iterable[str],
+        wanted: Iterable[str],
+        exclude_user_id: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Tuple[str, int, int]]:
+        """Top reciprocal matches for someone offering `offered` and wanting `wanted`.
+
+        Returns (user_id, skills_they_offer_that_are_wanted,
+        skills_they_want_that_are_offered) tuples for users where both
+        counts are non-zero, best matches first: by total overlap, then by
+        the smaller of the two counts, then earliest indexed user first.
+
+        Candidates are never visited one by one. Each relevant posting list
+        is a bitmap over user ordinals and the bitmaps are summed into
+        bit-sliced counters, so scoring every candidate takes a handful of
+        big-integer operations per skill. Score levels are then peeled off
+        from the top until `limit` users are found.
+        """
+        offered_names = {normalize_skill(s) for s in offered if s and s.strip()}
+        wanted_names = {normalize_skill(s) for s in wanted if s and s.strip()}
+        if not offered_names or not wanted_names or limit <= 0:
+            return []
+
+        with self._lock:
+            gives = _BitCounter()
+            for name in wanted_names:
+                gives.add(self._bitmap("offered", name))
+            takes = _BitCounter()
+            for name in offered_names:
+                takes.add(self._bitmap("wanted", name))
+
+            # Candidates must offer something wanted and want something offered
+            candidates = gives.nonzero() & takes.nonzero()
+            excluded = self._ordinals.get(exclude_user_id) if exclude_user_id else None
+            if excluded is not None:
+                candidates &= ~(1 << excluded)
+            if not candidates:
+                return []
+
+            total = gives.plus(takes)
+            ordinals: List[int] = []
+            for score in range(total.max_value(candidates), 1, -1):
+                level = total.equal_to(score, candidates)
+                if not level:
+                    continue
+                if level.bit_count() <= limit - len(ordinals):
+                    ordinals.extend(_bits(level))
+                else:
+                    # Too many ties to take them all: best-balanced first
+                    for smaller in range(score // 2, 0, -1):
+                        tied = gives.equal_to(smaller, level) | gives.equal_to(score - smaller, level)
+                        ordinals.extend(_bits(tied, limit - len(ordinals)))
+                        if len(ordinals) >= limit:
+                            break
+                if len(ordinals) >= limit:
+                    break
+
+            offered_mask = self._mask(offered_names)
+            wanted_mask = self._mask(wanted_names)
+            scored = []
+            for ordinal in ordinals:
+                user_id = self._ordinal_users[ordinal]
+                their_offered, their_wanted = self._user_masks[user_id]
+                user_gives = (their_offered & wanted_mask).bit_count()
+                user_takes = (their_wanted & offered_mask).bit_count()
+                scored.append((-(user_gives + user_takes), -min(user_gives, user_takes), ordinal, user_id, user_gives, user_takes))
+
+        scored.sort()
+        return [(user_id, user_gives, user_takes) for _, _, _, user_id, user_gives, user_takes in scored]
+
+    def _union(self, skill_type: str, names: Iterable[str]) -> int:
+        """Bitmap of users holding any of the named skills"""
+        union = 0
+        sparse = None
+        for name in names:
+            bitmap = self._bitmaps.get((skill_type, name))
+            if bitmap is not None:
+                union |= bitmap
+                continue
+            # Set the bits of uncached postings together, converting once
+            if sparse is None:
+                sparse = bytearray((len(self._ordinal_users) + 7) // 8)
+            for user_id in self._postings[skill_type].get(name, ()):
+                ordinal = self._ordinals[user_id]
+                sparse[ordinal >> 3] |= 1 << (ordinal & 7)
+        if sparse is not None:
+            union |= int.from_bytes(sparse, "little")
+        return union
+
+    def find_cycles(
+        self,
+        user_id: str,
+        offered: Iterable[str],
+        wanted: Iterable[str],
+        max_length: int = 4,
+        limit: int = 20,
+        max_fanout: int = 200
+    ) -> List[List[str]]:
+        """Find short exchange cycles through a user in the "can teach" graph.
+
+        A can teach B when one of A's offered skills is one of B's wanted
+        skills. Edges are never materialized: neighbours come from the
+        posting bitmaps. Each cycle is returned as a list of user IDs
+        starting with `user_id`, where every user teaches the next and the
+        last teaches `user_id`. `max_fanout` bounds how many neighbours of
+        the user are expanded so the search stays interactive on dense
+        graphs.
+
+        Neighbours are expanded in ordinal order, which is user ID order as
+        of the last rebuild followed by users indexed since, so the result
+        is deterministic for a given index state. Past `max_fanout` it is
+        best-effort: cycles through neighbours that weren't expanded are
+        not found.
+        """
+        offered_names = {normalize_skill(s) for s in offered if s and s.strip()}
+        wanted_names = {normalize_skill(s) for s in wanted if s and s.strip()}
+        cycles: List[List[str]] = []
+        if not offered_names or not wanted_names:
+            return cycles
+
+        with self._lock:
+            users = self._ordinal_users
+            own = self._ordinals.get(user_id)
+            own_bit = 1 << own if own is not None else 0
+            # Users this user can teach, and users who can teach this user
+            learners = self._union("wanted", offered_names) & ~own_bit
+            teachers = self._union("offered", wanted_names) & ~own_bit
+            closing = _bits(teachers, max_fanout)
+
+            # 3-way: user -> b -> c -> user
+            teachers_of: Dict[int, int] = {}
+            for c in closing:
+                teachers_of[c] = self._union("offered", self._user_skills[users[c]]["wanted"]) & ~(own_bit | 1 << c)
+                for b in _bits(teachers_of[c] & learners, limit - len(cycles)):
+                    cycles.append([user_id, users[b], users[c]])
+                if len(cycles) >= limit:
+                    return cycles
+
+            if max_length < 4:
+                return cycles
+
+            # 4-way: user -> b -> x -> c -> user
+            opening = _bits(learners, max_fanout)
+            learners_of: Dict[int, int] = {}
+            for c in closing:
+                for b in opening:
+                    if b == c:
+                        continue
+                    if b not in learners_of:
+                        learners_of[b] = self._union("wanted", self._user_skills[users[b]]["offered"]) & ~(1 << b)
+                    common = learners_of[b] & teachers_of[c]
+                    if common:
+                        x = (common & -common).bit_length() - 1
+                        cycles.append([user_id, users[b], users[x], users[c]])
+                        if len(cycles) >= limit:
+                            return cycles
+
+        return cycles
+
+class _BitCounter:
+    """Per-user counts held bit-sliced: bit u of planes[i] is bit i of user u's count"""
+
+    def __init__(self, planes: Optional[List[int]] = None):
+        self.planes: List[int] = planes or []
+
+    def add(self, bitmap: int) -> None:
+        """Add one to the count of every user set in `bitmap`"""
+        carry = bitmap
+        for i, plane in enumerate(self.planes):
+            if not carry:
+                return
+            self.planes[i], carry = plane ^ carry, plane & carry
+        if carry:
+            self.planes.append(carry)
+
+    def plus(self, other: "_BitCounter") -> "_BitCounter":
+        """Per-user sum of two counters"""
+        planes, carry = [], 0
+        for i in range(max(len(self.planes), len(other.planes))):
+            a = self.planes[i] if i < len(self.planes) else 0
+            b = other.planes[i] if i < len(other.planes) else 0
+            planes.append(a ^ b ^ carry)
+            carry = (a & b) | (carry & (a ^ b))
+        if carry:
+            planes.append(carry)
+        return _BitCounter(planes)
+
+    def nonzero(self) -> int:
+        """Users with a count of at least one"""
+        users = 0
+        for plane in self.planes:
+            users |= plane
+        return users
+
+    def equal_to(self, value: int, among: int) -> int:
+        """Users in `among` whose count is exactly `value`"""
+        if value >> len(self.planes):
+            return 0
+        users = among
+        for i, plane in enumerate(self.planes):
+            users = users & plane if value >> i & 1 else users & ~plane
+            if not users:
+                break
+        return users
+
+    def max_value(self, among: int) -> int:
+        """Largest count of any user in `among`"""
+        value = 0
+        for i in range(len(self.planes) - 1, -1, -1):
+            narrowed = among & self.planes[i]
+            if narrowed:
+                among = narrowed
+                value |= 1 << i
+        return value
+
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+
+def _bits(bitmap: int, limit: Optional[int] = None) -> List[int]:
+    """Positions of the lowest set bits of a bitmap, up to `limit`"""
+    positions: List[int] = []
+    if limit is not None and limit <= 0:
+        return positions
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for match in _NONZERO_BYTE.finditer(data):
+        byte = data[match.start()]
+        base = match.start() * 8
+        while byte:
+            lowest = byte & -byte
+            positions.append(base + lowest.bit_length() - 1)
+            if len(positions) == limit:
+                return positions
+            byte ^= lowest
+    return positions
+
+skill_index = SkillIndex()
+
+# Announcements carry nothing but the user ID, which is all other workers need
+event_broker.register_loader(SKILL_INDEX_CHANNEL, lambda user_ids: {user_id: {"id": user_id} for user_id in user_ids})
+
+async def apply_index_updates() -> None:
+    """Re-index users announced on SKILL_INDEX_CHANNEL until cancelled.
+
+    Announcements can be dropped (a full queue, a listener reconnect); the
+    periodic rebuild catches up with anything missed.
+    """
+    subscription = event_broker.subscribe([SKILL_INDEX_CHANNEL])
+    try:
+        while True:
+            user_ids = {(await subscription.get())["id"]}
+            while not subscription.queue.empty():
+                user_ids.add(subscription.queue.get_nowait()["id"])
+            if not skill_index._loaded:
+                continue
+            try:
+                await run_in_threadpool(skill_index.refresh_users, user_ids)
+            except Exception:
+                logger.exception("Failed to re-index %d users", len(user_ids))
+    finally:
+        subscription.close()
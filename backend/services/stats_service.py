@@ -0,0 +1,130 @@
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from config import get_settings
+from db.locks import try_advisory_xact_lock
+from models.stats import PlatformCounter
+from models.swap import SwapRequest, SwapStatus, Feedback
+from models.user import User
+from typing import Dict
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+COUNTER_SHARDS = 8
+# Shard only reconcile writes to, so its updates never conflict with adjust()
+RECONCILE_SHARD = COUNTER_SHARDS
+
+def swap_status_counter(status: SwapStatus) -> str:
+    return f"swaps_{SwapStatus(status).value}"
+
+class StatsService:
+    @staticmethod
+    def adjust(db: Session, deltas: Dict[str, int]) -> None:
+        """Add deltas to platform counters in the caller's transaction.
+
+        All deltas go to one randomly chosen shard in a single upsert, with
+        rows in name order so concurrent adjustments can't deadlock.
+        """
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        shard = random.randrange(COUNTER_SHARDS)
+        stmt = insert(PlatformCounter).values([
+            {"name": name, "shard": shard, "value": delta}
+            for name, delta in sorted(deltas.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PlatformCounter.name, PlatformCounter.shard],
+            set_={"value": PlatformCounter.value + stmt.excluded.value, "updated_at": func.now()}
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def get_counters(db: Session) -> Dict[str, int]:
+        return {
+            name: int(value) for name, value in db.query(
+                PlatformCounter.name, func.sum(PlatformCounter.value)
+            ).group_by(PlatformCounter.name).all()
+        }
+
+    @staticmethod
+    def get_platform_stats(db: Session) -> dict:
+        """Platform statistics from the maintained counters, independent of table sizes"""
+        counters = StatsService.get_counters(db)
+        swaps_by_status = {
+            status.value: counters.get(swap_status_counter(status), 0) for status in SwapStatus
+        }
+        rating_count = counters.get("rating_count", 0)
+        return {
+            "total_users": counters.get("users", 0),
+            "banned_users": counters.get("banned_users", 0),
+            "total_swaps": sum(swaps_by_status.values()),
+            "swaps_by_status": swaps_by_status,
+            "pending_swaps": swaps_by_status[SwapStatus.PENDING.value],
+            # Swaps are closed once both participants confirm they are done
+            "completed_swaps": swaps_by_status[SwapStatus.COMPLETED.value] + swaps_by_status[SwapStatus.CLOSED.value],
+            "total_ratings": rating_count,
+            "average_rating": round(counters.get("rating_sum", 0) / rating_count, 2) if rating_count else 0.0
+        }
+
+    @staticmethod
+    def reconcile(db: Session) -> None:
+        """Recompute every counter from the source tables and correct drift.
+
+        Runs in one REPEATABLE READ transaction: the source tables and the
+        counters are read from the same snapshot, so their difference is the
+        drift regardless of writes committing meanwhile, and is added to a
+        shard only reconcile writes to. Nothing is locked against writers
+        while counting. An advisory lock keeps concurrent reconciles (one per
+        worker) from applying the same correction twice.
+        """
+        # The isolation level can only be set at the start of a transaction
+        db.commit()
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        try:
+            if not try_advisory_xact_lock(db, "stats_reconcile"):
+                db.rollback()
+                return
+            db.execute(text(f"SET LOCAL statement_timeout = {int(get_settings().stats_reconcile_timeout_ms)}"))
+            
+            actual = {
+                "users": db.query(func.count(User.id)).scalar(),
+                "banned_users": db.query(func.count(User.id)).filter(User.is_banned == True).scalar(),
+            }
+            for status in SwapStatus:
+                actual[swap_status_counter(status)] = 0
+            for status, count in db.query(SwapRequest.status, func.count(SwapRequest.id)).group_by(SwapRequest.status):
+                if status is not None:
+                    actual[swap_status_counter(status)] = count
+            rating_count, rating_sum = db.query(
+                func.count(Feedback.id), func.coalesce(func.sum(Feedback.rating), 0)
+            ).one()
+            actual["rating_count"] = rating_count
+            actual["rating_sum"] = rating_sum
+            
+            counters = StatsService.get_counters(db)
+            drift = {
+                name: actual.get(name, 0) - counters.get(name, 0)
+                for name in sorted(actual.keys() | counters.keys())
+            }
+            drift = {name: delta for name, delta in drift.items() if delta}
+            if drift:
+                logger.info("Correcting platform counter drift: %s", drift)
+                stmt = insert(PlatformCounter).values([
+                    {"name": name, "shard": RECONCILE_SHARD, "value": delta} for name, delta in drift.items()
+                ])
+                db.execute(stmt.on_conflict_do_update(
+                    index_elements=[PlatformCounter.name, PlatformCounter.shard],
+                    set_={"value": PlatformCounter.value + stmt.excluded.value, "updated_at": func.now()}
+                ))
+            db.commit()
+        except DBAPIError as e:
+            db.rollback()
+            # A reconcile that committed just before this one took the lock
+            # updated the reconcile shard after this snapshot; it already
+            # corrected the drift
+            if getattr(e.orig, "pgcode", None) != "40001":
+                raise
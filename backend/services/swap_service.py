@@ -1,11 +1,31 @@
 
-from sqlalchemy.orm import Session
-from models.swap import SwapRequest, Feedback, SwapStatus, ChatMessage
+from sqlalchemy import func, case, update, literal, select, tuple_, any_, not_, String
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from models.swap import SwapRequest, Feedback, SwapStatus, ChatMessage, UserRatingSummary
 from models.user import User
 from schemas.swap import SwapRequestCreate, FeedbackCreate, ChatMessageCreate
-from typing import List, Optional
+from services.event_broker import event_broker, chat_channel
+from services.chat_buffer import chat_write_buffer
+from services.outbox import add_outbox_event
+from services.stats_service import StatsService, swap_status_counter
+from services.analytics_service import AnalyticsService
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 import uuid
 
+# Allowed swap status changes. "actor" is who may perform the action:
+# the recipient of the request, or either participant. Transitions with
+# "confirmations" only complete once that many participants have made
+# the request; a participant repeating it doesn't count again.
+SWAP_TRANSITIONS = {
+    "accept": {"from": SwapStatus.PENDING, "to": SwapStatus.ACCEPTED, "actor": "recipient"},
+    "reject": {"from": SwapStatus.PENDING, "to": SwapStatus.REJECTED, "actor": "recipient"},
+    "close": {"from": SwapStatus.ACCEPTED, "to": SwapStatus.CLOSED, "actor": "participant", "confirmations": 2},
+}
+
 class SwapService:
     @staticmethod
     def create_swap_request(
@@ -13,51 +33,169 @@ class SwapService:
         swap_data: SwapRequestCreate, 
         from_user_id: str
     ) -> SwapRequest:
-        """Create a new swap request"""
+        """Create a new swap request.
+
+        The swap and a 'swap_request_created' outbox event are committed in
+        one transaction; the recipient's notification is created by the
+        outbox dispatcher.
+        """
         # Get user names
-        from_user = db.query(User).filter(User.id == from_user_id).first()
-        to_user = db.query(User).filter(User.id == swap_data.to_user_id).first()
+        names = dict(db.query(User.id, User.name).filter(
+            User.id.in_([from_user_id, swap_data.to_user_id])
+        ).all())
         
-        if not from_user or not to_user:
+        if from_user_id not in names or swap_data.to_user_id not in names:
             raise ValueError("User not found")
         
         swap_request = SwapRequest(
             id=str(uuid.uuid4()),
             from_user_id=from_user_id,
             to_user_id=swap_data.to_user_id,
-            from_user_name=from_user.name,
-            to_user_name=to_user.name,
+            from_user_name=names[from_user_id],
+            to_user_name=names[swap_data.to_user_id],
             skill_offered=swap_data.skill_offered,
             skill_wanted=swap_data.skill_wanted,
             message=swap_data.message,
-            status=SwapStatus.PENDING
+            status=SwapStatus.PENDING,
+            closed_count=0
         )
         
         db.add(swap_request)
+        StatsService.adjust(db, {swap_status_counter(SwapStatus.PENDING): 1})
+        AnalyticsService.record_swap_event(db, swap_request, "created")
+        add_outbox_event(db, "swap_request_created", {
+            "swap_id": swap_request.id,
+            "to_user_id": swap_request.to_user_id,
+            "from_user_name": swap_request.from_user_name,
+            "skill_offered": swap_request.skill_offered,
+            "skill_wanted": swap_request.skill_wanted
+        })
+        db.flush()
+        # Keep the flushed state (incl. created_at from RETURNING) readable after commit
+        db.expunge(swap_request)
         db.commit()
-        db.refresh(swap_request)
-        
-        # Create notification for the recipient
-        from services.notification_service import NotificationService
-        NotificationService.create_swap_request_notification(
-            db, swap_data.to_user_id, from_user.name, 
-            swap_data.skill_offered, swap_data.skill_wanted, swap_request.id
-        )
         
         return swap_request
 
     @staticmethod
-    def get_user_swaps(db: Session, user_id: str) -> List[SwapRequest]:
-        """Get all swaps for a user (sent and received)"""
-        return db.query(SwapRequest).filter(
+    def get_user_swaps(
+        db: Session,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[SwapRequest], Optional[str]]:
+        """Get a page of swaps for a user (sent and received), newest first"""
+        query = db.query(SwapRequest).filter(
             (SwapRequest.from_user_id == user_id) | 
             (SwapRequest.to_user_id == user_id)
-        ).all()
+        )
+        return paginate(query, SwapRequest.created_at, SwapRequest.id, cursor, limit)
+
+    @staticmethod
+    async def get_user_swaps_async(
+        db: AsyncSession,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[SwapRequest], Optional[str]]:
+        """Async variant of get_user_swaps"""
+        return await db.run_sync(SwapService.get_user_swaps, user_id, cursor, limit)
+
+    @staticmethod
+    def find_swap_cycles(
+        db: Session,
+        user: User,
+        max_length: int = 4,
+        limit: int = 20
+    ) -> List[dict]:
+        """Find 3-way and 4-way exchange cycles that include the given user.
+
+        Cycles come from the skill index and every step is re-checked against
+        the members' current rows; cycles the index is stale about are dropped.
+        """
+        from services.skill_index import skill_index, normalize_skill
+        
+        skill_index.ensure_loaded(db)
+        cycles = skill_index.find_cycles(
+            user.id, user.skills_offered or [], user.skills_wanted or [],
+            max_length=max_length, limit=limit
+        )
+        if not cycles:
+            return []
+        
+        member_ids = {member_id for cycle in cycles for member_id in cycle[1:]}
+        users = {u.id: u for u in db.query(User).filter(
+            User.id.in_(member_ids),
+            User.is_public == True,
+            User.is_active == True,
+            User.is_banned == False
+        ).all()}
+        users[user.id] = user
+        
+        def skill_taught(giver: User, receiver: User) -> Optional[str]:
+            wanted = {normalize_skill(s) for s in receiver.skills_wanted or []}
+            for skill in giver.skills_offered or []:
+                if normalize_skill(skill) in wanted:
+                    return skill
+            return None
+        
+        result = []
+        for cycle in cycles:
+            if any(member_id not in users for member_id in cycle):
+                continue
+            steps = []
+            for i, giver_id in enumerate(cycle):
+                giver = users[giver_id]
+                receiver = users[cycle[(i + 1) % len(cycle)]]
+                steps.append({
+                    "from_user_id": giver.id,
+                    "from_user_name": giver.name,
+                    "to_user_id": receiver.id,
+                    "to_user_name": receiver.name,
+                    "skill": skill_taught(giver, receiver)
+                })
+            if any(step["skill"] is None for step in steps):
+                continue
+            result.append({"size": len(cycle), "steps": steps})
+        
+        return result
 
     @staticmethod
-    def get_all_swaps(db: Session) -> List[SwapRequest]:
-        """Get all swap requests (admin only)"""
-        return db.query(SwapRequest).all()
+    def admin_swaps_query(db: Session):
+        """Swap rows with both participants' current names, resolved in the same query"""
+        from_user = aliased(User)
+        to_user = aliased(User)
+        return (
+            db.query(
+                SwapRequest.id,
+                SwapRequest.from_user_id,
+                SwapRequest.to_user_id,
+                func.coalesce(from_user.name, "Unknown").label("from_user_name"),
+                func.coalesce(to_user.name, "Unknown").label("to_user_name"),
+                SwapRequest.skill_offered,
+                SwapRequest.skill_wanted,
+                SwapRequest.message,
+                SwapRequest.status,
+                SwapRequest.created_at,
+                SwapRequest.updated_at,
+                SwapRequest.closed_count
+            )
+            .outerjoin(from_user, from_user.id == SwapRequest.from_user_id)
+            .outerjoin(to_user, to_user.id == SwapRequest.to_user_id)
+        )
+
+    @staticmethod
+    def get_all_swaps(
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Get a page of all swap requests (admin only), newest first"""
+        rows, next_cursor = paginate(
+            SwapService.admin_swaps_query(db), SwapRequest.created_at, SwapRequest.id, cursor, limit,
+            key=lambda row: (row.created_at, row.id)
+        )
+        return [dict(row._mapping) for row in rows], next_cursor
 
     @staticmethod
     def get_swap_by_id(db: Session, swap_id: str) -> Optional[SwapRequest]:
@@ -65,47 +203,79 @@ class SwapService:
         return db.query(SwapRequest).filter(SwapRequest.id == swap_id).first()
 
     @staticmethod
-    def accept_swap(db: Session, swap_id: str, user_id: str) -> Optional[SwapRequest]:
-        """Accept a swap request"""
-        swap = db.query(SwapRequest).filter(
-            SwapRequest.id == swap_id,
-            SwapRequest.to_user_id == user_id
-        ).first()
+    def _apply_transition(db: Session, swap_id: str, user_id: str, action: str) -> Optional[SwapRequest]:
+        """Apply a transition from SWAP_TRANSITIONS as one conditional UPDATE ... RETURNING.
+
+        Returns the updated swap, or None if the swap doesn't exist, the user
+        may not perform the action, or the swap is no longer in the expected
+        status (e.g. a concurrent request got there first).
+        """
+        transition = SWAP_TRANSITIONS[action]
+        if transition["actor"] == "recipient":
+            actor = SwapRequest.to_user_id == user_id
+        else:
+            actor = (SwapRequest.from_user_id == user_id) | (SwapRequest.to_user_id == user_id)
         
-        if swap and swap.status == SwapStatus.PENDING:
-            swap.status = SwapStatus.ACCEPTED
-            db.commit()
-            db.refresh(swap)
-            
-            # Create notification for the sender
-            from services.notification_service import NotificationService
-            NotificationService.create_swap_response_notification(
-                db, swap.from_user_id, swap.to_user_name, 'accepted', swap.id
-            )
+        to_status = literal(transition["to"], SwapRequest.status.type)
+        criteria = [SwapRequest.id == swap_id, SwapRequest.status == transition["from"], actor]
+        confirmations = transition.get("confirmations")
+        if confirmations:
+            # Each participant's request counts once towards the transition
+            criteria.append(not_(literal(user_id) == any_(SwapRequest.closed_by)))
+            values = {
+                "closed_by": func.array_append(SwapRequest.closed_by, user_id),
+                "closed_count": SwapRequest.closed_count + 1,
+                "status": case(
+                    (SwapRequest.closed_count + 1 >= confirmations, to_status),
+                    else_=SwapRequest.status
+                )
+            }
+        else:
+            values = {"status": to_status}
         
+        stmt = update(SwapRequest).where(*criteria).values(**values).returning(SwapRequest)
+        
+        swap = db.scalars(
+            stmt, execution_options={"populate_existing": True, "synchronize_session": False}
+        ).first()
+        if swap is not None and swap.status == transition["to"]:
+            StatsService.adjust(db, {
+                swap_status_counter(transition["from"]): -1,
+                swap_status_counter(transition["to"]): 1
+            })
+            AnalyticsService.record_swap_event(db, swap, transition["to"].value)
+        db.commit()
         return swap
 
     @staticmethod
-    def reject_swap(db: Session, swap_id: str, user_id: str) -> Optional[SwapRequest]:
-        """Reject a swap request"""
-        swap = db.query(SwapRequest).filter(
-            SwapRequest.id == swap_id,
-            SwapRequest.to_user_id == user_id
-        ).first()
+    def _respond_to_swap(db: Session, swap_id: str, user_id: str, action: str) -> Optional[SwapRequest]:
+        """Accept or reject a swap request, notifying the sender if the status changed"""
+        swap = SwapService._apply_transition(db, swap_id, user_id, action)
         
-        if swap and swap.status == SwapStatus.PENDING:
-            swap.status = SwapStatus.REJECTED
-            db.commit()
-            db.refresh(swap)
-            
-            # Create notification for the sender
-            from services.notification_service import NotificationService
-            NotificationService.create_swap_response_notification(
-                db, swap.from_user_id, swap.to_user_name, 'rejected', swap.id
-            )
+        if swap is None:
+            # Not pending any more: return the swap unchanged if the user may see it
+            return db.query(SwapRequest).filter(
+                SwapRequest.id == swap_id,
+                SwapRequest.to_user_id == user_id
+            ).first()
         
+        # Create notification for the sender
+        from services.notification_service import NotificationService
+        NotificationService.create_swap_response_notification(
+            db, swap.from_user_id, swap.to_user_name, swap.status.value, swap.id
+        )
         return swap
 
+    @staticmethod
+    def accept_swap(db: Session, swap_id: str, user_id: str) -> Optional[SwapRequest]:
+        """Accept a swap request"""
+        return SwapService._respond_to_swap(db, swap_id, user_id, "accept")
+
+    @staticmethod
+    def reject_swap(db: Session, swap_id: str, user_id: str) -> Optional[SwapRequest]:
+        """Reject a swap request"""
+        return SwapService._respond_to_swap(db, swap_id, user_id, "reject")
+
     @staticmethod
     def delete_swap(db: Session, swap_id: str, user_id: str) -> bool:
         """Delete a swap request (only by owner)"""
@@ -116,6 +286,7 @@ class SwapService:
         
         if swap:
             db.delete(swap)
+            StatsService.adjust(db, {swap_status_counter(swap.status): -1})
             db.commit()
             return True
         
@@ -146,6 +317,8 @@ class SwapService:
         )
         
         db.add(feedback)
+        SwapService._apply_rating_delta(db, to_user_id, feedback_data.rating)
+        StatsService.adjust(db, {"rating_count": 1, "rating_sum": feedback_data.rating})
         db.commit()
         db.refresh(feedback)
         return feedback
@@ -157,76 +330,108 @@ class SwapService:
 
     @staticmethod
     def close_swap(db: Session, swap_id: str, user_id: str) -> Optional[SwapRequest]:
-        """Close a completed swap - increment counter, close when count reaches 2"""
-        swap = db.query(SwapRequest).filter(
-            SwapRequest.id == swap_id,
-            (SwapRequest.from_user_id == user_id) | (SwapRequest.to_user_id == user_id),
-            SwapRequest.status == SwapStatus.ACCEPTED
-        ).first()
-        
-        if not swap:
-            return None
-        
-        # Increment the closed count
-        swap.closed_count += 1
-        
-        # If both users have closed (count reaches 2), mark as CLOSED
-        if swap.closed_count >= 2:
-            swap.status = SwapStatus.CLOSED
-        
-        db.commit()
-        db.refresh(swap)
+        """Close a completed swap - record the participant, close once both have"""
+        swap = SwapService._apply_transition(db, swap_id, user_id, "close")
+        if swap is None:
+            # A repeated close from the same participant leaves the swap unchanged
+            return db.query(SwapRequest).filter(
+                SwapRequest.id == swap_id,
+                SwapRequest.status == SwapStatus.ACCEPTED,
+                literal(user_id) == any_(SwapRequest.closed_by)
+            ).first()
         return swap
 
     @staticmethod
     def get_user_ratings(db: Session, user_id: str) -> dict:
-        """Get user's average rating and all feedback"""
+        """Get user's rating summary (average, count, histogram) and all feedback"""
+        ratings = SwapService.get_rating_summary(db, user_id)
         feedback = db.query(Feedback).filter(Feedback.to_user_id == user_id).all()
         
-        if not feedback:
-            return {
-                "average_rating": 0.0,
-                "total_ratings": 0,
-                "feedback": []
-            }
-        
-        # Ensure ratings are integers and handle any type issues
-        ratings = []
-        for f in feedback:
-            try:
-                rating = int(f.rating) if f.rating is not None else 0
-                ratings.append(rating)
-            except (ValueError, TypeError):
-                # Skip invalid ratings
-                continue
-        
-        if not ratings:
-            return {
-                "average_rating": 0.0,
-                "total_ratings": 0,
-                "feedback": []
-            }
-        
-        total_rating = sum(ratings)
-        average_rating = total_rating / len(ratings)
-        
         # Convert feedback to serializable format
-        feedback_list = []
-        for fb in feedback:
-            feedback_list.append({
+        ratings["feedback"] = [
+            {
                 "id": fb.id,
                 "rating": fb.rating,
                 "comment": fb.comment,
                 "from_user_id": fb.from_user_id,
                 "created_at": fb.created_at.isoformat() if fb.created_at else None
-            })
+            }
+            for fb in feedback
+        ]
+        return ratings
+
+    @staticmethod
+    def _apply_rating_delta(db: Session, user_id: str, rating: int, count: int = 1) -> None:
+        """Add (or with a negative count, remove) ratings from a user's rating summary.
+
+        Runs as a single upsert in the caller's transaction, so the summary
+        commits together with the feedback change.
+        """
+        values = {"rating_count": count, "rating_sum": rating * count}
+        if 1 <= rating <= 5:
+            values[f"rating_{rating}"] = count
+        
+        stmt = insert(UserRatingSummary).values(user_id=user_id, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserRatingSummary.user_id],
+            set_={
+                **{
+                    column: getattr(UserRatingSummary, column) + stmt.excluded[column]
+                    for column in values
+                },
+                "updated_at": func.now()
+            }
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def get_rating_summary(db: Session, user_id: str) -> dict:
+        """Get a user's rating count, average and histogram from the maintained summary"""
+        summary = db.query(UserRatingSummary).filter(UserRatingSummary.user_id == user_id).first()
+        if not summary:
+            return {
+                "average_rating": 0.0,
+                "total_ratings": 0,
+                "histogram": {star: 0 for star in range(1, 6)}
+            }
         
         return {
-            "average_rating": round(average_rating, 1),
-            "total_ratings": len(ratings),
-            "feedback": feedback_list
+            "average_rating": summary.average_rating,
+            "total_ratings": summary.rating_count,
+            "histogram": summary.histogram
         }
 
+    @staticmethod
+    def rebuild_rating_summaries(db: Session) -> None:
+        """Recompute every user's rating summary from the feedback table"""
+        columns = {
+            "rating_count": func.count(Feedback.id),
+            "rating_sum": func.coalesce(func.sum(Feedback.rating), 0),
+        }
+        for star in range(1, 6):
+            columns[f"rating_{star}"] = func.count(case((Feedback.rating == star, 1)))
+        
+        select_stmt = db.query(
+            Feedback.to_user_id, *columns.values()
+        ).group_by(Feedback.to_user_id).statement
+        
+        db.query(UserRatingSummary).delete(synchronize_session=False)
+        stmt = insert(UserRatingSummary).from_select(["user_id", *columns.keys()], select_stmt)
+        # Feedback committed meanwhile may have created a summary row already
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserRatingSummary.user_id],
+            set_={name: getattr(stmt.excluded, name) for name in columns}
+        ))
+        db.commit()
+
+    @staticmethod
+    def get_participant_swap(db: Session, swap_id: str, user_id: str) -> Optional[SwapRequest]:
+        """Get a swap if the user is one of its participants"""
+        swap = db.query(SwapRequest).filter(SwapRequest.id == swap_id).first()
+        if not swap or (swap.from_user_id != user_id and swap.to_user_id != user_id):
+            return None
+        return swap
+
     @staticmethod
     def create_chat_message(
         db: Session,
@@ -235,16 +440,16 @@ class SwapService:
         from_user_id: str
     ) -> Optional[ChatMessage]:
         """Create a chat message for a swap"""
-        # Verify user is part of this swap
-        swap = db.query(SwapRequest).filter(SwapRequest.id == swap_id).first()
-        if not swap or (swap.from_user_id != from_user_id and swap.to_user_id != from_user_id):
+        if not SwapService.get_participant_swap(db, swap_id, from_user_id):
             return None
         
         chat_message = ChatMessage(
             id=str(uuid.uuid4()),
             swap_request_id=swap_id,
             from_user_id=from_user_id,
-            message=message_data.message
+            message=message_data.message,
+            # The app clock, as for WebSocket messages, so both order consistently
+            created_at=datetime.now(timezone.utc)
         )
         
         db.add(chat_message)
@@ -253,35 +458,144 @@ class SwapService:
         return chat_message
 
     @staticmethod
-    def get_chat_messages(db: Session, swap_id: str, user_id: str) -> List[ChatMessage]:
-        """Get chat messages for a swap"""
-        # Verify user is part of this swap
-        swap = db.query(SwapRequest).filter(SwapRequest.id == swap_id).first()
-        if not swap or (swap.from_user_id != user_id and swap.to_user_id != user_id):
-            return []
+    def get_chat_messages(
+        db: Session,
+        swap_id: str,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        since: Optional[str] = None,
+        before: Optional[str] = None
+    ) -> Tuple[List, Optional[str]]:
+        """Get a page of chat messages for a swap, oldest first.
+
+        Rows carry the sender's name, resolved in the same statement. With
+        `since` (a message ID) only newer messages are returned, so a polling
+        client downloads just what's new; with `before` the latest messages
+        preceding that one are returned, for scrolling back through history.
+        """
+        # Only participants of the swap see its messages
+        is_participant = select(SwapRequest.id).where(
+            SwapRequest.id == swap_id,
+            (SwapRequest.from_user_id == user_id) | (SwapRequest.to_user_id == user_id)
+        ).exists()
         
-        return db.query(ChatMessage).filter(
-            ChatMessage.swap_request_id == swap_id
-        ).order_by(ChatMessage.created_at.asc()).all()
+        query = db.query(
+            ChatMessage.id,
+            ChatMessage.swap_request_id,
+            ChatMessage.from_user_id,
+            func.coalesce(User.name, "Unknown").label("from_user_name"),
+            ChatMessage.message,
+            ChatMessage.created_at
+        ).outerjoin(
+            User, User.id == ChatMessage.from_user_id
+        ).filter(
+            ChatMessage.swap_request_id == swap_id,
+            is_participant
+        )
+        
+        position = tuple_(ChatMessage.created_at, ChatMessage.id)
+        anchor_id = since or before
+        if anchor_id:
+            # A WebSocket message this process hasn't written yet is still a valid anchor
+            pending_created_at = chat_write_buffer.pending_created_at(swap_id, anchor_id)
+            if pending_created_at is not None:
+                anchor_created_at = literal(pending_created_at, ChatMessage.created_at.type)
+            else:
+                anchor_message = aliased(ChatMessage)
+                anchor_created_at = select(anchor_message.created_at).where(
+                    anchor_message.id == anchor_id,
+                    anchor_message.swap_request_id == swap_id
+                ).scalar_subquery()
+            anchor = tuple_(anchor_created_at, anchor_id)
+            
+            if since:
+                rows = query.filter(position > anchor).order_by(
+                    ChatMessage.created_at.asc(), ChatMessage.id.asc()
+                ).limit(limit).all()
+            else:
+                rows = query.filter(position < anchor).order_by(
+                    ChatMessage.created_at.desc(), ChatMessage.id.desc()
+                ).limit(limit).all()
+                rows.reverse()
+            return rows, None
+        
+        return paginate(
+            query, ChatMessage.created_at, ChatMessage.id, cursor, limit, descending=False
+        )
+
+    @staticmethod
+    def load_chat_events(message_ids: List[str]) -> Dict[str, dict]:
+        """Chat room events by message ID, for messages published by other workers"""
+        from db.database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                ChatMessage.id,
+                ChatMessage.swap_request_id,
+                ChatMessage.from_user_id,
+                func.coalesce(User.name, "Unknown").label("from_user_name"),
+                ChatMessage.message,
+                ChatMessage.created_at
+            ).outerjoin(
+                User, User.id == ChatMessage.from_user_id
+            ).filter(
+                ChatMessage.id == any_(literal(list(message_ids), ARRAY(String)))
+            ).all()
+            return {
+                row.id: {**row._asdict(), "created_at": row.created_at.isoformat()}
+                for row in rows
+            }
+        finally:
+            db.close()
+
+    @staticmethod
+    async def get_chat_messages_async(
+        db: AsyncSession,
+        swap_id: str,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        since: Optional[str] = None,
+        before: Optional[str] = None
+    ) -> Tuple[List, Optional[str]]:
+        """Async variant of get_chat_messages"""
+        return await db.run_sync(
+            SwapService.get_chat_messages, swap_id, user_id, cursor, limit, since, before
+        )
 
     @staticmethod
     def delete_swap_by_user(db: Session, swap_id: str, user_id: str) -> bool:
         """Delete a swap request (only by owner or if user is part of the swap)"""
+        # Lock the row so a concurrent transition can't change the status
+        # the counters are adjusted by, or land after the delete
         swap = db.query(SwapRequest).filter(
             SwapRequest.id == swap_id,
             (SwapRequest.from_user_id == user_id) | (SwapRequest.to_user_id == user_id)
-        ).first()
+        ).with_for_update().first()
         
         if swap:
             # Delete related records first (feedback and chat messages)
+            removed = db.query(
+                Feedback.to_user_id, Feedback.rating, func.count(Feedback.id)
+            ).filter(
+                Feedback.swap_request_id == swap_id
+            ).group_by(Feedback.to_user_id, Feedback.rating).all()
+            stats = {swap_status_counter(swap.status): -1, "rating_count": 0, "rating_sum": 0}
+            for to_user_id, rating, count in removed:
+                SwapService._apply_rating_delta(db, to_user_id, rating, -count)
+                stats["rating_count"] -= count
+                stats["rating_sum"] -= rating * count
             db.query(Feedback).filter(Feedback.swap_request_id == swap_id).delete()
             db.query(ChatMessage).filter(ChatMessage.swap_request_id == swap_id).delete()
             
             # Now delete the swap request
             db.delete(swap)
+            StatsService.adjust(db, stats)
             db.commit()
             return True
         
         return False
 
-
+event_broker.register_loader(chat_channel(""), SwapService.load_chat_events)
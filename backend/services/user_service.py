@@ -1,8 +1,17 @@
 
+from sqlalchemy import update, any_, literal, and_, or_, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models.user import User
+from models.user import User, normalize_skills
+from models.swap import UserRatingSummary, SwapRequest, SwapStatus, Notification
 from schemas.user import UserCreate, UserUpdate
-from typing import List, Optional
+from services.skill_index import skill_index, normalize_skill
+from services.identity_cache import identity_cache
+from services.stats_service import StatsService, swap_status_counter
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE
+from typing import Dict, List, Optional, Tuple
+import time
 import uuid
 
 class UserService:
@@ -14,8 +23,11 @@ class UserService:
             **user_data.dict()
         )
         db.add(db_user)
+        StatsService.adjust(db, {"users": 1})
         db.commit()
         db.refresh(db_user)
+        skill_index.upsert_user(db_user)
+        skill_index.announce([db_user.id])
         return db_user
 
     @staticmethod
@@ -39,6 +51,9 @@ class UserService:
         
         db.commit()
         db.refresh(user)
+        skill_index.upsert_user(user)
+        skill_index.announce([user.id])
+        identity_cache.invalidate(user_id)
         print(f"After update - skills_offered: {user.skills_offered}, skills_wanted: {user.skills_wanted}")
         return user
 
@@ -67,54 +82,318 @@ class UserService:
         return query.all()
 
     @staticmethod
-    def get_all_public_users_with_ratings(db: Session, exclude_user_id: Optional[str] = None) -> List[dict]:
-        """Get all public, active, non-banned users with their rating information"""
-        from services.swap_service import SwapService
+    def _public_user_dict(user: User, summary: Optional[UserRatingSummary]) -> dict:
+        """Serialize a user for the public directory, including rating information"""
+        return {
+            "id": user.id,
+            "name": user.name,
+            "email": user.email,
+            "phone_number": user.phone_number,
+            "location": user.location,
+            "profile_picture": user.profile_picture,
+            "skills_offered": user.skills_offered,
+            "skills_wanted": user.skills_wanted,
+            "availability": user.availability,
+            "is_public": user.is_public,
+            "is_active": user.is_active,
+            "is_banned": user.is_banned,
+            "created_at": user.created_at.isoformat() if user.created_at else None,
+            "average_rating": summary.average_rating if summary else 0.0,
+            "total_ratings": summary.rating_count if summary else 0
+        }
+
+    @staticmethod
+    def _public_users_with_ratings_query(db: Session):
+        """Public, active, non-banned users joined with their rating summaries"""
+        return db.query(User, UserRatingSummary).outerjoin(
+            UserRatingSummary, UserRatingSummary.user_id == User.id
+        ).filter(
+            User.is_public == True,
+            User.is_active == True,
+            User.is_banned == False
+        )
+
+    @staticmethod
+    def get_all_public_users_with_ratings(
+        db: Session,
+        exclude_user_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Get a page of public, active, non-banned users with their rating information"""
+        query = UserService._public_users_with_ratings_query(db)
         
-        users = UserService.get_all_public_users(db, exclude_user_id)
-        result = []
+        if exclude_user_id:
+            query = query.filter(User.id != exclude_user_id)
         
-        for user in users:
-            # Get user's rating information
-            rating_info = SwapService.get_user_ratings(db, user.id)
-            
-            # Convert user to dict and add rating info
-            user_dict = {
-                "id": user.id,
-                "name": user.name,
-                "email": user.email,
-                "phone_number": user.phone_number,
-                "location": user.location,
-                "profile_picture": user.profile_picture,
-                "skills_offered": user.skills_offered,
-                "skills_wanted": user.skills_wanted,
-                "availability": user.availability,
-                "is_public": user.is_public,
-                "is_active": user.is_active,
-                "is_banned": user.is_banned,
-                "created_at": user.created_at.isoformat() if user.created_at else None,
-                "average_rating": rating_info["average_rating"],
-                "total_ratings": rating_info["total_ratings"]
-            }
+        rows, next_cursor = paginate(
+            query, User.created_at, User.id, cursor, limit,
+            key=lambda row: (row[0].created_at, row[0].id)
+        )
+        return [UserService._public_user_dict(user, summary) for user, summary in rows], next_cursor
+
+    @staticmethod
+    def _skill_filter(skills: List[str], match_all: bool, skill_type: Optional[str]):
+        """SQL criterion matching users by normalized skill, served by the GIN indexes"""
+        names = normalize_skills(skills)
+        if not names:
+            return None
+        columns = [User.skills_offered_normalized, User.skills_wanted_normalized]
+        if skill_type:
+            columns = [getattr(User, f"skills_{skill_type}_normalized")]
+        
+        if match_all:
+            # Every skill must appear on one of the lists
+            return and_(*(or_(*(column.contains([name]) for column in columns)) for name in names))
+        return or_(*(column.overlap(names) for column in columns))
+
+    @staticmethod
+    def search_public_users_with_ratings(
+        db: Session,
+        skills: List[str],
+        match_all: bool = False,
+        skill_type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Search public users by skill, with rating information.
+
+        Skills are matched case-insensitively against the normalized skill
+        columns; `skill_type` restricts matching to offered or wanted skills.
+        """
+        criterion = UserService._skill_filter(skills, match_all, skill_type)
+        if criterion is None:
+            return [], None
+        
+        query = UserService._public_users_with_ratings_query(db).filter(criterion)
+        rows, next_cursor = paginate(
+            query, User.created_at, User.id, cursor, limit,
+            key=lambda row: (row[0].created_at, row[0].id)
+        )
+        return [UserService._public_user_dict(user, summary) for user, summary in rows], next_cursor
+
+    @staticmethod
+    async def get_all_public_users_with_ratings_async(
+        db: AsyncSession,
+        exclude_user_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Async variant of get_all_public_users_with_ratings"""
+        return await db.run_sync(
+            UserService.get_all_public_users_with_ratings, exclude_user_id, cursor, limit
+        )
+
+    @staticmethod
+    async def search_public_users_with_ratings_async(
+        db: AsyncSession,
+        skills: List[str],
+        match_all: bool = False,
+        skill_type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Async variant of search_public_users_with_ratings"""
+        return await db.run_sync(
+            UserService.search_public_users_with_ratings, skills, match_all, skill_type, cursor, limit
+        )
+
+    @staticmethod
+    def get_matches(db: Session, user: User, limit: int = 10) -> List[dict]:
+        """Get the users who offer what this user wants and want what they offer.
+
+        Candidates come from the skill index and are re-checked against the
+        users' current rows, so entries the index hasn't caught up with yet
+        are dropped rather than returned.
+        """
+        skill_index.ensure_loaded(db)
+        # Ask for spare candidates in case some fail the re-check
+        matches = skill_index.match(
+            user.skills_offered or [], user.skills_wanted or [],
+            exclude_user_id=user.id, limit=limit * 2
+        )
+        if not matches:
+            return []
+        
+        rows = UserService._public_users_with_ratings_query(db).filter(
+            User.id.in_([user_id for user_id, _, _ in matches])
+        ).all()
+        by_id = {match_user.id: (match_user, summary) for match_user, summary in rows}
+        
+        offered = set(normalize_skills(user.skills_offered))
+        wanted = set(normalize_skills(user.skills_wanted))
+        
+        result = []
+        for user_id, _, _ in matches:
+            if user_id not in by_id:
+                continue
+            match_user, summary = by_id[user_id]
+            skills_they_offer = [
+                s for s in match_user.skills_offered or [] if normalize_skill(s) in wanted
+            ]
+            skills_they_want = [
+                s for s in match_user.skills_wanted or [] if normalize_skill(s) in offered
+            ]
+            if not skills_they_offer or not skills_they_want:
+                continue
+            user_dict = UserService._public_user_dict(match_user, summary)
+            user_dict["skills_they_offer"] = skills_they_offer
+            user_dict["skills_they_want"] = skills_they_want
+            user_dict["match_score"] = len(normalize_skills(skills_they_offer)) + len(normalize_skills(skills_they_want))
             result.append(user_dict)
         
-        return result
+        # Already in the index's order, ties broken deterministically
+        return result[:limit]
+
+    @staticmethod
+    def get_all_users(
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[User], Optional[str]]:
+        """Get a page of all users (admin only)"""
+        return paginate(db.query(User), User.created_at, User.id, cursor, limit)
 
     @staticmethod
-    def get_all_users(db: Session) -> List[User]:
-        """Get all users (admin only)"""
-        return db.query(User).all()
+    def admin_users_query(db: Session):
+        """User rows for the admin export, in signup order"""
+        return db.query(
+            User.id,
+            User.name,
+            User.email,
+            User.location,
+            User.skills_offered,
+            User.skills_wanted,
+            User.availability,
+            User.phone_number,
+            User.is_public,
+            User.is_active,
+            User.is_banned,
+            User.created_at
+        ).order_by(User.created_at, User.id)
 
     @staticmethod
     def ban_user(db: Session, user_id: str) -> Optional[User]:
         """Ban a user (admin only)"""
         user = db.query(User).filter(User.id == user_id).first()
         if user:
+            if not user.is_banned:
+                StatsService.adjust(db, {"banned_users": 1})
             user.is_banned = True
             db.commit()
             db.refresh(user)
+            skill_index.remove_user(user.id)
+            skill_index.announce([user.id])
+            identity_cache.invalidate(user.id)
         return user
 
+    @staticmethod
+    def bulk_ban_users(db: Session, user_ids: List[str]) -> dict:
+        """Ban many users in one transaction, with set-based cascades.
+
+        Pending swaps involving the users are rejected, their counterparties'
+        unread requests for those swaps are marked read, and each counterparty
+        gets one notification, all inserted together. After commit the users
+        are dropped from the skill index and identity cache. Returns per-step
+        counts and timings in milliseconds.
+        """
+        from services.notification_service import NotificationService
+        from services.analytics_service import AnalyticsService
+        
+        user_ids = list(dict.fromkeys(user_ids))
+        ids = literal(user_ids, ARRAY(String))
+        steps: Dict[str, dict] = {}
+        
+        def step(name: str, started: float, count: int) -> None:
+            steps[name] = {"count": count, "ms": round((time.perf_counter() - started) * 1000, 2)}
+        
+        started = time.perf_counter()
+        banned = db.scalars(
+            update(User)
+            .where(User.id == any_(ids), User.is_banned == False)
+            .values(is_banned=True)
+            .returning(User.id)
+        ).all()
+        StatsService.adjust(db, {"banned_users": len(banned)})
+        step("ban_users", started, len(banned))
+        
+        started = time.perf_counter()
+        rejected = db.execute(
+            update(SwapRequest)
+            .where(
+                SwapRequest.status == SwapStatus.PENDING,
+                or_(SwapRequest.from_user_id == any_(ids), SwapRequest.to_user_id == any_(ids))
+            )
+            .values(status=SwapStatus.REJECTED)
+            .returning(
+                SwapRequest.id, SwapRequest.from_user_id, SwapRequest.to_user_id,
+                SwapRequest.from_user_name, SwapRequest.to_user_name,
+                SwapRequest.skill_offered, SwapRequest.skill_wanted
+            ),
+            execution_options={"synchronize_session": False}
+        ).all()
+        StatsService.adjust(db, {
+            swap_status_counter(SwapStatus.PENDING): -len(rejected),
+            swap_status_counter(SwapStatus.REJECTED): len(rejected)
+        })
+        AnalyticsService.record_swap_events(db, rejected, SwapStatus.REJECTED.value)
+        step("reject_pending_swaps", started, len(rejected))
+        
+        started = time.perf_counter()
+        # Swap requests from banned users can no longer be answered
+        cleared = db.scalars(
+            update(Notification)
+            .where(
+                Notification.type == "swap_request",
+                Notification.is_read == False,
+                Notification.related_id == any_(literal([swap.id for swap in rejected], ARRAY(String)))
+            )
+            .values(is_read=True)
+            .returning(Notification.user_id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        unread: Dict[str, int] = {}
+        for user_id in cleared:
+            unread[user_id] = unread.get(user_id, 0) - 1
+        NotificationService._adjust_unread_counts(db, unread)
+        step("clear_stale_notifications", started, len(cleared))
+        
+        started = time.perf_counter()
+        banned_set = set(user_ids)
+        notifications = []
+        for swap in rejected:
+            for counterparty_id, other_name in (
+                (swap.from_user_id, swap.to_user_name),
+                (swap.to_user_id, swap.from_user_name),
+            ):
+                if counterparty_id in banned_set:
+                    continue
+                notifications.append({
+                    "user_id": counterparty_id,
+                    "type": "swap_rejected",
+                    "title": "Swap Request Rejected",
+                    "message": f"Your swap with {other_name} was cancelled because their account is no longer active",
+                    "related_id": swap.id
+                })
+        payloads = NotificationService.add_notifications(db, notifications) if notifications else []
+        step("notify_counterparties", started, len(payloads))
+        
+        db.commit()
+        NotificationService.publish_notifications(payloads)
+        
+        started = time.perf_counter()
+        for user_id in user_ids:
+            skill_index.remove_user(user_id)
+            identity_cache.invalidate(user_id)
+        skill_index.announce(banned)
+        step("evict_caches", started, len(user_ids))
+        
+        return {
+            "requested": len(user_ids),
+            "banned": len(banned),
+            "steps": steps
+        }
+
     @staticmethod
     def sync_user_from_clerk(db: Session, clerk_user_data: dict, clerk_id: str) -> User:
         """Create or update user from Clerk data"""
@@ -158,6 +437,7 @@ class UserService:
             existing_user.phone_number = phone_number
             db.commit()
             db.refresh(existing_user)
+            identity_cache.invalidate(clerk_id)
             return existing_user
         else:
             # Create new user
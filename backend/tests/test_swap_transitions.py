@@ -0,0 +1,141 @@
+"""Swap status transitions under concurrency, against a real Postgres.
+
+Needs TEST_DATABASE_URL; each run works in a throwaway schema that is
+dropped afterwards.
+"""
+import os
+import threading
+import uuid
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import models.analytics, models.outbox, models.stats  # noqa: F401 - register tables
+from db.database import Base
+from models.swap import SwapRequest, SwapStatus
+from models.user import User
+from schemas.swap import SwapRequestCreate
+from services.stats_service import StatsService, swap_status_counter
+from services.swap_service import SwapService
+
+SCHEMA = f"test_swaps_{uuid.uuid4().hex[:8]}"
+THREADS = 8
+ROUNDS = 25
+
+@pytest.fixture(scope="module")
+def Session():
+    engine = create_engine(
+        TEST_DATABASE_URL,
+        pool_size=THREADS + 2,
+        connect_args={"options": f"-csearch_path={SCHEMA}"}
+    )
+    with engine.begin() as connection:
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine)
+    try:
+        yield sessionmaker(bind=engine)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        engine.dispose()
+
+def create_swap(Session):
+    sender, recipient = str(uuid.uuid4()), str(uuid.uuid4())
+    with Session() as db:
+        db.add_all([
+            User(id=sender, name="Sender", email=f"{sender}@example.com"),
+            User(id=recipient, name="Recipient", email=f"{recipient}@example.com"),
+        ])
+        db.commit()
+        swap = SwapService.create_swap_request(db, SwapRequestCreate(
+            to_user_id=recipient, skill_offered="Python", skill_wanted="Guitar"
+        ), sender)
+    return swap.id, sender, recipient
+
+def race(Session, calls):
+    """Run each call with its own session, all released at once; returns their results"""
+    barrier = threading.Barrier(len(calls))
+    results = [None] * len(calls)
+    errors = []
+
+    def run(i, call):
+        with Session() as db:
+            barrier.wait()
+            try:
+                results[i] = call(db)
+            except Exception as exc:
+                errors.append(exc)
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    return results
+
+def test_accept_reject_and_delete_race_has_one_outcome(Session):
+    """The recipient accepts and rejects while the sender deletes (DELETE /swaps/{id}).
+
+    At most one of accept and reject takes effect, the delete always does,
+    and the status counters match the table afterwards.
+    """
+    for _ in range(ROUNDS):
+        swap_id, sender, recipient = create_swap(Session)
+        accepted, rejected, deleted = race(Session, [
+            lambda db: SwapService.accept_swap(db, swap_id, recipient),
+            lambda db: SwapService.reject_swap(db, swap_id, recipient),
+            lambda db: SwapService.delete_swap_by_user(db, swap_id, sender),
+        ])
+        transitioned = [
+            accepted is not None and accepted.status == SwapStatus.ACCEPTED,
+            rejected is not None and rejected.status == SwapStatus.REJECTED,
+        ]
+        assert sum(transitioned) <= 1, (accepted, rejected)
+        assert deleted
+        with Session() as db:
+            assert db.get(SwapRequest, swap_id) is None
+
+    with Session() as db:
+        counters = StatsService.get_counters(db)
+        for status in SwapStatus:
+            actual = db.query(SwapRequest).filter(SwapRequest.status == status).count()
+            assert counters.get(swap_status_counter(status), 0) == actual, status
+
+def test_repeated_close_by_one_participant_counts_once(Session):
+    swap_id, sender, recipient = create_swap(Session)
+    with Session() as db:
+        SwapService.accept_swap(db, swap_id, recipient)
+
+    results = race(Session, [lambda db: SwapService.close_swap(db, swap_id, sender)] * THREADS)
+    assert all(swap is not None and swap.status == SwapStatus.ACCEPTED for swap in results)
+    with Session() as db:
+        swap = db.get(SwapRequest, swap_id)
+        assert swap.status == SwapStatus.ACCEPTED
+        assert swap.closed_by == [sender]
+        assert swap.closed_count == 1
+
+    with Session() as db:
+        assert SwapService.close_swap(db, swap_id, recipient).status == SwapStatus.CLOSED
+
+def test_both_participants_closing_at_once_closes_the_swap(Session):
+    for _ in range(ROUNDS):
+        swap_id, sender, recipient = create_swap(Session)
+        with Session() as db:
+            SwapService.accept_swap(db, swap_id, recipient)
+
+        race(Session, [
+            lambda db, user_id=user_id: SwapService.close_swap(db, swap_id, user_id)
+            for user_id in [sender, recipient] * (THREADS // 2)
+        ])
+        with Session() as db:
+            swap = db.get(SwapRequest, swap_id)
+            assert swap.status == SwapStatus.CLOSED
+            assert sorted(swap.closed_by) == sorted([sender, recipient])
+            assert swap.closed_count == 2
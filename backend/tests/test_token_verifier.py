@@ -0,0 +1,150 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt, JWTError
+
+from utils.token_verifier import JWKSCache, KeysUnavailable, TokenVerifier, VerifiedTokenCache
+
+ISSUER = "https://clerk.example.test"
+AUDIENCE = "skillswap"
+
+class SigningKey:
+    def __init__(self, kid: str):
+        self.kid = kid
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ).decode()
+        self.public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        self.jwk = {**jwk.construct(self.public_pem, "RS256").to_dict(), "kid": kid, "use": "sig"}
+
+    def sign(self, **claims) -> str:
+        return jwt.encode(claims_with_defaults(claims), self.private_pem, algorithm="RS256", headers={"kid": self.kid})
+
+class JWKSEndpoint:
+    """Local stand-in for the JWKS endpoint, counting fetches"""
+
+    def __init__(self, *keys: SigningKey):
+        self.keys = list(keys)
+        self.fetches = 0
+        self.fail = False
+        self.delay = 0.0
+
+    def __call__(self) -> dict:
+        self.fetches += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("JWKS endpoint unreachable")
+        return {"keys": [key.jwk for key in self.keys]}
+
+def claims_with_defaults(claims: dict) -> dict:
+    now = int(time.time())
+    return {"sub": "user_1", "iss": ISSUER, "aud": AUDIENCE, "iat": now, "exp": now + 300, **claims}
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def unsigned_token(header: dict, claims: dict, sign=lambda signing_input: b"") -> str:
+    signing_input = f"{b64(json.dumps(header).encode())}.{b64(json.dumps(claims).encode())}"
+    return f"{signing_input}.{b64(sign(signing_input.encode()))}"
+
+@pytest.fixture
+def key():
+    return SigningKey("key-1")
+
+@pytest.fixture
+def endpoint(key):
+    return JWKSEndpoint(key)
+
+@pytest.fixture
+def verifier(endpoint):
+    return TokenVerifier(
+        jwks=JWKSCache(endpoint, ttl=3600, min_refresh_interval=30),
+        token_cache=VerifiedTokenCache(),
+        issuer=ISSUER,
+        audience=AUDIENCE
+    )
+
+def test_accepts_rs256_token(verifier, key):
+    assert verifier.verify(key.sign())["sub"] == "user_1"
+
+def test_rejects_hs256_signed_with_public_key(verifier, key):
+    token = unsigned_token(
+        {"alg": "HS256", "typ": "JWT", "kid": key.kid},
+        claims_with_defaults({}),
+        sign=lambda signing_input: hmac.new(key.public_pem.encode(), signing_input, hashlib.sha256).digest()
+    )
+    with pytest.raises(JWTError):
+        verifier.verify(token)
+
+def test_rejects_alg_none(verifier, key):
+    token = unsigned_token({"alg": "none", "typ": "JWT", "kid": key.kid}, claims_with_defaults({}))
+    with pytest.raises(JWTError):
+        verifier.verify(token)
+
+def test_rejects_token_signed_by_unknown_key(verifier):
+    with pytest.raises(JWTError):
+        verifier.verify(SigningKey("key-1").sign())
+
+@pytest.mark.parametrize("claims", [
+    {"exp": int(time.time()) - 60},
+    {"aud": "another-app"},
+    {"iss": "https://evil.example.test"},
+])
+def test_rejects_invalid_claims(verifier, key, claims):
+    with pytest.raises(JWTError):
+        verifier.verify(key.sign(**claims))
+
+def test_picks_up_rotated_key(verifier, endpoint, key):
+    verifier.verify(key.sign())
+    rotated = SigningKey("key-2")
+    endpoint.keys = [rotated]
+    verifier.jwks._attempted_at -= 30
+
+    assert verifier.verify(rotated.sign(sub="user_2"))["sub"] == "user_2"
+    assert endpoint.fetches == 2
+
+def test_unknown_kid_refreshes_at_most_once_per_interval(verifier, endpoint, key):
+    verifier.verify(key.sign())
+    stranger = SigningKey("key-unknown")
+    for _ in range(5):
+        with pytest.raises(JWTError):
+            verifier.verify(stranger.sign())
+    assert endpoint.fetches == 1
+
+def test_failed_fetch_is_throttled(verifier, endpoint, key):
+    endpoint.fail = True
+    for _ in range(5):
+        with pytest.raises(KeysUnavailable):
+            verifier.verify(key.sign())
+    assert endpoint.fetches == 1
+
+    endpoint.fail = False
+    verifier.jwks._attempted_at -= 30
+    assert verifier.verify(key.sign())["sub"] == "user_1"
+
+def test_concurrent_refreshes_share_one_fetch(verifier, endpoint, key):
+    endpoint.delay = 0.2
+    tokens = [key.sign(sub=f"user_{i}") for i in range(8)]
+    results = []
+    threads = [threading.Thread(target=lambda t=t: results.append(verifier.verify(t))) for t in tokens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == len(tokens)
+    assert endpoint.fetches == 1
@@ -1,5 +1,5 @@
 
-from jose import jwt, JWTError
+from jose import JWTError
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -9,40 +9,58 @@ from config import get_settings
 from db.database import get_db
 from models.user import User
 from services.user_service import UserService
+from services.identity_cache import identity_cache
+from utils.token_verifier import JWKSCache, KeysUnavailable, VerifiedTokenCache, TokenVerifier
 
 settings = get_settings()
 security = HTTPBearer()
 
 def get_clerk_public_key():
-    """Fetch Clerk's public key for JWT verification"""
-    try:
-        response = requests.get(f"https://api.clerk.dev/v1/jwks")
-        return response.json()
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Unable to fetch Clerk public key"
-        )
+    """Fetch Clerk's JWKS (public keys) for JWT verification; failures are handled by JWKSCache"""
+    headers = {}
+    if settings.clerk_secret_key:
+        headers["Authorization"] = f"Bearer {settings.clerk_secret_key}"
+    response = requests.get(settings.clerk_jwks_url, headers=headers, timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+token_verifier = TokenVerifier(
+    jwks=JWKSCache(
+        get_clerk_public_key,
+        ttl=settings.clerk_jwks_ttl_seconds,
+        min_refresh_interval=settings.clerk_jwks_min_refresh_seconds
+    ),
+    token_cache=VerifiedTokenCache(max_size=settings.token_cache_size),
+    verify_signature=settings.clerk_verify_tokens,
+    issuer=settings.clerk_issuer or None,
+    audience=settings.clerk_audience or None
+)
 
 def verify_clerk_token(token: str) -> dict:
     """Verify Clerk JWT token and return user data"""
     try:
-        # For development, we'll decode without verification
-        # In production, you should verify with Clerk's public key
-        decoded = jwt.decode(token, key="", options={"verify_signature": False})
-        return decoded
+        return token_verifier.verify(token)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication token"
         )
+    except KeysUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable to fetch Clerk public key"
+        )
 
-def get_current_user_id(
+def get_token_claims(
     credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    """Verify the bearer token once per request and return its claims"""
+    return verify_clerk_token(credentials.credentials)
+
+def get_current_user_id(
+    user_data: dict = Depends(get_token_claims)
 ) -> str:
     """Extract current user ID from Clerk JWT token"""
-    token = credentials.credentials
-    user_data = verify_clerk_token(token)
     user_id = user_data.get("sub")
     
     if not user_id:
@@ -54,11 +72,9 @@ def get_current_user_id(
     return user_id
 
 def get_current_user_data(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user_data: dict = Depends(get_token_claims)
 ) -> dict:
     """Extract current user data from Clerk JWT token"""
-    token = credentials.credentials
-    user_data = verify_clerk_token(token)
     return user_data
 
 def get_current_user(
@@ -66,7 +82,11 @@ def get_current_user(
     db: Session = Depends(get_db)
 ) -> User:
     """Get current user from database, create if doesn't exist"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = identity_cache.get(db, user_id)
+    if user is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user:
+            identity_cache.put(user)
     
     if not user:
         # Create user if they don't exist
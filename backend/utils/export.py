@@ -0,0 +1,82 @@
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List
+import csv
+import enum
+import io
+import json
+
+EXPORT_BATCH_SIZE = 1000
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(item) for item in value)
+    return _export_value(value)
+
+def ndjson_chunks(rows: Iterable[Any], fields: List[str], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Serialize rows as newline-delimited JSON, one chunk per `batch_size` rows"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({field: _export_value(getattr(row, field)) for field in fields}))
+        if len(lines) >= batch_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def csv_chunks(rows: Iterable[Any], fields: List[str], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Serialize rows as CSV with a header line, one chunk per `batch_size` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(getattr(row, field)) for field in fields])
+        count += 1
+        if count >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def stream_export(
+    build_query: Callable[[Session], Query],
+    export_format: str,
+    filename: str
+) -> StreamingResponse:
+    """Stream the rows of a query as an NDJSON or CSV download.
+
+    The query runs on its own session, on a read replica when one is
+    available, with `yield_per`, which fetches rows through a server-side
+    cursor in batches, so memory use does not grow with the size of the
+    table. Fields are named after the query's columns.
+    """
+    from db.database import SessionLocal, replicas
+
+    serialize = csv_chunks if export_format == "csv" else ndjson_chunks
+
+    def body():
+        replica = replicas.choose()
+        db = SessionLocal(bind=replica.engine) if replica else SessionLocal()
+        try:
+            query = build_query(db)
+            fields = [column["name"] for column in query.column_descriptions]
+            yield from serialize(query.yield_per(EXPORT_BATCH_SIZE), fields)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/csv" if export_format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
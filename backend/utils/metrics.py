@@ -0,0 +1,281 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import bisect
+import math
+import threading
+
+LabelValues = Tuple[str, ...]
+
+class _ThreadSharded:
+    """Per-thread storage for a metric's values.
+
+    Each thread updates its own dict without taking a lock; `_merged_shards`
+    combines all threads' values when the metric is collected.
+    """
+
+    def __init__(self, labelnames: Tuple[str, ...]):
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _key(self, labels: dict) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._shards_lock:
+                self._shards.append(values)
+            return values
+
+    def _merged_shards(self) -> List[dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # dict.copy() is atomic under the GIL, so a shard being written is read consistently
+        return [shard.copy() for shard in shards]
+
+class Counter(_ThreadSharded):
+    """Monotonic count per label set"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(labelnames)
+        self.name = name
+        self.documentation = documentation
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def collect(self) -> Dict[LabelValues, float]:
+        totals: Dict[LabelValues, float] = {}
+        for shard in self._merged_shards():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+class Histogram(_ThreadSharded):
+    """Observation counts per bucket (upper bound), plus sum and count, per label set"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    ):
+        super().__init__(labelnames)
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+
+    def _bucket_index(self, value: float) -> int:
+        return bisect.bisect_left(self.buckets, value)
+
+    def _bucket_count(self) -> int:
+        return len(self.buckets) + 1
+
+    def observe(self, value: float, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        entry = shard.get(key)
+        if entry is None:
+            # [per-bucket counts, the last one above every bound; sum]
+            entry = shard[key] = [[0] * self._bucket_count(), 0.0]
+        entry[0][self._bucket_index(value)] += 1
+        entry[1] += value
+
+    def collect(self) -> Dict[LabelValues, Tuple[List[int], float]]:
+        """Per label set: non-cumulative bucket counts and the sum of observations"""
+        totals: Dict[LabelValues, list] = {}
+        for shard in self._merged_shards():
+            for key, (counts, total) in shard.items():
+                merged = totals.setdefault(key, [[0] * self._bucket_count(), 0.0])
+                for index, count in enumerate(list(counts)):
+                    merged[0][index] += count
+                merged[1] += total
+        return {key: (counts, total) for key, (counts, total) in totals.items()}
+
+    def export_buckets(self) -> List[Tuple[float, int]]:
+        """(upper bound, index of the last bucket at or below it) for exposition"""
+        return [(bound, index) for index, bound in enumerate(self.buckets)]
+
+class LatencyHistogram(Histogram):
+    """HDR-style histogram with log-linear buckets.
+
+    Bucket edges are `lowest * 2 ** (i / sub_buckets)`, so every value is
+    recorded with a relative error under 2 ** (1 / sub_buckets) - 1 (about
+    9% with 8 sub-buckets) from `lowest` up to `lowest * 2 ** doublings`.
+    Bucket lookup is a logarithm rather than a search. Prometheus output
+    uses the power-of-two edges; quantiles use every bucket.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        lowest: float = 0.0001,
+        doublings: int = 20,
+        sub_buckets: int = 8
+    ):
+        self.lowest = lowest
+        self.sub_buckets = sub_buckets
+        edges = tuple(lowest * 2 ** (i / sub_buckets) for i in range(doublings * sub_buckets + 1))
+        super().__init__(name, documentation, labelnames, buckets=edges)
+
+    def _bucket_index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        index = math.ceil(math.log2(value / self.lowest) * self.sub_buckets - 1e-9)
+        return min(index, len(self.buckets))
+
+    def export_buckets(self) -> List[Tuple[float, int]]:
+        return [
+            (bound, index) for index, bound in enumerate(self.buckets)
+            if index % self.sub_buckets == 0
+        ]
+
+    def quantile(self, counts: List[int], q: float) -> Optional[float]:
+        """Upper edge of the bucket holding the q-quantile of `counts`"""
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else math.inf
+        return math.inf
+
+class Gauge:
+    """Value read from a callback at collection time, per label set"""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def collect(self) -> Dict[LabelValues, float]:
+        return self.callback()
+
+class MetricsRegistry:
+    """In-process registry of named metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        **kwargs
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, **kwargs))
+
+    def latency_histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        **kwargs
+    ) -> LatencyHistogram:
+        return self._register(LatencyHistogram(name, documentation, labelnames, **kwargs))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Tuple[str, ...] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, callback, labelnames))
+
+    def metrics(self) -> list:
+        with self._lock:
+            return list(self._metrics.values())
+
+registry = MetricsRegistry()
+
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+def render_prometheus(metrics_registry: MetricsRegistry = registry) -> str:
+    """Render every metric in the Prometheus text exposition format (0.0.4)"""
+    lines: List[str] = []
+    for metric in metrics_registry.metrics():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        if not isinstance(metric, Histogram):
+            for key, value in sorted(metric.collect().items()):
+                lines.append(f"{metric.name}{_labels(metric.labelnames, key)} {_number(value)}")
+            continue
+        
+        collected = metric.collect()
+        for key, (counts, total) in sorted(collected.items()):
+            cumulative, consumed = 0, 0
+            for bound, index in metric.export_buckets():
+                cumulative += sum(counts[consumed:index + 1])
+                consumed = index + 1
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{metric.name}_bucket{_labels(metric.labelnames, key, le)} {cumulative}")
+            count = sum(counts)
+            le = 'le="+Inf"'
+            lines.append(f"{metric.name}_bucket{_labels(metric.labelnames, key, le)} {count}")
+            lines.append(f"{metric.name}_sum{_labels(metric.labelnames, key)} {_number(total)}")
+            lines.append(f"{metric.name}_count{_labels(metric.labelnames, key)} {count}")
+        
+        if isinstance(metric, LatencyHistogram) and collected:
+            name = f"{metric.name}_quantile"
+            lines.append(f"# HELP {name} {metric.documentation}, quantiles from the HDR buckets")
+            lines.append(f"# TYPE {name} gauge")
+            for key, (counts, _) in sorted(collected.items()):
+                for q in SUMMARY_QUANTILES:
+                    quantile = 'quantile="%s"' % q
+                    value = metric.quantile(counts, q)
+                    lines.append(f"{name}{_labels(metric.labelnames, key, quantile)} {_number(value)}")
+    return "\n".join(lines) + "\n"
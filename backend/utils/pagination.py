@@ -0,0 +1,78 @@
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import tuple_
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class PageParams:
+    """Keyset pagination parameters shared by list endpoints"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size")
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+def encode_cursor(created_at: Optional[datetime], row_id: str) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def paginate(
+    query,
+    created_at_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = True,
+    key: Optional[Callable[[Any], Tuple[datetime, str]]] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """Apply keyset pagination on (created_at, id) to a query.
+
+    Returns the page of rows and the cursor for the next page (None on the
+    last page). `key` extracts (created_at, id) from a row when the query
+    does not return plain model instances.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    position = tuple_(created_at_column, id_column)
+
+    if cursor:
+        after = tuple_(*decode_cursor(cursor))
+        query = query.filter(position < after if descending else position > after)
+
+    if descending:
+        query = query.order_by(created_at_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(created_at_column.asc(), id_column.asc())
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    created_at, row_id = key(rows[-1]) if key else (rows[-1].created_at, rows[-1].id)
+    return rows, encode_cursor(created_at, row_id)
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the next-page cursor on a list response"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,29 @@
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Callable
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _run_with_session(job: Callable[[Session], None]) -> None:
+    from db.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        job(db)
+    finally:
+        db.close()
+
+async def run_in_background(job: Callable[[Session], None]) -> None:
+    """Run a database job once on the threadpool, logging rather than raising failures"""
+    try:
+        await run_in_threadpool(_run_with_session, job)
+    except Exception:
+        logger.exception("Background job %s failed", getattr(job, "__qualname__", job))
+
+async def run_periodically(interval: float, job: Callable[[Session], None]) -> None:
+    """Run a database job every `interval` seconds on the threadpool until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        await run_in_background(job)
@@ -0,0 +1,104 @@
+from typing import Dict
+import time
+
+from utils.metrics import registry, LabelValues
+
+request_duration = registry.latency_histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status class",
+    ("route", "method", "status")
+)
+
+class RequestMetricsMiddleware:
+    """ASGI middleware timing every HTTP request into `request_duration`.
+
+    Written against raw ASGI rather than BaseHTTPMiddleware so it adds no
+    extra task or response wrapping per request. The route label is the
+    matched path template (e.g. /api/swaps/{swap_id}/chat), so cardinality
+    stays bounded; streaming responses are timed until their body ends.
+    """
+
+    # Only touched from the event loop thread
+    in_flight = 0
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        RequestMetricsMiddleware.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            RequestMetricsMiddleware.in_flight -= 1
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_duration.observe(
+                time.perf_counter() - started,
+                route=route, method=scope["method"], status=f"{status_code // 100}xx"
+            )
+
+registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled",
+    lambda: {(): RequestMetricsMiddleware.in_flight}
+)
+
+def _cache_samples(stats: dict) -> Dict[str, float]:
+    lookups = stats["hits"] + stats["misses"]
+    return {
+        "hits": stats["hits"],
+        "misses": stats["misses"],
+        "size": stats["size"],
+        "hit_ratio": stats["hits"] / lookups if lookups else 0.0,
+    }
+
+def register_runtime_gauges() -> None:
+    """Expose connection pool occupancy and cache effectiveness as gauges"""
+    from db.database import engine, async_engine
+    from db.pool_metrics import pool_metrics, async_pool_metrics
+    from services.identity_cache import identity_cache
+    from utils.auth_utils import token_verifier
+    
+    pools = {"primary": (pool_metrics, engine), "async": (async_pool_metrics, async_engine)}
+    
+    def pool_values(field: str):
+        def collect() -> Dict[LabelValues, float]:
+            return {(name,): metrics.snapshot(pool_engine.pool)[field] for name, (metrics, pool_engine) in pools.items()}
+        return collect
+    
+    for field, documentation in (
+        ("size", "Configured connection pool size"),
+        ("in_use", "Connections checked out of the pool"),
+        ("checked_in", "Idle connections in the pool"),
+        ("overflow", "Connections open beyond the pool size"),
+        ("checkouts", "Connections checked out since start"),
+        ("checkout_timeouts", "Checkouts that timed out waiting for a connection"),
+    ):
+        registry.gauge(f"db_pool_{field}", documentation, pool_values(field), ("pool",))
+    registry.gauge(
+        "db_pool_checkout_wait_seconds_total", "Time spent waiting for pool checkouts since start",
+        lambda: {
+            (name,): metrics.snapshot(pool_engine.pool)["checkout_wait_seconds"]["total"]
+            for name, (metrics, pool_engine) in pools.items()
+        },
+        ("pool",)
+    )
+    
+    caches = {"identity": identity_cache.stats, "token": token_verifier.token_cache.stats}
+    for field in ("hits", "misses", "size", "hit_ratio"):
+        registry.gauge(
+            f"cache_{field}", f"Cache {field.replace('_', ' ')}",
+            lambda field=field: {(name,): _cache_samples(stats())[field] for name, stats in caches.items()},
+            ("cache",)
+        )
@@ -0,0 +1,122 @@
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter as Tally
+from contextvars import ContextVar
+from typing import Optional, Tuple
+import logging
+import re
+import time
+
+from config import get_settings
+from utils.metrics import registry
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+QUERY_REPEATS_HEADER = "X-DB-Max-Repeats"
+
+queries_per_request = registry.histogram(
+    "db_queries_per_request", "SQL statements executed per request", ("route",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200)
+)
+db_seconds_per_request = registry.histogram(
+    "db_seconds_per_request", "Time spent executing SQL per request", ("route",)
+)
+repeated_query_requests = registry.counter(
+    "db_repeated_query_requests_total",
+    "Requests that ran the same statement at least SQL_REPEAT_THRESHOLD times (likely N+1)",
+    ("route",)
+)
+query_budget_exceeded = registry.counter(
+    "db_query_budget_exceeded_total", "Requests that ran more statements than SQL_QUERY_BUDGET", ("route",)
+)
+
+class RequestQueryStats:
+    """SQL statements executed while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints: Tally = Tally()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def most_repeated(self) -> Tuple[Optional[str], int]:
+        if not self.fingerprints:
+            return None, 0
+        return self.fingerprints.most_common(1)[0]
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+def fingerprint(statement: str) -> str:
+    """Statement text with whitespace collapsed; parameters are already placeholders"""
+    return re.sub(r"\s+", " ", statement).strip()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None and context is not None:
+        context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+def install_query_hooks() -> None:
+    """Time every statement on every engine (sync, async and replicas)"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+async def sql_stats_middleware(request: Request, call_next):
+    """Collect per-request SQL statistics.
+
+    Query count and DB time go to the metrics registry, and to response
+    headers in debug mode. Requests that repeat one statement
+    SQL_REPEAT_THRESHOLD times are logged as likely N+1s; with
+    SQL_QUERY_BUDGET set, requests running more statements are logged, and
+    fail with a 500 when SQL_QUERY_BUDGET_ENFORCE is on (for dev and tests).
+    """
+    stats = RequestQueryStats()
+    token = _current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    queries_per_request.observe(stats.count, route=route)
+    db_seconds_per_request.observe(stats.seconds, route=route)
+
+    statement, repeats = stats.most_repeated()
+    if settings.sql_repeat_threshold and repeats >= settings.sql_repeat_threshold:
+        repeated_query_requests.inc(route=route)
+        logger.warning(
+            "%s %s ran the same statement %d times (likely N+1): %s",
+            request.method, route, repeats, statement[:300]
+        )
+
+    if settings.sql_query_budget and stats.count > settings.sql_query_budget:
+        query_budget_exceeded.inc(route=route)
+        logger.warning(
+            "%s %s ran %d statements, over the budget of %d",
+            request.method, route, stats.count, settings.sql_query_budget
+        )
+        if settings.sql_query_budget_enforce:
+            response = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"detail": f"Query budget exceeded: {stats.count} statements (budget {settings.sql_query_budget})"}
+            )
+
+    if settings.debug:
+        response.headers[QUERY_COUNT_HEADER] = str(stats.count)
+        response.headers[QUERY_TIME_HEADER] = f"{stats.seconds * 1000:.2f}"
+        response.headers[QUERY_REPEATS_HEADER] = str(repeats)
+    return response
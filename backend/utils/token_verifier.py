@@ -0,0 +1,194 @@
+from jose import jwt, JWTError
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class KeysUnavailable(Exception):
+    """The JWKS endpoint has never been reachable, so no token can be verified"""
+
+class JWKSCache:
+    """In-process cache of the signing keys published at a JWKS endpoint.
+
+    Keys are served from memory. Once the cache is older than `ttl` it is
+    refreshed on a background thread while the current keys keep serving;
+    a token signed with an unknown `kid` forces a synchronous refresh to
+    pick up rotated keys. Fetches are single-flight (concurrent callers
+    wait for the one in progress and reuse its result) and are attempted
+    at most once per `min_refresh_interval`, whether or not the last one
+    succeeded, so unknown kids and an unreachable endpoint can't turn
+    every request into a fetch.
+    """
+
+    def __init__(
+        self,
+        fetch_jwks: Callable[[], dict],
+        ttl: float = 3600,
+        min_refresh_interval: float = 30
+    ):
+        self._fetch_jwks = fetch_jwks
+        self._ttl = ttl
+        self._min_refresh_interval = min_refresh_interval
+        self._keys: Dict[str, dict] = {}
+        self._fetched_at = 0.0
+        self._attempted_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+
+    def _may_refresh(self) -> bool:
+        return self._attempted_at is None or time.monotonic() - self._attempted_at >= self._min_refresh_interval
+
+    def _refresh(self) -> None:
+        attempted_at = self._attempted_at
+        with self._refresh_lock:
+            if self._attempted_at != attempted_at:
+                # Another thread fetched while we waited for the lock
+                return
+            try:
+                jwks = self._fetch_jwks()
+                keys = {key["kid"]: key for key in jwks.get("keys", []) if "kid" in key}
+            except Exception:
+                # Keep serving the cached keys until the next attempt
+                logger.warning("Failed to refresh JWKS", exc_info=True)
+                keys = None
+            now = time.monotonic()
+            with self._lock:
+                if keys is not None:
+                    self._keys = keys
+                    self._fetched_at = now
+                # Set last, once the outcome is visible to threads that waited
+                self._attempted_at = now
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="jwks-refresh", daemon=True).start()
+
+    def get_key(self, kid: str) -> Optional[dict]:
+        """Return the JWK for `kid`, refreshing the key set if needed.
+
+        Raises KeysUnavailable if no key set has ever been fetched.
+        """
+        key = self._keys.get(kid)
+
+        if key is not None:
+            if time.monotonic() - self._fetched_at > self._ttl and self._may_refresh():
+                self._refresh_in_background()
+            return key
+
+        # Unknown kid: keys may have been rotated
+        if self._may_refresh():
+            self._refresh()
+            key = self._keys.get(kid)
+        if key is None and not self._keys:
+            raise KeysUnavailable("No signing keys could be fetched")
+        return key
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified token claims keyed by token hash, valid until `exp`"""
+
+    def __init__(self, max_size: int = 10000):
+        self._max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, float(expires_at))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class TokenVerifier:
+    """Verifies RS256 JWTs against a cached JWKS, memoizing verified tokens"""
+
+    def __init__(
+        self,
+        jwks: JWKSCache,
+        token_cache: VerifiedTokenCache,
+        verify_signature: bool = True,
+        algorithms: Tuple[str, ...] = ("RS256",),
+        issuer: Optional[str] = None,
+        audience: Optional[str] = None
+    ):
+        self.jwks = jwks
+        self.token_cache = token_cache
+        self.verify_signature = verify_signature
+        self.algorithms = list(algorithms)
+        self.issuer = issuer
+        self.audience = audience
+
+    def verify(self, token: str) -> dict:
+        """Return the token's claims, raising JWTError if it is invalid.
+
+        Raises KeysUnavailable if the signing keys can't be fetched at all.
+        """
+        claims = self.token_cache.get(token)
+        if claims is not None:
+            return claims
+
+        if self.verify_signature:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = self.jwks.get_key(kid) if kid else None
+            if key is None:
+                raise JWTError("Unknown signing key")
+            # `exp`, `nbf` and `iat` are always checked; `iss` and `aud` when configured
+            claims = jwt.decode(
+                token, key, algorithms=self.algorithms,
+                issuer=self.issuer, audience=self.audience,
+                options={"verify_aud": self.audience is not None}
+            )
+        else:
+            claims = jwt.decode(token, key="", options={"verify_signature": False})
+
+        self.token_cache.put(token, claims)
+        return claims
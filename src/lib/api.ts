@@ -2,6 +2,26 @@ import { User } from '@/types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
 
+// After a write the API returns X-Read-Your-Writes (an expiry, in epoch
+// seconds); sending it back until then keeps our reads on the primary
+// database, so they see the write even with read replicas
+const READ_YOUR_WRITES_HEADER = 'X-Read-Your-Writes';
+let readYourWrites: string | null = null;
+
+const readYourWritesHeaders = (): Record<string, string> => {
+  if (readYourWrites && Number(readYourWrites) * 1000 > Date.now()) {
+    return { [READ_YOUR_WRITES_HEADER]: readYourWrites };
+  }
+  return {};
+};
+
+const trackReadYourWrites = (response: Response) => {
+  const value = response.headers.get(READ_YOUR_WRITES_HEADER);
+  if (value) {
+    readYourWrites = value;
+  }
+};
+
 // Helper function to make authenticated API calls
 const apiCall = async (endpoint: string, token: string | null, options: RequestInit = {}) => {
   const response = await fetch(`${API_BASE_URL}${endpoint}`, {
@@ -9,9 +29,11 @@ const apiCall = async (endpoint: string, token: string | null, options: RequestI
     headers: {
       'Content-Type': 'application/json',
       ...(token && { 'Authorization': `Bearer ${token}` }),
+      ...readYourWritesHeaders(),
       ...options.headers,
     },
   });
+  trackReadYourWrites(response);
 
   if (!response.ok) {
     throw new Error(`API call failed: ${response.status} ${response.statusText}`);
@@ -20,6 +42,36 @@ const apiCall = async (endpoint: string, token: string | null, options: RequestI
   return response.json();
 };
 
+const PAGE_SIZE = 200;
+
+// Fetch every page of a keyset-paginated list endpoint by following X-Next-Cursor
+const apiCallAllPages = async <T = any>(endpoint: string, token: string | null): Promise<T[]> => {
+  const items: T[] = [];
+  const separator = endpoint.includes('?') ? '&' : '?';
+  let cursor: string | null = null;
+
+  do {
+    const params = `limit=${PAGE_SIZE}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`;
+    const response = await fetch(`${API_BASE_URL}${endpoint}${separator}${params}`, {
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token && { 'Authorization': `Bearer ${token}` }),
+        ...readYourWritesHeaders(),
+      },
+    });
+    trackReadYourWrites(response);
+
+    if (!response.ok) {
+      throw new Error(`API call failed: ${response.status} ${response.statusText}`);
+    }
+
+    items.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+
+  return items;
+};
+
 // User API functions
 export const userApi = {
   // Sync user data from Clerk to backend
@@ -51,7 +103,7 @@ export const userApi = {
   // Search users
   searchUsers: async (token: string | null, skill?: string): Promise<User[]> => {
     const params = skill ? `?skill=${encodeURIComponent(skill)}` : '';
-    return apiCall(`/users/search${params}`, token);
+    return apiCallAllPages(`/users/search${params}`, token);
   },
 
   // Get user ratings and feedback
@@ -67,7 +119,7 @@ export const userApi = {
 export const swapApi = {
   // Get swap requests
   getSwapRequests: async (token: string | null) => {
-    return apiCall('/swaps', token);
+    return apiCallAllPages('/swaps', token);
   },
 
   // Create swap request
@@ -131,12 +183,12 @@ export const swapApi = {
 export const adminApi = {
   // Get all users (admin only)
   getAllUsers: async (token: string | null) => {
-    return apiCall('/admin/users', token);
+    return apiCallAllPages('/admin/users', token);
   },
 
   // Get all swap requests (admin only)
   getAllSwaps: async (token: string | null) => {
-    return apiCall('/admin/swaps', token);
+    return apiCallAllPages('/admin/swaps', token);
   },
 
   // Ban/unban user (admin only)
@@ -159,7 +211,7 @@ export const adminApi = {
 export const notificationApi = {
   // Get user notifications
   getNotifications: async (token: string | null) => {
-    return apiCall('/notifications', token);
+    return apiCallAllPages('/notifications', token);
   },
 
   // Mark notification as read
@@ -178,6 +230,6 @@ export const notificationApi = {
 
   // Get platform messages
   getPlatformMessages: async (token: string | null) => {
-    return apiCall('/notifications/platform-messages', token);
+    return apiCallAllPages('/notifications/platform-messages', token);
   },
 }; 
\ No newline at end of file